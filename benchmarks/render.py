@@ -0,0 +1,38 @@
+import io
+import timeit
+from repli.callback import NativeFunction
+from repli.command import Page
+from repli.console import Console
+from repli.interpreter import Interpreter
+from typing import List
+
+
+SIZES: List[int] = [10, 1_000, 10_000]
+REPEAT: int = 5
+
+
+def build_page(size: int) -> Page:
+    page = Page(description=f"{size} entries")
+    for index in range(size):
+        page.command(NativeFunction, f"command {index}")(lambda: None)
+    return page
+
+
+def main() -> None:
+    # a headless console so the benchmark measures rendering, not the terminal
+    console = Console(file=io.StringIO(), width=120, height=50, force_terminal=True)
+    print(f"{'entries':>8}  {'cold (ms)':>10}  {'warm (ms)':>10}")
+    for size in SIZES:
+        page = build_page(size)
+        interpreter = Interpreter(page=page)
+        cold: float = 0.0
+        for _ in range(REPEAT):
+            page.invalidate()
+            cold += timeit.timeit(interpreter.render, number=1)
+        warm: float = timeit.timeit(interpreter.render, number=REPEAT)
+        console.file = io.StringIO()
+        print(f"{size:>8}  {cold / REPEAT * 1000:>10.2f}  {warm / REPEAT * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
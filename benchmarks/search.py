@@ -0,0 +1,57 @@
+import random
+import timeit
+from repli.callback import NativeFunction
+from repli.command import Page
+from repli.index import Index
+from repli.search import Search
+from typing import List
+
+
+ENTRIES: int = 10_000
+WIDTH: int = 100
+REPEAT: int = 100
+QUERIES: List[str] = ["restart", "rollback prod", "status 4711", "dpeloy", "sv", "cluster inventory eu-west"]
+WORDS: List[str] = [
+    "deploy",
+    "rollback",
+    "restart",
+    "status",
+    "inventory",
+    "cluster",
+    "service",
+    "database",
+    "prod",
+    "staging",
+    "eu-west",
+    "us-east",
+    "logs",
+    "metrics",
+]
+
+
+def build_tree(entries: int, width: int) -> Page:
+    rng = random.Random(0)
+    root = Page(description="root")
+    for index in range(entries // width):
+        page = Page(description=" ".join(rng.sample(WORDS, 2)))
+        root.add_page(page)
+        for _ in range(width):
+            description = " ".join(rng.sample(WORDS, 3)) + f" {rng.randrange(10_000)}"
+            page.command(NativeFunction, description)(lambda: None)
+    return root
+
+
+def main() -> None:
+    root = build_tree(entries=ENTRIES, width=WIDTH)
+    index = Index(root=root)
+    build = timeit.timeit(lambda: Search(index=index), number=1)
+    search = Search(index=index)
+    print(f"indexed {len(search.documents)} entries in {build * 1000:.1f} ms")
+    print(f"{'query':<28}  {'matches':>7}  {'ms/query':>8}")
+    for query in QUERIES:
+        seconds = timeit.timeit(lambda: search.query(query), number=REPEAT)
+        print(f"{query:<28}  {len(search.query(query)):>7}  {seconds / REPEAT * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import atexit
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from repli.callback import NativeFunction, Subprocess
+from repli.command import Command, Page
+from repli.console import Console
+from repli.index import Index
+from repli.interpreter import Interpreter
+from repli.menu import load
+from repli.search import Search
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+WIDTH: int = 10
+DEPTH: int = 3
+REPEAT: int = 20
+THRESHOLD: float = 0.25
+
+
+def build_tree(width: int, depth: int) -> Page:
+    # every page holds width commands and, above the last level, width nested pages
+    def build(description: str, level: int) -> Page:
+        page = Page(description=description)
+        for index in range(width):
+            page.command(NativeFunction, f"{description} command {index}")(lambda *args: None)
+        if level < depth:
+            for index in range(width):
+                page.add_page(build(description=f"{description}.{index}", level=level + 1))
+        return page
+
+    return build(description="root", level=1)
+
+
+def noop(*args: str) -> None:
+    pass
+
+
+def build_menu(width: int, depth: int) -> Dict[str, Any]:
+    # the same tree as build_tree, as a declarative menu
+    def build(description: str, level: int) -> Dict[str, Any]:
+        commands: List[Dict[str, Any]] = [
+            {"description": f"{description} command {index}", "function": "benchmarks.suite:noop"} for index in range(width)
+        ]
+        if level < depth:
+            commands += [build(description=f"{description}.{index}", level=level + 1) for index in range(width)]
+        return {"description": description, "commands": commands}
+
+    return build(description="root", level=1)
+
+
+def deepest(page: Page) -> List[str]:
+    # the index path of a command on the last level of the tree
+    keys: List[str] = []
+    while True:
+        pages: List[Tuple[str, Page]] = [(key, node) for key, node in page.commands.items() if isinstance(node, Page)]
+        if not pages:
+            return [*keys, next(key for key, node in page.commands.items() if isinstance(node, Command))]
+        key, page = pages[-1]
+        keys.append(key)
+
+
+def importing(module: str) -> Callable[[], object]:
+    # each run imports the module in a new interpreter, so that nothing is imported yet.
+    # rich.console is the reference the imports of repli are compared with
+    command: List[str] = [sys.executable, "-c", f"import {module}"]
+    return lambda: subprocess.run(args=command, check=True)
+
+
+def headless() -> Console:
+    # output goes to memory and "press enter to continue" returns at once,
+    # so that the cases measure repli rather than the terminal
+    console: Console = Console(file=io.StringIO(), width=120, height=50, force_terminal=True)
+    setattr(console, "input", lambda *args, **kwargs: "")
+    return console
+
+
+def cases(width: int, depth: int) -> Dict[str, Callable[[], object]]:
+    console: Console = headless()
+    root: Page = build_tree(width=width, depth=depth)
+    interpreter: Interpreter = Interpreter(page=root)
+    path: str = ".".join(deepest(root))
+    index: Index = Index(root=root)
+    search: Search = Search(index=index)
+    subprocess: Subprocess = Subprocess(callable=lambda *args: "true")
+    large: Interpreter = Interpreter(page=build_tree(width=width * width * width, depth=1))
+    pooled: Subprocess = Subprocess(callable=lambda *args: "true", pooled=True)
+    directory: str = tempfile.mkdtemp(prefix="repli-benchmark-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    menu: str = os.path.join(directory, "menu.json")
+    cache: str = os.path.join(directory, "cache")
+    with open(menu, "w", encoding="utf-8") as file:
+        json.dump(build_menu(width=width, depth=depth), file)
+
+    def render_cold() -> None:
+        interpreter.current_page.invalidate()
+        interpreter.render()
+        console.file = io.StringIO()
+
+    def render_warm() -> None:
+        interpreter.render()
+        console.file = io.StringIO()
+
+    def render_large() -> None:
+        # a page far taller than the console, of which only a window is rendered
+        large.current_page.invalidate()
+        large.render()
+        console.file = io.StringIO()
+
+    def register() -> None:
+        page = Page(description="register")
+        for index in range(width * width):
+            page.command(NativeFunction, f"command {index}")(lambda: None)
+
+    def compile_menu() -> None:
+        shutil.rmtree(cache, ignore_errors=True)
+        load(path=menu, cache=cache)
+
+    def execute() -> None:
+        interpreter.execute(args=[path])
+        console.file = io.StringIO()
+
+    return {
+        "render.cold": render_cold,
+        "render.warm": render_warm,
+        "render.large": render_large,
+        "execute.dispatch": execute,
+        "page.command": register,
+        "index.build": lambda: Index(root=root),
+        "menu.compile": compile_menu,
+        "menu.snapshot": lambda: load(path=menu, cache=cache),
+        "search.build": lambda: Search(index=index),
+        "search.query": lambda: search.query("command 7"),
+        "subprocess.spawn": subprocess.run,
+        "subprocess.pooled": lambda: pooled.spawn(arguments="true"),
+        "import.repli": importing("repli"),
+        "import.interpreter": importing("repli.interpreter"),
+        "import.rich": importing("rich.console"),
+    }
+
+
+def measure(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    function()
+    samples: List[float] = timeit.repeat(function, number=1, repeat=repeat)
+    return {"median": statistics.median(samples), "min": min(samples), "max": max(samples)}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    # medians are compared, since they are the least sensitive to a noisy machine
+    regressions: List[str] = []
+    print(f"{'case':<20}  {'baseline (ms)':>13}  {'current (ms)':>12}  {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before: float = baseline[name]["median"]
+        change: float = result["median"] / before - 1 if before else 0.0
+        marker: str = "  regression" if change > threshold else ""
+        print(f"{name:<20}  {before * 1000:>13.3f}  {result['median'] * 1000:>12.3f}  {change:>+8.1%}{marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="benchmark repli")
+    parser.add_argument("--width", type=int, default=WIDTH, help="commands and nested pages per page")
+    parser.add_argument("--depth", type=int, default=DEPTH, help="levels of pages")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per case")
+    parser.add_argument("--filter", default="", help="only run the cases whose name contains this")
+    parser.add_argument("--save", metavar="FILE", help="write the results to FILE as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the results with the baseline in FILE")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="slowdown of the median over the baseline that fails the comparison",
+    )
+    options = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'case':<20}  {'median (ms)':>11}  {'min (ms)':>9}  {'max (ms)':>9}")
+    for name, function in cases(width=options.width, depth=options.depth).items():
+        if options.filter not in name:
+            continue
+        result: Dict[str, float] = measure(function=function, repeat=options.repeat)
+        results[name] = result
+        print(f"{name:<20}  {result['median'] * 1000:>11.3f}  {result['min'] * 1000:>9.3f}  {result['max'] * 1000:>9.3f}")
+
+    if options.save is not None:
+        with open(options.save, "w", encoding="utf-8") as file:
+            json.dump({"width": options.width, "depth": options.depth, "results": results}, file, indent=2)
+    if options.compare is not None:
+        with open(options.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if (baseline["width"], baseline["depth"]) != (options.width, options.depth):
+            print("baseline was recorded with a different tree, so it cannot be compared")
+            return 2
+        print()
+        regressions: List[str] = compare(results=results, baseline=baseline["results"], threshold=options.threshold)
+        if regressions:
+            print(f"{len(regressions)} cases regressed by more than {options.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
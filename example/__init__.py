@@ -1,3 +1,4 @@
+import sys
 from repli import Interpreter
 from repli.callback import NativeFunction, Subprocess
 from repli.command import Page
@@ -22,4 +23,4 @@ page.add_page(nested_page)
 
 def main():
     interpreter = Interpreter(page, "myapp")
-    interpreter.loop()
+    sys.exit(interpreter.main())
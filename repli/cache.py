@@ -0,0 +1,224 @@
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, OrderedDict as OrderedDictType, TextIO, Tuple
+
+
+DEFAULT_TTL: float = 300.0
+DEFAULT_MAX_ENTRIES: int = 128
+DEFAULT_MAX_BYTES: int = 4 * 1024 * 1024
+
+Key = Tuple[str, Tuple[str, ...], Tuple[Tuple[str, str], ...]]
+
+
+# marks the names of results that are only valid in this process, which are not persisted
+TRANSIENT: str = "#"
+
+
+def key(name: str, args: Tuple[str, ...], kwargs: Dict[str, str]) -> Key:
+    return (name, tuple(args), tuple(sorted(kwargs.items())))
+
+
+def transient(name: str, serial: int) -> str:
+    return f"{name}{TRANSIENT}{serial}"
+
+
+class Tee(io.StringIO):
+    # passes writes through to the stream while keeping a copy of them
+    def __init__(self, stream: TextIO) -> None:
+        super().__init__()
+        self._stream: TextIO = stream
+
+    def write(self, text: str) -> int:
+        self._stream.write(text)
+        return super().write(text)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+    def isatty(self) -> bool:
+        return self._stream.isatty()
+
+
+class Record:
+    def __init__(self, key: Key, output: str, created: float, expires: float, hits: int = 0) -> None:
+        self._key: Key = key
+        self._output: str = output
+        self._created: float = created
+        self._expires: float = expires
+        self._size: int = len(output.encode("utf-8"))
+        self._hits: int = hits
+
+    @property
+    def key(self) -> Key:
+        return self._key
+
+    @property
+    def output(self) -> str:
+        return self._output
+
+    @property
+    def created(self) -> float:
+        return self._created
+
+    @property
+    def expires(self) -> float:
+        return self._expires
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires
+
+    def hit(self) -> None:
+        self._hits += 1
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        path: Optional[str] = None,
+    ) -> None:
+        self._max_entries: int = max_entries
+        self._max_bytes: int = max_bytes
+        self._records: OrderedDictType[Key, Record] = OrderedDict()
+        self._size: int = 0
+        self._path: Optional[str] = None
+        # sessions served over a socket share the cache from their own threads. it is
+        # reentrant, since get, put and flush remove and save through the public methods
+        self._lock: threading.RLock = threading.RLock()
+        if path is not None:
+            self.persist(path=path)
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def records(self) -> List[Record]:
+        with self._lock:
+            return list(self._records.values())
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def get(self, key: Key) -> Optional[Record]:
+        with self._lock:
+            record: Optional[Record] = self._records.get(key)
+            if record is None:
+                return None
+            if record.expired:
+                self.remove(key)
+                self.save()
+                return None
+            self._records.move_to_end(key)
+            record.hit()
+            return record
+
+    def put(self, key: Key, output: str, ttl: float) -> None:
+        with self._lock:
+            self.remove(key)
+            created: float = time.time()
+            record: Record = Record(key=key, output=output, created=created, expires=created + ttl)
+            # an output larger than the whole cache is never stored
+            if record.size > self.max_bytes:
+                return
+            self._records[key] = record
+            self._size += record.size
+            while len(self._records) > self.max_entries or self.size > self.max_bytes:
+                self.remove(next(iter(self._records)))
+            self.save()
+
+    def remove(self, key: Key) -> None:
+        with self._lock:
+            record: Optional[Record] = self._records.pop(key, None)
+            if record is not None:
+                self._size -= record.size
+
+    def flush(self, key: Optional[Key] = None) -> int:
+        with self._lock:
+            keys: List[Key] = list(self._records) if key is None else [key]
+            count: int = 0
+            for item in keys:
+                if item in self._records:
+                    self.remove(item)
+                    count += 1
+            self.save()
+            return count
+
+    def persist(self, path: str) -> None:
+        # records are kept across sessions in a json file that is rewritten on every change
+        with self._lock:
+            self._path = os.path.expanduser(path)
+            if not os.path.exists(self._path):
+                return
+            try:
+                with open(self._path, encoding="utf-8") as file:
+                    data: List[Dict[str, Any]] = json.load(file)
+            except (OSError, ValueError):
+                return
+            for item in data:
+                name, args, kwargs = item["key"]
+                record: Record = Record(
+                    key=(name, tuple(args), tuple((k, v) for k, v in kwargs)),
+                    output=item["output"],
+                    created=item["created"],
+                    expires=item["expires"],
+                    hits=item["hits"],
+                )
+                if not record.expired:
+                    self._records[record.key] = record
+                    self._size += record.size
+
+    def save(self) -> None:
+        with self._lock:
+            if self.path is None:
+                return
+            data: List[Dict[str, Any]] = [
+                {
+                    "key": record.key,
+                    "output": record.output,
+                    "created": record.created,
+                    "expires": record.expires,
+                    "hits": record.hits,
+                }
+                for record in self._records.values()
+                if TRANSIENT not in record.key[0]
+            ]
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temporary: str = f"{self.path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(temporary, self.path)
+
+
+results: ResultCache = ResultCache()
@@ -1,23 +1,56 @@
 import abc
+import contextlib
+import itertools
+import os
+import queue
+import signal
 import subprocess
 import shlex
-from repli.console import Console
-from rich.rule import Rule
-from typing import Any, Callable
+import sys
+import threading
+import time
+from repli.cache import DEFAULT_TTL, Key, Record, Tee, key, results, transient
+from repli.terminal import console, remote
+from typing import IO, TYPE_CHECKING, Any, Callable, Iterator, List, Optional, TextIO, Tuple, Union
 
+if TYPE_CHECKING:
+    import asyncio
 
-console: Console = Console()
 
+TERMINATE_TIMEOUT: float = 5.0
+
+# numbers native functions, so that the results of one are never replayed for another
+serials: Iterator[int] = itertools.count(1)
 
-class Callback(abc.ABC):
-    def __init__(self) -> None:
-        pass
 
+class Callback(abc.ABC):
     def __call__(self, *args: str, **kwargs: str) -> bool:
         console.info(f"callback function args: {args}")
         console.info(f"callback function kwargs: {kwargs}")
         return False
 
+    def invoke(self, *args: str, **kwargs: str) -> Tuple[bool, Optional[int]]:
+        # an interactive call, which returns whether to exit along with the exit code,
+        # if the callback has one. it is not kept on the callback, which sessions share
+        return self(*args, **kwargs), None
+
+    def run(self, *args: str, **kwargs: str) -> int:
+        raise Exception("callback cannot run non-interactively")
+
+    @property
+    def awaitable(self) -> bool:
+        return False
+
+    async def acall(self, *args: str, **kwargs: str) -> bool:
+        result, _ = await self.ainvoke(*args, **kwargs)
+        return result
+
+    async def ainvoke(self, *args: str, **kwargs: str) -> Tuple[bool, Optional[int]]:
+        import asyncio
+
+        # callbacks without an event loop implementation run on a worker thread
+        return await asyncio.to_thread(self.invoke, *args, **kwargs)
+
 
 class Builtin(Callback):
     def __init__(
@@ -39,53 +72,440 @@ class NativeFunction(Callback):
     def __init__(
         self,
         callable: Callable[[str, str], Any],
+        cache: Union[bool, float] = False,
     ) -> None:
         super().__init__()
         self._callable: Callable[[str, str], Any] = callable
+        self._serial: int = next(serials)
+        self._scope: Optional[str] = None
+        self._ttl: Optional[float] = None
+        if cache is True:
+            self._ttl = DEFAULT_TTL
+        elif cache is not False:
+            self._ttl = float(cache)
 
     @property
     def callable(self) -> Callable[[str, str], Any]:
         return self._callable
 
+    @property
+    def ttl(self) -> Optional[float]:
+        return self._ttl
+
+    @property
+    def scope(self) -> Optional[str]:
+        # the path of the command, once it is indexed
+        return self._scope
+
+    @scope.setter
+    def scope(self, scope: Optional[str]) -> None:
+        self._scope = scope
+
+    @property
+    def name(self) -> str:
+        # cached results belong to one command. closures from the same factory share a
+        # qualified name, so it is qualified by the command's path, which also holds
+        # across sessions, or else by this callback alone
+        module: str = getattr(self.callable, "__module__", None) or ""
+        name: str = f"{module}.{getattr(self.callable, '__qualname__', repr(self.callable))}"
+        if self.scope is not None:
+            return f"{self.scope}:{name}"
+        return transient(name=name, serial=self._serial)
+
+    @property
+    def awaitable(self) -> bool:
+        import inspect
+
+        return inspect.iscoroutinefunction(self.callable)
+
     def __call__(self, *args: str, **kwargs: str) -> bool:
+        result, _ = self.invoke(*args, **kwargs)
+        return result
+
+    def invoke(self, *args: str, **kwargs: str) -> Tuple[bool, Optional[int]]:
+        from rich.rule import Rule
+
         super().__call__(*args, **kwargs)
+        returncode: int = 0
         try:
             console.print(Rule(style="magenta"))
-            self.callable(*args, **kwargs)
+            if self.ttl is None:
+                self.run(*args, **kwargs)
+            else:
+                self.memoize(self.ttl, *args, **kwargs)
             console.print(Rule(style="magenta"))
         except Exception as e:
+            returncode = 1
             console.error(f"native function raised an exception: {e}")
-        finally:
+        return False, returncode
+
+    async def ainvoke(self, *args: str, **kwargs: str) -> Tuple[bool, Optional[int]]:
+        from rich.rule import Rule
+
+        if not self.awaitable:
+            return await super().ainvoke(*args, **kwargs)
+        Callback.__call__(self, *args, **kwargs)
+        returncode: int = 0
+        try:
+            console.print(Rule(style="magenta"))
+            if self.ttl is None:
+                await self.callable(*args, **kwargs)
+            else:
+                await self.amemoize(self.ttl, *args, **kwargs)
+            console.print(Rule(style="magenta"))
+        except Exception as e:
+            returncode = 1
+            console.error(f"native function raised an exception: {e}")
+        return False, returncode
+
+    def run(self, *args: str, **kwargs: str) -> int:
+        if self.awaitable:
+            import asyncio
+
+            # without a running event loop a coroutine function gets one of its own
+            asyncio.run(self.callable(*args, **kwargs))
+        else:
+            self.callable(*args, **kwargs)
+        return 0
+
+    def replay(self, item: Key) -> bool:
+        record: Optional[Record] = results.get(key=item)
+        if record is None:
             return False
+        sys.stdout.write(record.output)
+        console.info(f"cached result from {record.age:.0f}s ago")
+        return True
+
+    @contextlib.contextmanager
+    def record(self, item: Key, ttl: float) -> Iterator[None]:
+        from repli.job import Output
+
+        # the output is shown as it is written and kept for the next call
+        output: Output = Output.install()
+        previous: Optional[TextIO] = output.target
+        tee: Tee = Tee(stream=previous or output.stream)
+        output.target = tee
+        try:
+            yield
+        finally:
+            output.target = previous
+        results.put(key=item, output=tee.getvalue(), ttl=ttl)
+
+    def memoize(self, ttl: float, *args: str, **kwargs: str) -> None:
+        item: Key = key(name=self.name, args=args, kwargs=kwargs)
+        if self.replay(item=item):
+            return
+        with self.record(item=item, ttl=ttl):
+            self.run(*args, **kwargs)
+
+    async def amemoize(self, ttl: float, *args: str, **kwargs: str) -> None:
+        item: Key = key(name=self.name, args=args, kwargs=kwargs)
+        if self.replay(item=item):
+            return
+        with self.record(item=item, ttl=ttl):
+            await self.callable(*args, **kwargs)
 
 
 class Subprocess(Callback):
     def __init__(
         self,
         callable: Callable[[str, str], str],
+        stream: bool = False,
+        timeout: Optional[float] = None,
+        pooled: bool = False,
     ) -> None:
         super().__init__()
         self._callable: Callable[[str, str], str] = callable
+        self._stream: bool = stream
+        self._timeout: Optional[float] = timeout
+        self._pooled: bool = pooled
 
     @property
     def callable(self) -> Callable[[str, str], str]:
         return self._callable
 
+    @property
+    def stream(self) -> bool:
+        return self._stream
+
+    @property
+    def timeout(self) -> Optional[float]:
+        return self._timeout
+
+    @property
+    def pooled(self) -> bool:
+        return self._pooled
+
     def __call__(self, *args: str, **kwargs: str) -> bool:
+        result, _ = self.invoke(*args, **kwargs)
+        return result
+
+    def invoke(self, *args: str, **kwargs: str) -> Tuple[bool, Optional[int]]:
+        from rich.rule import Rule
+
         super().__call__(*args, **kwargs)
         arguments = self.callable(*args, **kwargs)
         console.info(f"running subprocess command: '{arguments}'")
+        returncode: int
         try:
             console.print(Rule(style="magenta"))
-            returncode = subprocess.call(
-                args=shlex.split(arguments),
-                text=True,
-                encoding="utf-8",
-            )
+            returncode = self.spawn(arguments=arguments)
             console.print(Rule(style="magenta"))
             if returncode != 0:
                 console.error(f"subprocess returned an error code: {returncode}")
         except Exception as e:
+            returncode = -1
             console.error(f"subprocess raised an exception: {e}")
-        finally:
-            return False
+        return False, returncode
+
+    async def ainvoke(self, *args: str, **kwargs: str) -> Tuple[bool, Optional[int]]:
+        from rich.rule import Rule
+
+        Callback.__call__(self, *args, **kwargs)
+        arguments = self.callable(*args, **kwargs)
+        console.info(f"running subprocess command: '{arguments}'")
+        returncode: int
+        try:
+            console.print(Rule(style="magenta"))
+            returncode = await self.aspawn(arguments=arguments)
+            console.print(Rule(style="magenta"))
+            if returncode != 0:
+                console.error(f"subprocess returned an error code: {returncode}")
+        except Exception as e:
+            returncode = -1
+            console.error(f"subprocess raised an exception: {e}")
+        return False, returncode
+
+    def run(self, *args: str, **kwargs: str) -> int:
+        return self.spawn(arguments=self.callable(*args, **kwargs))
+
+    @property
+    def awaitable(self) -> bool:
+        return True
+
+    def spawn(self, arguments: str) -> int:
+        if self.pooled:
+            return self.delegate(arguments=arguments)
+        if self.stream or remote.get():
+            return self.communicate(process=self.popen(arguments=arguments))
+        try:
+            return subprocess.call(
+                args=shlex.split(arguments),
+                text=True,
+                encoding="utf-8",
+                timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired:
+            # call kills the process before raising
+            console.error(f"subprocess timed out after {self.timeout} seconds")
+            return -signal.SIGKILL
+
+    def popen(self, arguments: str) -> subprocess.Popen:
+        # the child leads its own process group so that signals reach the
+        # whole tree it spawns, and ctrl-c at the prompt does not reach it
+        return subprocess.Popen(
+            args=shlex.split(arguments),
+            stdin=subprocess.DEVNULL if remote.get() else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            start_new_session=True,
+        )
+
+    def echo(self, name: str, line: str) -> None:
+        if name == "stderr":
+            console.out(line.rstrip("\n"), style="yellow", highlight=False)
+        else:
+            console.out(line.rstrip("\n"), highlight=False)
+
+    def delegate(self, arguments: str) -> int:
+        from repli.pool import workers
+
+        # a pooled command runs on a worker shell, without stdin, and its output is
+        # always streamed. a worker interrupted or timed out is killed with it
+        start: float = time.monotonic()
+        returncode: int
+        try:
+            returncode = workers.run(arguments=arguments, output=self.echo, timeout=self.timeout)
+        except KeyboardInterrupt:
+            console.error("subprocess interrupted, killing its worker")
+            returncode = -signal.SIGINT
+        except subprocess.TimeoutExpired:
+            console.error(f"subprocess timed out after {self.timeout} seconds")
+            returncode = -signal.SIGKILL
+
+        console.info(f"subprocess exited with code {returncode} in {time.monotonic() - start:.2f}s")
+        return returncode
+
+    async def adelegate(self, arguments: str) -> int:
+        import asyncio
+        from repli.pool import workers
+
+        start: float = time.monotonic()
+        returncode: int
+        try:
+            with workers.worker() as worker:
+                returncode = await asyncio.to_thread(worker.run, arguments, self.echo, self.timeout)
+        except asyncio.CancelledError:
+            self.uncancel()
+            console.error("subprocess interrupted, killing its worker")
+            returncode = -signal.SIGINT
+        except subprocess.TimeoutExpired:
+            console.error(f"subprocess timed out after {self.timeout} seconds")
+            returncode = -signal.SIGKILL
+
+        console.info(f"subprocess exited with code {returncode} in {time.monotonic() - start:.2f}s")
+        return returncode
+
+    def forward(self, pipe: IO[str], name: str, lines: "queue.Queue[Tuple[str, Optional[str]]]") -> None:
+        with pipe:
+            for line in iter(pipe.readline, ""):
+                lines.put((name, line))
+        lines.put((name, None))
+
+    def signal(self, process: Union[subprocess.Popen, "asyncio.subprocess.Process"], signum: int) -> None:
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signum)
+            else:
+                process.send_signal(signum)
+        except ProcessLookupError:
+            pass
+
+    def terminate(self, process: subprocess.Popen, signum: int) -> int:
+        for sig in [signum, signal.SIGTERM]:
+            self.signal(process=process, signum=sig)
+            try:
+                return process.wait(timeout=TERMINATE_TIMEOUT)
+            except (subprocess.TimeoutExpired, KeyboardInterrupt):
+                # escalate on a grace timeout or a repeated ctrl-c
+                continue
+        process.kill()
+        return process.wait()
+
+    def communicate(self, process: subprocess.Popen) -> int:
+        start: float = time.monotonic()
+        lines: "queue.Queue[Tuple[str, Optional[str]]]" = queue.Queue()
+        readers: List[threading.Thread] = [
+            threading.Thread(target=self.forward, args=(process.stdout, "stdout", lines), daemon=True),
+            threading.Thread(target=self.forward, args=(process.stderr, "stderr", lines), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        returncode: int
+        try:
+            remaining: Optional[float] = self.timeout
+            streams: int = len(readers)
+            while streams > 0:
+                if self.timeout is not None:
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        raise subprocess.TimeoutExpired(cmd=process.args, timeout=self.timeout)
+                try:
+                    name, line = lines.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    streams -= 1
+                else:
+                    self.echo(name=name, line=line)
+            if self.timeout is not None:
+                remaining = max(self.timeout - (time.monotonic() - start), 0)
+            returncode = process.wait(timeout=remaining)
+        except KeyboardInterrupt:
+            console.error("subprocess interrupted, sending SIGINT to its process group")
+            returncode = self.terminate(process=process, signum=signal.SIGINT)
+        except subprocess.TimeoutExpired:
+            console.error(f"subprocess timed out after {self.timeout} seconds")
+            returncode = self.terminate(process=process, signum=signal.SIGTERM)
+
+        console.info(f"subprocess exited with code {returncode} in {time.monotonic() - start:.2f}s")
+        return returncode
+
+    async def aspawn(self, arguments: str) -> int:
+        import asyncio
+
+        if self.pooled:
+            return await self.adelegate(arguments=arguments)
+        if self.stream or remote.get():
+            process = await asyncio.create_subprocess_exec(
+                *shlex.split(arguments),
+                stdin=asyncio.subprocess.DEVNULL if remote.get() else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+            return await self.acommunicate(process=process)
+        process = await asyncio.create_subprocess_exec(*shlex.split(arguments))
+        try:
+            return await asyncio.wait_for(process.wait(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            console.error(f"subprocess timed out after {self.timeout} seconds")
+            process.kill()
+            return await process.wait()
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+
+    async def aforward(self, reader: Optional["asyncio.StreamReader"], name: str) -> None:
+        if reader is None:
+            return
+        async for data in reader:
+            line: str = data.decode("utf-8", errors="replace").rstrip("\n")
+            if name == "stderr":
+                console.out(line, style="yellow", highlight=False)
+            else:
+                console.out(line, highlight=False)
+
+    async def aterminate(self, process: "asyncio.subprocess.Process", signum: int) -> int:
+        import asyncio
+
+        for sig in [signum, signal.SIGTERM]:
+            self.signal(process=process, signum=sig)
+            try:
+                return await asyncio.wait_for(process.wait(), timeout=TERMINATE_TIMEOUT)
+            except asyncio.TimeoutError:
+                continue
+            except asyncio.CancelledError:
+                # a repeated interrupt escalates like the grace timeout does
+                self.uncancel()
+                continue
+        process.kill()
+        return await process.wait()
+
+    def uncancel(self) -> None:
+        import asyncio
+
+        task: Optional[asyncio.Task] = asyncio.current_task()
+        if task is not None:
+            task.uncancel()
+
+    async def acommunicate(self, process: "asyncio.subprocess.Process") -> int:
+        import asyncio
+
+        start: float = time.monotonic()
+        returncode: int
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    self.aforward(reader=process.stdout, name="stdout"),
+                    self.aforward(reader=process.stderr, name="stderr"),
+                    process.wait(),
+                ),
+                timeout=self.timeout,
+            )
+            returncode = process.returncode if process.returncode is not None else -1
+        except asyncio.CancelledError:
+            # the interrupt is handled here, like ctrl-c is in communicate
+            self.uncancel()
+            console.error("subprocess interrupted, sending SIGINT to its process group")
+            returncode = await self.aterminate(process=process, signum=signal.SIGINT)
+        except asyncio.TimeoutError:
+            console.error(f"subprocess timed out after {self.timeout} seconds")
+            returncode = await self.aterminate(process=process, signum=signal.SIGTERM)
+
+        console.info(f"subprocess exited with code {returncode} in {time.monotonic() - start:.2f}s")
+        return returncode
@@ -0,0 +1,132 @@
+import collections
+import io
+import mmap
+import re
+import tempfile
+import time
+from typing import IO, Deque, List, Optional, TextIO, Tuple
+
+
+DEFAULT_CAPACITY: int = 20
+DEFAULT_THRESHOLD: int = 256 * 1024
+
+ANSI_ESCAPE: re.Pattern = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+
+class Capture(io.TextIOBase):
+    # the output of one command, passed through to the stream while it runs and
+    # kept in memory up to a threshold, past which it is spilled to a temporary file
+    def __init__(self, id: int, description: str, stream: Optional[TextIO], threshold: int = DEFAULT_THRESHOLD) -> None:
+        super().__init__()
+        self._id: int = id
+        self._description: str = description
+        self._stream: Optional[TextIO] = stream
+        self._threshold: int = threshold
+        self._started: float = time.time()
+        self._memory: bytearray = bytearray()
+        self._file: Optional[IO[bytes]] = None
+        self._size: int = 0
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @property
+    def started(self) -> float:
+        return self._started
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    def write(self, text: str) -> int:
+        if self._stream is not None:
+            self._stream.write(text)
+        data: bytes = text.encode("utf-8", errors="replace")
+        self._size += len(data)
+        if self._file is None and len(self._memory) + len(data) > self._threshold:
+            self._file = tempfile.TemporaryFile(prefix="repli-output-")
+            self._file.write(self._memory)
+            self._memory = bytearray()
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._memory += data
+        return len(text)
+
+    def flush(self) -> None:
+        if self._stream is not None:
+            self._stream.flush()
+
+    def isatty(self) -> bool:
+        return self._stream is not None and self._stream.isatty()
+
+    def finish(self) -> None:
+        self._stream = None
+        if self._file is not None:
+            self._file.flush()
+
+    def text(self) -> str:
+        if self._file is None:
+            return self._memory.decode("utf-8", errors="replace")
+        self._file.flush()
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return data[:].decode("utf-8", errors="replace")
+
+    def search(self, pattern: str) -> List[Tuple[int, str]]:
+        expression: re.Pattern = re.compile(pattern)
+        matches: List[Tuple[int, str]] = []
+        for number, line in enumerate(ANSI_ESCAPE.sub("", self.text()).splitlines(), start=1):
+            if expression.search(line):
+                matches.append((number, line))
+        return matches
+
+    def close(self) -> None:
+        self._stream = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+class Captures:
+    # at most capacity outputs are kept, so memory use is bounded by capacity * threshold
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, threshold: int = DEFAULT_THRESHOLD) -> None:
+        self._capacity: int = capacity
+        self._threshold: int = threshold
+        self._captures: Deque[Capture] = collections.deque()
+        self._index: int = 1
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def captures(self) -> List[Capture]:
+        return list(self._captures)
+
+    @property
+    def latest(self) -> Optional[Capture]:
+        return self._captures[-1] if self._captures else None
+
+    def open(self, description: str, stream: Optional[TextIO]) -> Capture:
+        capture: Capture = Capture(id=self._index, description=description, stream=stream, threshold=self._threshold)
+        self._captures.append(capture)
+        self._index += 1
+        while len(self._captures) > self.capacity:
+            self._captures.popleft().close()
+        return capture
+
+    def get(self, id: str) -> Capture:
+        for capture in self._captures:
+            if id.isdigit() and capture.id == int(id):
+                return capture
+        raise Exception(f"output not found: {id}")
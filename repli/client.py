@@ -0,0 +1,75 @@
+import io
+import json
+import socket
+import sys
+from repli.capture import ANSI_ESCAPE
+from typing import Any, Dict, List, Optional
+
+
+def send(stream: io.BufferedIOBase, message: Dict[str, Any]) -> None:
+    stream.write((json.dumps(message) + "\n").encode("utf-8"))
+    stream.flush()
+
+
+def session(stream: io.BufferedIOBase, output: bool = True) -> Optional[Dict[str, Any]]:
+    # output is printed as it arrives and lines are read from the local terminal
+    # when the interpreter asks for one, until the server ends the session
+    tty: bool = sys.stdout.isatty()
+    for line in stream:
+        message: Dict[str, Any] = json.loads(line)
+        if message["type"] == "output" and output:
+            data: str = message["data"]
+            sys.stdout.write(data if tty else ANSI_ESCAPE.sub("", data))
+            sys.stdout.flush()
+        elif message["type"] == "input":
+            try:
+                send(stream, {"type": "line", "line": input()})
+            except (EOFError, KeyboardInterrupt):
+                send(stream, {"type": "eof"})
+        elif message["type"] == "result":
+            return message
+        elif message["type"] == "exit":
+            break
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m repli.client", description="connect to a served interpreter")
+    parser.add_argument("socket", help="the socket the interpreter serves on")
+    parser.add_argument("--script", metavar="FILE", help="run the command paths in FILE ('-' for stdin) and exit")
+    parser.add_argument("--keep-going", action="store_true", help="continue the script after a failed step")
+    parser.add_argument("--json", action="store_true", help="print the result of the script as json")
+    options = parser.parse_args(argv)
+
+    hello: Dict[str, Any] = {"type": "hello", "mode": "interactive", "tty": sys.stdout.isatty()}
+    if options.script is not None:
+        if options.script == "-":
+            lines: List[str] = sys.stdin.readlines()
+        else:
+            with open(options.script, encoding="utf-8") as file:
+                lines = file.readlines()
+        hello.update(mode="batch", lines=lines, fail_fast=not options.keep_going)
+
+    connection: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(options.socket)
+    except OSError as e:
+        print(f"error: cannot connect to {options.socket}: {e}", file=sys.stderr)
+        return 1
+    with connection, connection.makefile("rwb") as stream:
+        send(stream, hello)
+        try:
+            result: Optional[Dict[str, Any]] = session(stream, output=not options.json)
+        except KeyboardInterrupt:
+            return 130
+    if result is None:
+        return 0
+    if options.json:
+        print(json.dumps(result, indent=2))
+    return result["returncode"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
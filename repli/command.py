@@ -1,14 +1,47 @@
+import importlib
+import itertools
+import threading
+import time
 from repli.callback import Callback, NativeFunction, Subprocess
-from typing import Any, Callable, Dict, List, Self, Type, Union
+from repli.fanout import DEFAULT_CONCURRENCY, FANOUT_OPTIONS, FanOut
+from repli.renderer import Cached
+from repli.workflow import DEFAULT_POLICY, Step, Workflow
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
 
+if TYPE_CHECKING:
+    from repli.completion import Trie
 
-RESERVED_NAMES: List[str] = ["e", "q"]
+
+DEFAULT_PAGE_TTL: float = 30.0
+# how long opening a dynamic page waits for its first commands before showing it as loading
+LOAD_TIMEOUT: float = 1.0
+
+RESERVED_NAMES: List[str] = ["e", "q", "n", "p", "j", "c", "o", "m", "w", "/"]
+
+
+def validate_alias(alias: Optional[str]) -> Optional[str]:
+    # aliases are joined with "/" into paths and must not collide with index paths,
+    # nor with the built-ins, which the input is matched against first
+    if alias is not None and (not alias or "/" in alias or "." in alias or alias.isdigit() or alias in RESERVED_NAMES):
+        raise ValueError(f"invalid alias: {alias}")
+    return alias
 
 
 class Command:
-    def __init__(self, description: str, callback: Callback) -> None:
+    def __init__(
+        self,
+        description: str,
+        callback: Callback,
+        background: bool = False,
+        alias: Optional[str] = None,
+        arguments: Optional[List[List[str]]] = None,
+    ) -> None:
         self._description: str = description
         self._callback: Callback = callback
+        self._background: bool = background
+        self._alias: Optional[str] = validate_alias(alias)
+        self._arguments: List[List[str]] = arguments or []
+        self._tries: Dict[int, "Trie"] = {}
 
     @property
     def description(self) -> str:
@@ -18,40 +51,361 @@ class Command:
     def callback(self) -> Callback:
         return self._callback
 
+    @property
+    def background(self) -> bool:
+        return self._background
+
+    @property
+    def alias(self) -> Optional[str]:
+        return self._alias
+
+    @property
+    def arguments(self) -> List[List[str]]:
+        # the values offered by tab completion for each positional argument
+        return self._arguments
+
+    @property
+    def tries(self) -> Dict[int, "Trie"]:
+        # the completion tries of the arguments, kept with the command so that they go with it
+        return self._tries
+
 
 class Page:
-    def __init__(self, description: str) -> None:
+    def __init__(self, description: str, alias: Optional[str] = None) -> None:
         self._description: str = description
-        self._commands: Dict[str, Union[Command, Self]] = {}
+        self._alias: Optional[str] = validate_alias(alias)
+        self._commands: Dict[str, Union[Command, "Page"]] = {}
         self._index: int = 1
+        self._version: int = 0
+        self._panel: Optional[Cached] = None
+        self._ranking: Tuple[Tuple[str, ...], bool] = ((), False)
+        self._window: Optional[Tuple[int, int]] = None
+        self._trie: Optional[Tuple[int, "Trie"]] = None
+        self._observers: List[Callable[["Page", str], None]] = []
 
     @property
     def description(self) -> str:
         return self._description
 
     @property
-    def commands(self) -> Dict[str, Union[Command, Self]]:
+    def alias(self) -> Optional[str]:
+        return self._alias
+
+    @property
+    def commands(self) -> Dict[str, Union[Command, "Page"]]:
         return self._commands
 
     @property
     def index(self) -> int:
         return self._index
 
-    def command(self, type: Type, description: str) -> Callable:
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def trie(self) -> Optional[Tuple[int, "Trie"]]:
+        # the completion trie of the keys and the version it was built at, kept with the
+        # page like its panel, so that a page replaced by another never shares it
+        return self._trie
+
+    @trie.setter
+    def trie(self, trie: Optional[Tuple[int, "Trie"]]) -> None:
+        self._trie = trie
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._panel = None
+
+    def observe(self, observer: Callable[["Page", str], None]) -> None:
+        if observer not in self._observers:
+            self._observers.append(observer)
+
+    def notify(self, key: str) -> None:
+        for observer in self._observers:
+            observer(self, key)
+
+    def panel(
+        self,
+        hot: Sequence[str] = (),
+        reorder: bool = False,
+        window: Optional[Tuple[int, int]] = None,
+    ) -> Cached:
+        # hot keys are shown in bold and, when reordered, ahead of the other keys.
+        # a window of (start, rows) only builds the rows that are visible
+        ranking: Tuple[Tuple[str, ...], bool] = (tuple(key for key in hot if key in self.commands), reorder)
+        if self._panel is not None and self._ranking == ranking and self._window == window:
+            return self._panel
+        from rich.table import Table
+
+        table: Table = Table(
+            show_header=False,
+            expand=True,
+            box=None,
+            pad_edge=False,
+        )
+        table.add_column("index", style="bold cyan")
+        keys: Iterable[str] = self.commands
+        if reorder:
+            keys = [*ranking[0], *[key for key in keys if key not in ranking[0]]]
+        if window is None:
+            table.add_column("description", justify="left", ratio=1)
+        else:
+            # every row takes one line, so that the window fills exactly its rows
+            table.add_column("description", justify="left", ratio=1, no_wrap=True, overflow="ellipsis")
+            start, rows = window
+            keys = itertools.islice(keys, start, start + rows)
+        for key in keys:
+            if key in ranking[0]:
+                table.add_row(key, self.commands[key].description, style="bold")
+            else:
+                table.add_row(key, self.commands[key].description)
+        # the table is measured and rendered once per console size, then reused
+        self._panel = Cached(renderable=table)
+        self._ranking = ranking
+        self._window = window
+        return self._panel
+
+    def command(
+        self,
+        type: Type,
+        description: str,
+        background: bool = False,
+        alias: Optional[str] = None,
+        arguments: Optional[List[List[str]]] = None,
+        **options: Any,
+    ) -> Callable:
+        # fan-out options wrap the callback instead of configuring it
+        fanout: Dict[str, Any] = {key: options.pop(key) for key in FANOUT_OPTIONS if key in options}
+        if fanout and "targets" not in fanout:
+            raise ValueError("fan-out options require targets")
+        if "cache" in options and (type != NativeFunction or fanout):
+            raise ValueError("only native functions can be cached")
+
         def decorator(callable: Callable[[str, str], Any]) -> None:
             callback: Callback
             if type == NativeFunction:
-                callback = NativeFunction(callable=callable)
+                callback = NativeFunction(callable=callable, **options)
             elif type == Subprocess:
-                callback = Subprocess(callable=callable)
+                callback = Subprocess(callable=callable, **options)
             else:
                 raise ValueError("invalid callback type")
-            command = Command(description=description, callback=callback)
-            self.commands[str(self.index)] = command
-            self._index += 1
+            if "targets" in fanout:
+                callback = FanOut(callback=callback, **fanout)
+            command = Command(
+                description=description,
+                callback=callback,
+                background=background,
+                alias=alias,
+                arguments=arguments,
+            )
+            self.add_command(command=command)
 
         return decorator
 
-    def add_page(self, page: Self) -> None:
-        self.commands[str(self.index)] = page
+    def add_command(self, command: Command) -> None:
+        key: str = str(self.index)
+        self.commands[key] = command
         self._index += 1
+        self.invalidate()
+        self.notify(key)
+
+    def add_page(self, page: "Page") -> None:
+        key: str = str(self.index)
+        self.commands[key] = page
+        self._index += 1
+        self.invalidate()
+        self.notify(key)
+
+    def add_lazy_page(
+        self,
+        description: str,
+        loader: Union[str, Callable[[], "Page"]],
+        alias: Optional[str] = None,
+    ) -> None:
+        self.add_page(page=LazyPage(description=description, loader=loader, alias=alias))
+
+    def add_dynamic_page(
+        self,
+        description: str,
+        provider: Union[str, Callable[[], "Page"]],
+        ttl: float = DEFAULT_PAGE_TTL,
+        alias: Optional[str] = None,
+    ) -> None:
+        self.add_page(page=DynamicPage(description=description, provider=provider, ttl=ttl, alias=alias))
+
+    def find(self, reference: str) -> Command:
+        # a command on this page, by its key or alias
+        for key, node in self.commands.items():
+            if isinstance(node, Command) and reference in [key, node.alias]:
+                return node
+        raise ValueError(f"unknown command: {reference}")
+
+    def add_workflow(
+        self,
+        description: str,
+        steps: List[Step],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        policy: str = DEFAULT_POLICY,
+        background: bool = False,
+        alias: Optional[str] = None,
+    ) -> None:
+        # steps refer to commands added before the workflow, which keep their own callbacks
+        steps = [
+            Step(
+                name=step.name,
+                command=self.find(reference=step.command) if isinstance(step.command, str) else step.command,
+                after=step.after,
+                arguments=step.arguments,
+            )
+            for step in steps
+        ]
+        workflow: Workflow = Workflow(steps=steps, concurrency=concurrency, policy=policy)
+        self.add_command(command=Command(description=description, callback=workflow, background=background, alias=alias))
+
+
+class LazyPage(Page):
+    def __init__(
+        self,
+        description: str,
+        loader: Union[str, Callable[[], Page]],
+        alias: Optional[str] = None,
+    ) -> None:
+        super().__init__(description=description, alias=alias)
+        if isinstance(loader, str) and loader.count(":") != 1:
+            raise ValueError(f"invalid loader: {loader}")
+        self._loader: Union[str, Callable[[], Page]] = loader
+        self._loaded: bool = False
+
+    @property
+    def loader(self) -> Union[str, Callable[[], Page]]:
+        return self._loader
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def resolve(self) -> Page:
+        # a string loader is "module:attribute", naming a page or a callable returning one
+        source: Any = self.loader
+        if isinstance(source, str):
+            module, attribute = source.split(":")
+            source = getattr(importlib.import_module(module), attribute)
+        if callable(source) and not isinstance(source, Page):
+            source = source()
+        if not isinstance(source, Page):
+            raise Exception(f"loader did not return a page: {self.description}")
+        return source
+
+    def load(self) -> None:
+        if self.loaded:
+            return
+        try:
+            source: Page = self.resolve()
+        except Exception as e:
+            raise Exception(f"failed to load page {self.description}: {e}")
+        self._loaded = True
+        for node in source.commands.values():
+            if isinstance(node, Command):
+                self.add_command(command=node)
+            else:
+                self.add_page(page=node)
+
+
+class DynamicPage(LazyPage):
+    # the commands come from a provider, a page built on each call, and are replaced
+    # with a fresh one once they are older than ttl. the provider runs on a background
+    # thread while the previous commands are still shown, and its result is applied
+    # on the interface's thread. the commands are not indexed, since they come and go
+    def __init__(
+        self,
+        description: str,
+        provider: Union[str, Callable[[], Page]],
+        ttl: float = DEFAULT_PAGE_TTL,
+        alias: Optional[str] = None,
+    ) -> None:
+        super().__init__(description=description, loader=provider, alias=alias)
+        self._ttl: float = ttl
+        self._fetched: Optional[float] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Optional[Union[Page, Exception]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # a snapshot of the page holds its provider, not a refresh in progress
+        state: Dict[str, Any] = dict(self.__dict__)
+        for name in ["_lock", "_thread", "_pending"]:
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = None
+
+    @property
+    def provider(self) -> Union[str, Callable[[], Page]]:
+        return self.loader
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def stale(self) -> bool:
+        return self._fetched is None or time.monotonic() - self._fetched >= self.ttl
+
+    @property
+    def refreshing(self) -> bool:
+        return self._thread is not None
+
+    def apply(self, source: Page) -> None:
+        # the commands are swapped rather than changed in place, so that a reader on
+        # another thread sees either the old ones or the new ones
+        self._commands = dict(source.commands)
+        self._index = source.index
+        self._loaded = True
+        self.invalidate()
+
+    def load(self, wait: bool = False) -> None:
+        # opening the page never waits for the provider, and the page shows as loading
+        # until its first commands are applied. a script, which needs them, waits
+        if not wait or self.loaded:
+            self.refresh()
+            return
+        try:
+            source: Page = self.resolve()
+        except Exception as e:
+            raise Exception(f"failed to load page {self.description}: {e}")
+        self._fetched = time.monotonic()
+        self.apply(source=source)
+
+    def wait(self, timeout: float) -> None:
+        # waits up to timeout for a refresh in progress, which refresh then applies
+        thread: Optional[threading.Thread] = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+
+    def fetch(self) -> None:
+        result: Union[Page, Exception]
+        try:
+            result = self.resolve()
+        except Exception as e:
+            result = e
+        with self._lock:
+            self._pending = result
+            self._fetched = time.monotonic()
+            self._thread = None
+
+    def refresh(self) -> None:
+        # applies a finished refresh and starts another once the commands are stale
+        with self._lock:
+            pending, self._pending = self._pending, None
+            if self._thread is None and self.stale:
+                self._thread = threading.Thread(target=self.fetch, name="repli-page", daemon=True)
+                self._thread.start()
+        if isinstance(pending, Page):
+            self.apply(source=pending)
+        elif pending is not None:
+            raise Exception(f"failed to {'refresh' if self.loaded else 'load'} page {self.description}: {pending}")
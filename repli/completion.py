@@ -0,0 +1,121 @@
+from repli.command import Command, DynamicPage, Page
+from repli.index import Entry, Index
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+SEPARATORS: str = "./"
+
+
+class Node:
+    def __init__(self) -> None:
+        self._children: Dict[str, "Node"] = {}
+        self._word: Optional[str] = None
+
+    @property
+    def children(self) -> Dict[str, "Node"]:
+        return self._children
+
+    @property
+    def word(self) -> Optional[str]:
+        return self._word
+
+    @word.setter
+    def word(self, word: str) -> None:
+        self._word = word
+
+
+class Trie:
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        self._root: Node = Node()
+        self._size: int = 0
+        for word in words:
+            self.insert(word)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, word: str) -> None:
+        node: Node = self._root
+        for character in word:
+            node = node.children.setdefault(character, Node())
+        if node.word is None:
+            node.word = word
+            self._size += 1
+
+    def complete(self, prefix: str, separators: str = "") -> List[str]:
+        # words below a separator past the prefix are left out, so that a path is
+        # completed one segment at a time without visiting the whole subtree
+        node: Optional[Node] = self._root
+        for character in prefix:
+            node = node.children.get(character) if node is not None else None
+        if node is None:
+            return []
+        words: List[str] = []
+        stack: List[Node] = [node]
+        while stack:
+            node = stack.pop()
+            if node.word is not None:
+                words.append(node.word)
+            for character, child in node.children.items():
+                if character not in separators:
+                    stack.append(child)
+        return sorted(words)
+
+
+class Completer:
+    # tries are built once per page and per argument, then kept up to date as
+    # commands are added, so navigating never rescans a page. they are kept on the
+    # page and the command, since those of a dynamic page are replaced on refresh
+    def __init__(self, index: Index, builtins: Iterable[str]) -> None:
+        self._index: Index = index
+        self._builtins: Trie = Trie(words=builtins)
+        self._paths: Trie = Trie(words=index.entries)
+        index.observe(self.add)
+
+    @property
+    def paths(self) -> Trie:
+        return self._paths
+
+    def add(self, entry: Entry) -> None:
+        self._paths.insert(entry.path)
+        if entry.alias is not None:
+            self._paths.insert(entry.alias)
+
+    def page(self, page: Page) -> Trie:
+        # a dynamic page replaces its commands instead of adding to them, so its
+        # trie is built again whenever the page has changed
+        cached: Optional[Tuple[int, Trie]] = page.trie
+        if cached is not None and not (isinstance(page, DynamicPage) and cached[0] != page.version):
+            return cached[1]
+        trie: Trie = Trie(words=page.commands)
+        page.trie = (page.version, trie)
+        page.observe(self.added)
+        return trie
+
+    def added(self, page: Page, key: str) -> None:
+        self.page(page).insert(key)
+
+    def argument(self, command: Command, position: int) -> Optional[Trie]:
+        if position >= len(command.arguments):
+            return None
+        trie: Optional[Trie] = command.tries.get(position)
+        if trie is None:
+            trie = Trie(words=command.arguments[position])
+            command.tries[position] = trie
+        return trie
+
+    def matches(self, page: Page, words: List[str], text: str) -> List[str]:
+        # words are the ones before the word being completed
+        if not words:
+            # a bare index only names a key of the current page
+            paths: List[str] = [path for path in self.paths.complete(text, separators=SEPARATORS) if not path.isdigit()]
+            names: List[str] = [*self.page(page).complete(text), *self._builtins.complete(text), *paths]
+            return sorted(set(names))
+        node: Optional[Union[Command, Page]] = page.commands.get(words[0])
+        if node is None:
+            entry: Optional[Entry] = self._index.get(words[0])
+            node = entry.node if entry is not None else None
+        if not isinstance(node, Command):
+            return []
+        trie: Optional[Trie] = self.argument(command=node, position=len(words) - 1)
+        return trie.complete(text) if trie is not None else []
@@ -6,9 +6,14 @@ class Console(rich.console.Console):
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
-            cls._instance = super(Console, cls).__new__(cls, *args, **kwargs)
+            cls._instance = super(Console, cls).__new__(cls)
         return cls._instance
 
+    def configure(self, width: int, color_system: str) -> None:
+        # the singleton is changed in place, since creating it again would reset it
+        self.width = width
+        self._color_system = rich.console.COLOR_SYSTEMS[color_system]
+
     def info(self, message: str) -> None:
         self.print(f"info: {message}", style="magenta", markup=False)
 
@@ -0,0 +1,236 @@
+import atexit
+import os
+import sys
+import threading
+import time
+from repli.metrics import quantile
+from repli.terminal import console
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from rich.table import Table
+
+
+DEFAULT_MAX_BYTES: int = 10 * 1024 * 1024
+DEFAULT_BACKUPS: int = 5
+DEFAULT_INTERVAL: float = 1.0
+DEFAULT_BUFFER: int = 1024
+DEFAULT_TOP: int = 10
+
+
+class EventLog:
+    # events are only queued on the interactive path, then serialized and written
+    # by a background thread, and the file is rotated once it outgrows max_bytes
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backups: int = DEFAULT_BACKUPS,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        self._path: str = os.path.expanduser(path)
+        self._max_bytes: int = max_bytes
+        self._backups: int = backups
+        self._interval: float = interval
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._writing: threading.Lock = threading.Lock()
+        self._wakeup: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed: bool = False
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def backups(self) -> int:
+        return self._backups
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def emit(self, event: str, **fields: Any) -> None:
+        with self._lock:
+            if self.closed:
+                return
+            self._buffer.append({"time": time.time(), "event": event, **fields})
+            full: bool = len(self._buffer) >= DEFAULT_BUFFER
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name="repli-events", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        if full:
+            self._wakeup.set()
+
+    def run(self) -> None:
+        while not self.closed:
+            self._wakeup.wait(timeout=self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                console.error(f"failed to write events: {e}")
+
+    def flush(self) -> None:
+        import json
+
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if not records:
+            return
+        data: bytes = "".join(json.dumps(record, default=str) + "\n" for record in records).encode("utf-8")
+        with self._writing:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                self.rotate()
+            with open(self.path, "ab") as file:
+                file.write(data)
+
+    def rotate(self) -> None:
+        # path.1 is the most recent backup, and the oldest beyond backups is dropped
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            thread: Optional[threading.Thread] = self._thread
+        self._wakeup.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self.flush()
+
+
+def files(path: str) -> List[str]:
+    # the backups of a log from the oldest, followed by the log itself
+    path = os.path.expanduser(path)
+    backups: List[str] = []
+    index: int = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+    return [*reversed(backups), *([path] if os.path.exists(path) else [])]
+
+
+def read(path: str) -> Iterator[Dict[str, Any]]:
+    import json
+
+    for name in files(path):
+        with open(name, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # a line cut short by a crash is skipped
+                    continue
+
+
+class Summary:
+    def __init__(self, path: str, description: str) -> None:
+        self._path: str = path
+        self._description: str = description
+        self._durations: List[float] = []
+        self._failures: int = 0
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @property
+    def count(self) -> int:
+        return len(self._durations)
+
+    @property
+    def failures(self) -> int:
+        return self._failures
+
+    @property
+    def p50(self) -> float:
+        return quantile(self._durations, 0.5)
+
+    @property
+    def p95(self) -> float:
+        return quantile(self._durations, 0.95)
+
+    @property
+    def max(self) -> float:
+        return max(self._durations, default=0.0)
+
+    def add(self, duration: float, returncode: Optional[int]) -> None:
+        self._durations.append(duration)
+        if returncode not in [None, 0]:
+            self._failures += 1
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> List[Summary]:
+    summaries: Dict[str, Summary] = {}
+    for record in records:
+        if record.get("event") != "finish":
+            continue
+        path: str = record.get("path", "")
+        summary: Optional[Summary] = summaries.get(path)
+        if summary is None:
+            summary = Summary(path=path, description=record.get("description", ""))
+            summaries[path] = summary
+        summary.add(duration=float(record.get("duration", 0.0)), returncode=record.get("returncode"))
+    return list(summaries.values())
+
+
+def table(summaries: List[Summary], title: str) -> "Table":
+    from rich import box
+    from rich.table import Table
+
+    table: Table = Table(title=title, box=box.SIMPLE, header_style="bold cyan", expand=True)
+    table.add_column("path", style="bold cyan")
+    table.add_column("description", ratio=1)
+    table.add_column("count", justify="right")
+    table.add_column("failed", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("max", justify="right")
+    for summary in summaries:
+        durations: List[str] = [f"{duration:.2f}s" for duration in [summary.p50, summary.p95, summary.max]]
+        table.add_row(summary.path, summary.description, str(summary.count), str(summary.failures), *durations)
+    return table
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m repli.events", description="summarize a repli event log")
+    parser.add_argument("log", help="the event log, read together with its rotated backups")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="number of commands to list")
+    options = parser.parse_args(argv)
+    top: int = options.top
+    summaries: List[Summary] = summarize(read(options.log))
+    if not summaries:
+        console.error(f"no commands found in {options.log}")
+        return 1
+    used: List[Summary] = sorted(summaries, key=lambda summary: -summary.count)[:top]
+    slowest: List[Summary] = sorted(summaries, key=lambda summary: -summary.p95)[:top]
+    console.print(table(summaries=used, title="most used commands"))
+    console.print(table(summaries=slowest, title="slowest commands by p95"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import contextlib
+import io
+import shlex
+import subprocess
+import time
+from repli.callback import Callback, NativeFunction, Subprocess
+from repli.job import Output, background
+from repli.terminal import console, terminal
+from typing import TYPE_CHECKING, Callable, ContextManager, Dict, List, Optional, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from rich.table import Table
+
+
+DEFAULT_CONCURRENCY: int = 8
+REFRESH_PER_SECOND: float = 4
+
+FANOUT_OPTIONS: List[str] = ["targets", "concurrency", "fail_fast", "ordered"]
+
+
+class Target:
+    def __init__(self, name: str) -> None:
+        self._name: str = name
+        self._status: str = "pending"
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._returncode: Optional[int] = None
+        self._output: str = ""
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def returncode(self) -> Optional[int]:
+        return self._returncode
+
+    @property
+    def output(self) -> str:
+        return self._output
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self._started is None:
+            return None
+        return (self._finished or time.monotonic()) - self._started
+
+    def start(self) -> None:
+        self._status = "running"
+        self._started = time.monotonic()
+
+    def finish(self, returncode: int, output: str) -> None:
+        self._finished = time.monotonic()
+        self._returncode = returncode
+        self._output = output
+        self._status = "ok" if returncode == 0 else "failed"
+
+    def cancel(self) -> None:
+        self._status = "cancelled"
+
+    def skip(self) -> None:
+        self._status = "skipped"
+
+
+def execute(callback: Union[NativeFunction, Subprocess], target: Target, *args: str) -> None:
+    # runs the callback with its output captured into the target rather than shown
+    target.start()
+    if isinstance(callback, Subprocess):
+        try:
+            # a template that cannot be filled in fails the target like a command that cannot start
+            arguments: str = callback.callable(*args)
+            if callback.pooled:
+                delegate(target=target, arguments=arguments, timeout=callback.timeout)
+                return
+            process = subprocess.run(
+                args=shlex.split(arguments),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                timeout=callback.timeout,
+            )
+            target.finish(returncode=process.returncode, output=process.stdout)
+        except subprocess.TimeoutExpired:
+            target.finish(returncode=-1, output=f"subprocess timed out after {callback.timeout} seconds\n")
+        except Exception as e:
+            target.finish(returncode=-1, output=f"subprocess raised an exception: {e}\n")
+    else:
+        buffer: io.StringIO = io.StringIO()
+        output: Output = Output.install()
+        output.target = buffer
+        try:
+            callback.run(*args)
+            target.finish(returncode=0, output=buffer.getvalue())
+        except Exception as e:
+            buffer.write(f"native function raised an exception: {e}\n")
+            target.finish(returncode=1, output=buffer.getvalue())
+        finally:
+            output.target = None
+
+
+def delegate(target: Target, arguments: str, timeout: Optional[float]) -> None:
+    from repli.pool import workers
+
+    buffer: io.StringIO = io.StringIO()
+    try:
+        returncode: int = workers.run(
+            arguments=arguments,
+            output=lambda name, line: buffer.write(line),
+            timeout=timeout,
+        )
+        target.finish(returncode=returncode, output=buffer.getvalue())
+    except subprocess.TimeoutExpired:
+        buffer.write(f"subprocess timed out after {timeout} seconds\n")
+        target.finish(returncode=-1, output=buffer.getvalue())
+    except Exception as e:
+        buffer.write(f"subprocess raised an exception: {e}\n")
+        target.finish(returncode=-1, output=buffer.getvalue())
+
+
+def live(renderable: Callable[[], "Table"]) -> ContextManager:
+    # headless runs and background jobs only print the reports, without the live table
+    if terminal.headless or background.get() is not None:
+        return contextlib.nullcontext()
+    from rich.live import Live
+
+    return Live(get_renderable=renderable, console=terminal.target, refresh_per_second=REFRESH_PER_SECOND)
+
+
+class FanOut(Callback):
+    def __init__(
+        self,
+        callback: Callback,
+        targets: Union[List[str], Callable[[], List[str]]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        fail_fast: bool = False,
+        ordered: bool = True,
+    ) -> None:
+        super().__init__()
+        if not isinstance(callback, (NativeFunction, Subprocess)):
+            raise ValueError("invalid callback type")
+        self._callback: Union[NativeFunction, Subprocess] = callback
+        self._targets: Union[List[str], Callable[[], List[str]]] = targets
+        self._concurrency: int = concurrency
+        self._fail_fast: bool = fail_fast
+        self._ordered: bool = ordered
+
+    @property
+    def callback(self) -> Union[NativeFunction, Subprocess]:
+        return self._callback
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    @property
+    def fail_fast(self) -> bool:
+        return self._fail_fast
+
+    @property
+    def ordered(self) -> bool:
+        return self._ordered
+
+    def targets(self) -> List[str]:
+        if callable(self._targets):
+            return list(self._targets())
+        return list(self._targets)
+
+    def dispatch(self, target: Target, *args: str) -> None:
+        execute(self.callback, target, target.name, *args)
+
+    def table(self, targets: List[Target]) -> "Table":
+        from rich.table import Table
+
+        table: Table = Table(box=None, header_style="bold cyan", pad_edge=False)
+        table.add_column("target", style="bold cyan")
+        table.add_column("status")
+        table.add_column("duration", justify="right")
+        table.add_column("exit", justify="right")
+        for target in targets:
+            duration = "-" if target.duration is None else f"{target.duration:.1f}s"
+            returncode = "-" if target.returncode is None else str(target.returncode)
+            table.add_row(target.name, target.status, duration, returncode)
+        return table
+
+    def __call__(self, *args: str, **kwargs: str) -> bool:
+        result, _ = self.invoke(*args, **kwargs)
+        return result
+
+    def invoke(self, *args: str, **kwargs: str) -> Tuple[bool, Optional[int]]:
+        super().__call__(*args, **kwargs)
+        return False, self.run(*args)
+
+    def run(self, *args: str, **kwargs: str) -> int:
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        # completed when the background job running the fan-out is killed
+        stop: Optional["Future"] = background.get()
+        targets: List[Target] = [Target(name=name) for name in self.targets()]
+        console.info(f"running on {len(targets)} targets with concurrency {self.concurrency}")
+        Output.install()
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="repli-fanout")
+        futures: Dict["Future", int] = {}
+        reported: Set[int] = set()
+        with live(lambda: self.table(targets)):
+            try:
+                for index, target in enumerate(targets):
+                    futures[executor.submit(self.dispatch, target, *args)] = index
+                completed: int = 0
+                for future in as_completed(list(futures) if stop is None else [*futures, stop]):
+                    if future is stop:
+                        console.error("fan-out killed, cancelling remaining targets")
+                        self.cancel(futures, targets)
+                        break
+                    completed += 1
+                    index = futures[future]
+                    self.report(targets, reported)
+                    if self.fail_fast and targets[index].returncode != 0:
+                        console.error(f"target {targets[index].name} failed, cancelling remaining targets")
+                        self.cancel(futures, targets)
+                        break
+                    if completed == len(futures):
+                        # the stop future is only completed by a kill
+                        break
+            except KeyboardInterrupt:
+                console.error("fan-out interrupted, cancelling remaining targets")
+                self.cancel(futures, targets)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        if not terminal.headless and not console.is_terminal:
+            # rich leaves the final frame unterminated outside a terminal
+            console.line()
+        # targets still running when the loop stopped early finish before shutdown returns
+        self.report(targets, reported, final=True)
+
+        failed: int = len([target for target in targets if target.status != "ok"])
+        if failed:
+            console.error(f"{failed} of {len(targets)} targets did not succeed")
+            return 1
+        console.info(f"all {len(targets)} targets succeeded")
+        return 0
+
+    def report(self, targets: List[Target], reported: Set[int], final: bool = False) -> None:
+        # in ordered mode a target is held back until every earlier target is reported
+        for index, target in enumerate(targets):
+            if index in reported:
+                continue
+            if target.returncode is None:
+                if self.ordered and not final:
+                    break
+                continue
+            reported.add(index)
+            console.print(f"[{target.name}]", style="bold cyan", markup=False, highlight=False)
+            if target.output:
+                console.out(target.output.rstrip("\n"), highlight=False)
+
+    def cancel(self, futures: Dict["Future", int], targets: List[Target]) -> None:
+        for future, index in futures.items():
+            if future.cancel():
+                targets[index].cancel()
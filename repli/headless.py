@@ -0,0 +1,10 @@
+from repli.callback import NativeFunction, Subprocess
+from repli.command import Command, DynamicPage, LazyPage, Page
+from repli.interpreter import Interpreter
+from repli.terminal import terminal
+from repli.workflow import Step, Workflow
+
+
+# importing repli through this module prints plain text instead of going
+# through rich, so batch runs never pay for importing it
+terminal.headless = True
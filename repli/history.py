@@ -0,0 +1,238 @@
+import os
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_LENGTH: int = 1000
+DEFAULT_MAX_ENTRIES: int = 100_000
+DEFAULT_HOT_ENTRIES: int = 3
+HALF_LIFE: float = 7 * 24 * 60 * 60
+BLOCK_SIZE: int = 64 * 1024
+
+RANKINGS: List[str] = ["highlight", "reorder"]
+
+
+def rewrite(path: str, data: bytes) -> None:
+    import tempfile
+
+    # each writer gets a temporary file of its own next to the file, so that concurrent
+    # sessions never write into the same one and the rename stays on one file system
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def directory() -> str:
+    state: str = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(state, "repli")
+
+
+class Stat:
+    def __init__(self, count: int = 0, last: float = 0.0) -> None:
+        self._count: int = count
+        self._last: float = last
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def last(self) -> float:
+        return self._last
+
+    def score(self, now: float) -> float:
+        # the count decays by half for every week since the path was last run
+        return self.count * 0.5 ** (max(now - self.last, 0.0) / HALF_LIFE)
+
+    def hit(self, timestamp: float) -> None:
+        self._count += 1
+        self._last = max(self.last, timestamp)
+
+
+class History:
+    # every input line is appended to a log of "timestamp<tab>path<tab>line" records,
+    # next to an index holding the statistics per command path up to an offset into
+    # the log, so that loading never reads more than the tail of the log
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str] = None,
+        length: int = DEFAULT_LENGTH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self._name: str = name
+        self._path: str = path or os.path.join(directory(), f"{urllib.parse.quote(name, safe='')}.history")
+        self._length: int = length
+        self._max_entries: int = max_entries
+        self._offset: int = 0
+        self._entries: int = 0
+        self._stats: Optional[Dict[str, Stat]] = None
+        self._version: int = 0
+        self._restored: bool = False
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def index_path(self) -> str:
+        return f"{self.path}.index"
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    @property
+    def entries(self) -> int:
+        if self._stats is None:
+            self.update()
+        return self._entries
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def stats(self) -> Dict[str, Stat]:
+        # loaded on first use, since only the interactive loop needs them
+        if self._stats is None:
+            self.update()
+        return self._stats if self._stats is not None else {}
+
+    def tail(self, count: Optional[int] = None) -> List[str]:
+        # the log is read backwards from its end until enough lines are found
+        count = self.length if count is None else count
+        if count <= 0 or not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as file:
+            end: int = file.seek(0, os.SEEK_END)
+            position: int = end
+            data: bytes = b""
+            while position > 0 and data.count(b"\n") <= count:
+                size: int = min(BLOCK_SIZE, position)
+                position -= size
+                file.seek(position)
+                data = file.read(size) + data
+        lines: List[str] = []
+        records: List[bytes] = data.split(b"\n")
+        start: int = max(len(records) - count - 1, 0)
+        for record in records[start:]:
+            fields: List[bytes] = record.split(b"\t", 2)
+            if len(fields) == 3 and fields[2]:
+                lines.append(fields[2].decode("utf-8", errors="replace"))
+        return lines[-count:]
+
+    def restore(self) -> None:
+        # readline keeps its own copy of the lines, so they are only loaded once
+        if self._restored:
+            return
+        import readline
+
+        readline.clear_history()
+        readline.set_history_length(self.length)
+        for line in self.tail():
+            readline.add_history(line)
+        self._restored = True
+
+    def append(self, line: str, path: Optional[str] = None) -> None:
+        line = line.replace("\n", " ").strip()
+        if not line:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(f"{time.time():.3f}\t{path or ''}\t{line}\n")
+        self.update()
+        if self._entries > self.max_entries:
+            self.compact()
+
+    def update(self) -> None:
+        # other sessions may have appended to the log, so the index on disk is
+        # caught up with the log rather than the statistics held in memory
+        offset, entries, stats = self.read_index()
+        size: int = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if offset > size:
+            # the log was replaced behind the index, so it is read again in full
+            offset, entries, stats = 0, 0, {}
+        if offset < size:
+            with open(self.path, "rb") as file:
+                file.seek(offset)
+                for record in file:
+                    if not record.endswith(b"\n"):
+                        break
+                    offset += len(record)
+                    entries += 1
+                    fields: List[bytes] = record.split(b"\t", 2)
+                    if len(fields) == 3 and fields[1]:
+                        try:
+                            timestamp: float = float(fields[0])
+                        except ValueError:
+                            continue
+                        stats.setdefault(fields[1].decode("utf-8", errors="replace"), Stat()).hit(timestamp)
+            self.write_index(offset=offset, entries=entries, stats=stats)
+        self._offset, self._entries, self._stats = offset, entries, stats
+        self._version += 1
+
+    def compact(self) -> None:
+        # the oldest lines are dropped once the log outgrows its bound, keeping
+        # three quarters of it so that compaction does not happen on every append
+        with open(self.path, "rb") as file:
+            records: List[bytes] = file.readlines()
+        keep: int = self.max_entries * 3 // 4
+        start: int = max(len(records) - keep, 0)
+        kept: List[bytes] = records[start:] if keep else []
+        rewrite(path=self.path, data=b"".join(kept))
+        # statistics are cumulative, so they outlive the lines they were counted from
+        self.write_index(offset=sum(len(record) for record in kept), entries=len(kept), stats=self.stats)
+        self.update()
+
+    def read_index(self) -> Tuple[int, int, Dict[str, Stat]]:
+        import json
+
+        try:
+            with open(self.index_path, encoding="utf-8") as file:
+                data: Dict[str, Any] = json.load(file)
+            stats: Dict[str, Stat] = {path: Stat(count=count, last=last) for path, (count, last) in data["paths"].items()}
+            return int(data["offset"]), int(data["entries"]), stats
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0, 0, {}
+
+    def write_index(self, offset: int, entries: int, stats: Dict[str, Stat]) -> None:
+        import json
+
+        data: Dict[str, Any] = {
+            "offset": offset,
+            "entries": entries,
+            "paths": {path: [stat.count, stat.last] for path, stat in stats.items()},
+        }
+        rewrite(path=self.index_path, data=json.dumps(data).encode("utf-8"))
+
+    def score(self, path: str, now: Optional[float] = None) -> float:
+        stat: Optional[Stat] = self.stats.get(path)
+        if stat is None:
+            return 0.0
+        return stat.score(now=time.time() if now is None else now)
+
+    def hot(self, paths: Dict[str, str], count: int = DEFAULT_HOT_ENTRIES) -> List[str]:
+        # the keys of the most frecently run paths, best first
+        now: float = time.time()
+        scores: List[Tuple[float, str]] = [(self.score(path, now=now), key) for key, path in paths.items()]
+        ranked: List[Tuple[float, str]] = sorted([item for item in scores if item[0] > 0], key=lambda item: -item[0])
+        return [key for _, key in ranked[:count]]
@@ -0,0 +1,121 @@
+from repli.command import Command, Page
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+
+class Entry:
+    def __init__(self, node: Union[Command, Page], pages: List[Page], path: str, alias: Optional[str] = None) -> None:
+        self._node: Union[Command, Page] = node
+        self._pages: List[Page] = pages
+        self._path: str = path
+        self._alias: Optional[str] = alias
+
+    @property
+    def node(self) -> Union[Command, Page]:
+        return self._node
+
+    @property
+    def pages(self) -> List[Page]:
+        # the navigation stack from the root page down to the page containing the node
+        return self._pages
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def alias(self) -> Optional[str]:
+        # the alias path, if the node or one of its pages has an alias
+        return self._alias
+
+
+class Location:
+    def __init__(self, pages: List[Page], path: str, alias: str, aliased: bool) -> None:
+        self._pages: List[Page] = pages
+        self._path: str = path
+        self._alias: str = alias
+        self._aliased: bool = aliased
+
+    @property
+    def pages(self) -> List[Page]:
+        return self._pages
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def alias(self) -> str:
+        return self._alias
+
+    @property
+    def aliased(self) -> bool:
+        return self._aliased
+
+
+class Index:
+    def __init__(self, root: Page) -> None:
+        self._entries: Dict[str, Entry] = {}
+        self._locations: Dict[int, List[Location]] = {}
+        self._paths: Dict[int, str] = {}
+        self._observers: List[Callable[[Entry], None]] = []
+        self.add_page(location=Location(pages=[root], path="", alias="", aliased=False))
+
+    @property
+    def entries(self) -> Dict[str, Entry]:
+        return self._entries
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str) -> Optional[Entry]:
+        return self._entries.get(path)
+
+    def path(self, node: Union[Command, Page]) -> Optional[str]:
+        # the first full path a node was indexed under, without its alias
+        return self._paths.get(id(node))
+
+    def nodes(self) -> List[Entry]:
+        # every node once, without its alias paths
+        return [entry for path, entry in self._entries.items() if path == entry.path]
+
+    def observe(self, observer: Callable[[Entry], None]) -> None:
+        if observer not in self._observers:
+            self._observers.append(observer)
+
+    def add_page(self, location: Location) -> None:
+        page: Page = location.pages[-1]
+        self._locations.setdefault(id(page), []).append(location)
+        page.observe(self.added)
+        for key, node in page.commands.items():
+            self.add(location=location, key=key, node=node)
+
+    def add(self, location: Location, key: str, node: Union[Command, Page]) -> None:
+        path, alias, aliased = self.paths(location=location, key=key, node=node)
+        # an alias shared by siblings, or the same as a path, would silently hide a node
+        for name in [path, alias] if aliased else [path]:
+            existing: Optional[Entry] = self._entries.get(name)
+            if existing is not None and existing.path != path:
+                raise ValueError(f"duplicate path: {name} is already {existing.path}")
+        entry: Entry = Entry(node=node, pages=location.pages, path=path, alias=alias if aliased else None)
+        self._entries[path] = entry
+        self._paths.setdefault(id(node), path)
+        if aliased:
+            self._entries[alias] = entry
+        for observer in self._observers:
+            observer(entry)
+        # a page added below itself would recurse forever
+        if isinstance(node, Page) and node not in location.pages:
+            self.add_page(location=Location(pages=location.pages + [node], path=path, alias=alias, aliased=aliased))
+
+    def paths(self, location: Location, key: str, node: Union[Command, Page]) -> Tuple[str, str, bool]:
+        segment: str = node.alias or key
+        path: str = f"{location.path}.{key}" if location.path else key
+        alias: str = f"{location.alias}/{segment}" if location.alias else segment
+        return path, alias, location.aliased or node.alias is not None
+
+    def added(self, page: Page, key: str) -> None:
+        for location in self._locations.get(id(page), []):
+            self.add(location=location, key=key, node=page.commands[key])
@@ -1,19 +1,47 @@
-import readline
-from repli.callback import Builtin
-from repli.command import Command, Page
-from repli.console import Console
-from rich import box
-from rich.padding import Padding
-from rich.table import Table
-from rich.text import Text
-from typing import Dict, List, Optional, Union
+import copy
+import os
+import re
+import shlex
+import signal
+import sys
+import threading
+import time
+from repli.cache import Record, results
+from repli.callback import Builtin, NativeFunction
+from repli.capture import Capture, Captures
+from repli.command import LOAD_TIMEOUT, Command, DynamicPage, LazyPage, Page
+from repli.completion import Completer
+from repli.events import EventLog
+from repli.history import RANKINGS, History
+from repli.index import Entry, Index
+from repli.job import Job, JobManager, Output
+from repli.metrics import EXPORT_FORMATS, Metrics
+from repli.renderer import Renderer
+from repli.script import Result, Step
+from repli.search import Match, Search
+from repli.terminal import console, remote
+from repli.watch import DEFAULT_INTERVAL, Watch
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, TextIO, Tuple, Union, cast
 
-
-console: Console = Console()
+if TYPE_CHECKING:
+    import asyncio
+    from rich.console import RenderableType
+    from rich.table import Table
+    from rich.text import Text
 
 
 DEFAULT_NAME: str = "🐟"
 DEFAULT_PROMPT: str = ">"
+DEFAULT_TAIL: int = 20
+DEFAULT_WIDTH: int = 100
+ATTACH_INTERVAL: float = 0.2
+# the header, the borders, the padding around the panel, the status line and the prompt
+CHROME_ROWS: int = 9
+MIN_ROWS: int = 5
+
+PAGING: List[str] = ["n", "p"]
+
+HOOKS: List[str] = ["before_execute", "after_execute"]
 
 
 class Interpreter:
@@ -22,14 +50,58 @@ class Interpreter:
         page: Page,
         name: str = DEFAULT_NAME,
         prompt: str = DEFAULT_PROMPT,
+        incremental: bool = False,
+        history: bool = False,
+        ranking: Optional[str] = None,
+        events: Optional[str] = None,
     ) -> None:
+        if ranking is not None and ranking not in RANKINGS:
+            raise ValueError(f"invalid ranking: {ranking}")
+        if ranking is not None and not history:
+            raise ValueError("ranking requires history")
         self._name: str = name
         self._prompt: str = prompt
-        self._builtins: Dict[str, Command] = {
+        self._incremental: bool = incremental
+        self._history: Optional[History] = History(name=name) if history else None
+        self._ranking: Optional[str] = ranking
+        self._hot: Dict[str, Tuple[Page, int, int, List[str]]] = {}
+        self._offsets: Dict[str, int] = {}
+        self._events: Optional[EventLog] = EventLog(path=events) if events is not None else None
+        self._renderer: Renderer = Renderer()
+        self._builtins: Dict[str, Command] = self.create_builtins()
+        self._pages: List[Page] = [page]
+        self._index: Index = Index(root=page)
+        for entry in self._index.nodes():
+            self.scope(entry)
+        self._index.observe(self.scope)
+        self._search: Optional[Search] = None
+        self._completer: Optional[Completer] = None
+        self._matches: List[str] = []
+        self._jobs: JobManager = JobManager()
+        self._captures: Captures = Captures()
+        self._task: Optional["asyncio.Task"] = None
+        self._metrics: Metrics = Metrics()
+        self._hooks: Dict[str, List[Callable[..., Any]]] = {event: [] for event in HOOKS}
+
+    def create_builtins(self) -> Dict[str, Command]:
+        return {
             "e": self.command_exit(),
             "q": self.command_quit(),
+            "n": self.command_next(),
+            "p": self.command_previous(),
+            "j": self.command_jobs(),
+            "c": self.command_cache(),
+            "o": self.command_outputs(),
+            "m": self.command_metrics(),
+            "w": self.command_watch(),
+            "/": self.command_search(),
         }
-        self._pages: List[Page] = [page]
+
+    def scope(self, entry: Entry) -> None:
+        # cached results are kept per command, under the first path it is indexed at
+        node: Union[Command, Page] = entry.node
+        if isinstance(node, Command) and isinstance(node.callback, NativeFunction) and node.callback.scope is None:
+            node.callback.scope = entry.path
 
     @property
     def name(self) -> str:
@@ -39,6 +111,30 @@ class Interpreter:
     def prompt(self) -> str:
         return self._prompt
 
+    @property
+    def incremental(self) -> bool:
+        return self._incremental
+
+    @property
+    def history(self) -> Optional[History]:
+        return self._history
+
+    @property
+    def ranking(self) -> Optional[str]:
+        return self._ranking
+
+    @property
+    def events(self) -> Optional[EventLog]:
+        return self._events
+
+    def emit(self, event: str, **fields: Any) -> None:
+        if self.events is not None:
+            self.events.emit(event, **fields)
+
+    @property
+    def renderer(self) -> Renderer:
+        return self._renderer
+
     @property
     def builtins(self) -> Dict[str, Command]:
         return self._builtins
@@ -51,6 +147,52 @@ class Interpreter:
     def current_page(self) -> Page:
         return self.pages[-1]
 
+    @property
+    def index(self) -> Index:
+        return self._index
+
+    @property
+    def search(self) -> Search:
+        # built on first use, then kept up to date by the index
+        if self._search is None:
+            self._search = Search(index=self.index)
+        return self._search
+
+    @property
+    def completer(self) -> Completer:
+        # built on first use, like search
+        if self._completer is None:
+            self._completer = Completer(index=self.index, builtins=self.builtins)
+        return self._completer
+
+    @property
+    def jobs(self) -> JobManager:
+        return self._jobs
+
+    @property
+    def captures(self) -> Captures:
+        return self._captures
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    def hook(self, event: str, hook: Callable[..., Any]) -> None:
+        # before_execute hooks are called with the arguments, and after_execute
+        # hooks with the arguments, the result and the duration in seconds
+        if event not in HOOKS:
+            raise ValueError(f"invalid event: {event}")
+        self._hooks[event].append(hook)
+
+    def trigger(self, event: str, *args: Any) -> None:
+        # a failing hook is reported without stopping the other hooks, the command or the loop
+        for hook in self._hooks[event]:
+            try:
+                hook(*args)
+            except Exception as e:
+                self.renderer.invalidate()
+                console.error(f"{event} hook failed: {e}")
+
     def command_exit(self) -> Command:
         def exit(*args, **kwargs) -> bool:
             console.info("exited")
@@ -71,7 +213,301 @@ class Interpreter:
         callback = Builtin(callable=quit)
         return Command(description="quit page", callback=callback)
 
-    def header(self) -> Text:
+    def command_next(self) -> Command:
+        def next(*args, **kwargs) -> bool:
+            self.scroll(pages=self.count(*args))
+            return False
+
+        callback = Builtin(callable=next)
+        return Command(description="next page", callback=callback)
+
+    def command_previous(self) -> Command:
+        def previous(*args, **kwargs) -> bool:
+            self.scroll(pages=-self.count(*args))
+            return False
+
+        callback = Builtin(callable=previous)
+        return Command(description="previous page", callback=callback)
+
+    def count(self, *args: str) -> int:
+        if not args:
+            return 1
+        if not args[0].isdigit() or int(args[0]) < 1:
+            raise Exception(f"invalid count: {args[0]}")
+        return int(args[0])
+
+    def scroll(self, pages: int) -> None:
+        window: Optional[Tuple[int, int]] = self.window(self.current_page)
+        if window is None:
+            raise Exception("current page fits on screen")
+        start, rows = window
+        last: int = len(self.current_page.commands) - rows
+        self._offsets[self.location(self.current_page)] = max(0, min(start + pages * rows, last))
+
+    def command_jobs(self) -> Command:
+        def jobs(*args, **kwargs) -> bool:
+            self.renderer.invalidate()
+            if not args:
+                console.print(self.jobs_table())
+            elif args[0] == "tail" and len(args) in [2, 3]:
+                job = self.jobs.get(args[1])
+                lines = int(args[2]) if len(args) == 3 else DEFAULT_TAIL
+                for line in job.tail(lines=lines):
+                    console.out(line, highlight=False)
+            elif args[0] == "attach" and len(args) == 2:
+                self.attach(job=self.jobs.get(args[1]))
+            elif args[0] == "kill" and len(args) == 2:
+                job = self.jobs.get(args[1])
+                job.kill()
+                console.info(f"killed job {job.id}")
+            elif args[0] == "rm" and len(args) == 2:
+                job = self.jobs.remove(args[1])
+                console.info(f"removed job {job.id}")
+            elif args[0] == "clear" and len(args) == 1:
+                removed: List[Job] = self.jobs.clear()
+                console.info(f"removed {len(removed)} finished jobs")
+            else:
+                raise Exception("usage: j [tail <job> [lines] | attach <job> | kill <job> | rm <job> | clear]")
+            console.input(prompt="press enter to continue")
+            return False
+
+        callback = Builtin(callable=jobs)
+        return Command(description="jobs", callback=callback)
+
+    def jobs_table(self) -> "Table":
+        from rich import box
+        from rich.table import Table
+
+        table: Table = Table(box=box.SIMPLE, header_style="bold cyan", expand=True)
+        table.add_column("job", style="bold cyan")
+        table.add_column("status")
+        table.add_column("runtime", justify="right")
+        table.add_column("exit", justify="right")
+        table.add_column("description", ratio=1)
+        for job in self.jobs.jobs.values():
+            returncode = "-" if job.returncode is None else str(job.returncode)
+            table.add_row(str(job.id), job.status, f"{job.runtime:.1f}s", returncode, job.description)
+        return table
+
+    def attach(self, job: Job) -> None:
+        offset: int = 0
+        try:
+            while True:
+                running: bool = job.running
+                output: str = job.output()
+                console.out(output[offset:], end="", highlight=False)
+                offset = len(output)
+                if not running:
+                    break
+                time.sleep(ATTACH_INTERVAL)
+            console.info(f"job {job.id} {job.status} with exit code {job.returncode}")
+        except KeyboardInterrupt:
+            console.print()
+            console.info(f"detached from job {job.id}")
+
+    def command_cache(self) -> Command:
+        def cache(*args, **kwargs) -> bool:
+            self.renderer.invalidate()
+            if not args:
+                console.print(self.cache_table())
+                console.info(f"{len(results)} cached results using {results.size} of {results.max_bytes} bytes")
+            elif args[0] == "flush" and len(args) in [1, 2]:
+                count: int = results.flush(key=self.record(args[1]).key) if len(args) == 2 else results.flush()
+                console.info(f"flushed {count} cached results")
+            else:
+                raise Exception("usage: c [flush [entry]]")
+            console.input(prompt="press enter to continue")
+            return False
+
+        callback = Builtin(callable=cache)
+        return Command(description="cache", callback=callback)
+
+    def cache_table(self) -> "Table":
+        from rich import box
+        from rich.table import Table
+
+        table: Table = Table(box=box.SIMPLE, header_style="bold cyan", expand=True)
+        table.add_column("entry", style="bold cyan")
+        table.add_column("command", ratio=1)
+        table.add_column("args", ratio=1)
+        table.add_column("age", justify="right")
+        table.add_column("size", justify="right")
+        table.add_column("hits", justify="right")
+        for entry, record in enumerate(results.records, start=1):
+            name, args, kwargs = record.key
+            arguments: str = " ".join([*args, *[f"{k}={v}" for k, v in kwargs]])
+            table.add_row(str(entry), name, arguments, f"{record.age:.0f}s", str(record.size), str(record.hits))
+        return table
+
+    def record(self, entry: str) -> Record:
+        records: List[Record] = results.records
+        if not entry.isdigit() or not 1 <= int(entry) <= len(records):
+            raise Exception(f"cached result not found: {entry}")
+        return records[int(entry) - 1]
+
+    def command_outputs(self) -> Command:
+        def outputs(*args, **kwargs) -> bool:
+            self.renderer.invalidate()
+            if not args:
+                console.print(self.outputs_table())
+            else:
+                self.pager(capture=self.captures.get(args[0]), pattern=" ".join(args[1:]) or None)
+            console.input(prompt="press enter to continue")
+            return False
+
+        callback = Builtin(callable=outputs)
+        return Command(description="outputs", callback=callback)
+
+    def outputs_table(self) -> "Table":
+        from rich import box
+        from rich.table import Table
+
+        table: Table = Table(box=box.SIMPLE, header_style="bold cyan", expand=True)
+        table.add_column("output", style="bold cyan")
+        table.add_column("started")
+        table.add_column("size", justify="right")
+        table.add_column("description", ratio=1)
+        for capture in self.captures.captures:
+            started: str = time.strftime("%H:%M:%S", time.localtime(capture.started))
+            table.add_row(str(capture.id), started, str(capture.size), capture.description)
+        return table
+
+    def pager(self, capture: Capture, pattern: Optional[str] = None) -> None:
+        from rich.text import Text
+
+        text: Text
+        if pattern is None:
+            text = Text.from_ansi(capture.text())
+        else:
+            try:
+                matches: List[Tuple[int, str]] = capture.search(pattern=pattern)
+            except re.error:
+                raise Exception(f"invalid pattern: {pattern}")
+            if not matches:
+                raise Exception(f"no matches: {pattern}")
+            text = Text("\n".join(f"{number}: {line}" for number, line in matches))
+        with console.pager(styles=True):
+            console.print(text, highlight=False)
+
+    def command_metrics(self) -> Command:
+        def metrics(*args, **kwargs) -> bool:
+            self.renderer.invalidate()
+            if not args:
+                console.print(self.metrics_table())
+                console.info(f"profiling is {'on' if self.metrics.profiling else 'off'}")
+            elif args[0] == "profile" and len(args) == 2 and args[1] in ["on", "off"]:
+                self.metrics.profiling = args[1] == "on"
+                console.info(f"profiling turned {args[1]}")
+            elif args[0] == "profile" and len(args) == 2:
+                console.out(self.metrics.report(path=args[1]), highlight=False)
+            elif args[0] == "export" and len(args) in [2, 3] and args[1] in EXPORT_FORMATS:
+                text: str = self.metrics.export(format=args[1])
+                if len(args) == 3:
+                    with open(args[2], "w", encoding="utf-8") as file:
+                        file.write(text)
+                    console.info(f"exported metrics to {args[2]}")
+                else:
+                    console.out(text, highlight=False)
+            elif args[0] == "reset" and len(args) == 1:
+                self.metrics.reset()
+                console.info("metrics reset")
+            else:
+                raise Exception("usage: m [profile on|off|<path> | export json|prometheus [file] | reset]")
+            console.input(prompt="press enter to continue")
+            return False
+
+        callback = Builtin(callable=metrics)
+        return Command(description="metrics", callback=callback)
+
+    def metrics_table(self) -> "Table":
+        from rich import box
+        from rich.table import Table
+
+        table: Table = Table(box=box.SIMPLE, header_style="bold cyan", expand=True)
+        table.add_column("metric", style="bold cyan")
+        table.add_column("path", ratio=1)
+        table.add_column("count", justify="right")
+        table.add_column("p50", justify="right")
+        table.add_column("p95", justify="right")
+        table.add_column("max", justify="right")
+        for series in self.metrics.series:
+            durations: List[str] = [f"{duration * 1000:.1f}ms" for duration in [series.p50, series.p95, series.max]]
+            table.add_row(series.kind, series.path or "-", str(series.count), *durations)
+        return table
+
+    def command_watch(self) -> Command:
+        def watch(*args, **kwargs) -> bool:
+            interval: float = DEFAULT_INTERVAL
+            if len(args) >= 2 and args[0] == "-n":
+                interval = self.seconds(args[1])
+                args = args[2:]
+            if not args:
+                raise Exception("usage: w [-n <seconds>] <command> [args]")
+            if remote.get():
+                raise Exception("watch needs a terminal")
+            node, _ = self.locate(args[0])
+            if not isinstance(node, Command):
+                raise Exception(f"not a command: {args[0]}")
+            self.renderer.invalidate()
+            # the watch takes over the screen, which is drawn again from scratch once it stops
+            Watch(command=node, args=list(args[1:]), interval=interval).run()
+            return False
+
+        callback = Builtin(callable=watch)
+        return Command(description="watch", callback=callback)
+
+    def seconds(self, value: str) -> float:
+        try:
+            return float(value)
+        except ValueError:
+            raise Exception(f"invalid interval: {value}")
+
+    def capture(self, command: Command, *args: str) -> Tuple[bool, Optional[int]]:
+        # the output is shown as usual and kept so that it can be paged through later
+        output: Output = Output.install()
+        previous = output.target
+        capture: Capture = self.captures.open(description=command.description, stream=previous or output.stream)
+        output.target = cast(TextIO, capture)
+        try:
+            return command.callback.invoke(*args)
+        finally:
+            output.target = previous
+            capture.finish()
+
+    def command_search(self) -> Command:
+        def search(*args, **kwargs) -> bool:
+            if not args:
+                raise Exception("usage: / <query>")
+            self.renderer.invalidate()
+            matches: List[Match] = self.search.query(" ".join(args))
+            if not matches:
+                raise Exception(f"no matches: {' '.join(args)}")
+            console.print(self.search_table(matches=matches))
+            selection: List[str] = console.input(prompt="select a result (enter to cancel) ", markup=False).split()
+            if not selection:
+                return False
+            if not selection[0].isdigit() or not 1 <= int(selection[0]) <= len(matches):
+                raise Exception(f"invalid selection: {selection[0]}")
+            entry: Entry = matches[int(selection[0]) - 1].entry
+            return self.dispatch(node=entry.node, pages=entry.pages, args=selection[1:])
+
+        callback = Builtin(callable=search)
+        return Command(description="search", callback=callback)
+
+    def search_table(self, matches: List[Match]) -> "Table":
+        from rich.table import Table
+
+        table: Table = Table(show_header=False, expand=True, box=None, pad_edge=False)
+        table.add_column("result", style="bold cyan")
+        table.add_column("path", style="dim")
+        table.add_column("breadcrumb", ratio=1)
+        for result, match in enumerate(matches, start=1):
+            table.add_row(str(result), match.entry.path, match.breadcrumb)
+        return table
+
+    def header(self) -> "Text":
+        from rich.text import Text
+
         header: Text = Text(style="cyan")
         header.append(f"[{self.name}] ", style="bold")
         for index, page in enumerate(self.pages):
@@ -83,29 +519,106 @@ class Interpreter:
                 header.append(" > ")
         return header
 
-    def panel(self) -> Table:
-        table: Table = Table(
-            show_header=False,
-            expand=True,
-            box=None,
-            pad_edge=False,
-        )
-        table.add_column("index", style="bold cyan")
-        table.add_column("description", justify="left", ratio=1)
-        for key, value in self.current_page.commands.items():
-            table.add_row(key, value.description)
-        return table
+    def rows(self) -> int:
+        # the rows left for the panel on screen, which the footer takes a share of
+        # once it wraps
+        width: int = max(console.size.width - 4, 1)
+        footer: int = len(self.footer(paged=True).wrap(console, width))
+        return max(console.size.height - CHROME_ROWS - footer, MIN_ROWS)
+
+    def window(self, page: Page) -> Optional[Tuple[int, int]]:
+        # a page taller than the screen is shown one window of rows at a time
+        total: int = len(page.commands)
+        rows: int = self.rows()
+        if total <= rows:
+            return None
+        return min(self._offsets.get(self.location(page), 0), total - rows), rows
+
+    def location(self, page: Page) -> str:
+        # the keys leading from the root page to a page being shown. unlike its index
+        # path, it also names the pages of a dynamic page, which are replaced on refresh
+        path: Optional[str] = self.index.path(page)
+        if path is not None:
+            return path
+        keys: List[str] = []
+        for parent, child in zip(self.pages, self.pages[1:]):
+            keys.append(next((key for key, node in parent.commands.items() if node is child), ""))
+            if child is page:
+                break
+        return ".".join(keys)
+
+    def panel(self) -> "RenderableType":
+        page: Page = self.current_page
+        options: Dict[str, Any] = {}
+        if self.history is not None and self.ranking is not None:
+            options.update(hot=self.hot(page), reorder=self.ranking == "reorder")
+        if isinstance(page, DynamicPage) and not page.loaded:
+            from rich.text import Text
+
+            return Text("loading...", style="dim")
+        window: Optional[Tuple[int, int]] = self.window(page)
+        if window is None:
+            return page.panel(**options)
+        from rich.console import Group
+        from rich.text import Text
+
+        start, rows = window
+        status: Text = Text(f"{start + 1}-{start + rows} of {len(page.commands)}", style="dim", justify="right")
+        return Group(page.panel(window=window, **options), status)
+
+    def hot(self, page: Page) -> List[str]:
+        # ranked again only when the page or the history has changed
+        if self.history is None:
+            return []
+        location: str = self.location(page)
+        cached: Optional[Tuple[Page, int, int, List[str]]] = self._hot.get(location)
+        if cached is not None and cached[0] is page and cached[1:3] == (page.version, self.history.version):
+            return cached[3]
+        paths: Dict[str, str] = {}
+        for key, node in page.commands.items():
+            path: Optional[str] = self.index.path(node)
+            if isinstance(node, Command) and path is not None:
+                paths[key] = path
+        hot: List[str] = self.history.hot(paths=paths)
+        self._hot[location] = (page, page.version, self.history.version, hot)
+        return hot
+
+    def remember(self, line: str) -> None:
+        # the line is kept with the path of the command it runs, if any
+        if self.history is None or not line.strip():
+            return
+        args, _ = self.parse(line.split())
+        path: Optional[str] = None
+        if args and args[0] not in self.builtins:
+            try:
+                node, _ = self.locate(args[0])
+                if isinstance(node, Command):
+                    path = self.index.path(node)
+            except Exception:
+                pass
+        try:
+            self.history.append(line=line, path=path)
+        except OSError as e:
+            console.error(f"failed to save history: {e}")
 
-    def footer(self) -> Text:
+    def footer(self, paged: bool = False) -> "Text":
+        from rich.text import Text
+
+        # the paging built-ins are only listed while they apply
         footer: Text = Text()
-        for key, value in self.builtins.items():
+        builtins: List[Tuple[str, Command]] = [item for item in self.builtins.items() if paged or item[0] not in PAGING]
+        for index, (key, value) in enumerate(builtins):
+            if index > 0:
+                footer.append("  |  ", style="dim")
             footer.append(f"{key}", style="bold cyan")
             footer.append(f"  {value.description}")
-            if key != list(self.builtins.keys())[-1]:
-                footer.append("  |  ", style="dim")
         return footer
 
-    def render(self) -> None:
+    def interface(self) -> "Table":
+        from rich import box
+        from rich.padding import Padding
+        from rich.table import Table
+
         interface: Table = Table(
             box=box.SQUARE,
             expand=True,
@@ -114,39 +627,149 @@ class Interpreter:
             footer_style=None,
             border_style="dim cyan",
         )
-        interface.add_column(header=self.header(), footer=self.footer())
+        paged: bool = self.window(self.current_page) is not None
+        interface.add_column(header=self.header(), footer=self.footer(paged=paged))
         interface.add_row(Padding(renderable=self.panel(), pad=(1, 0)))
-        console.print(interface)
+        return interface
+
+    def render(self) -> None:
+        page: Page = self.current_page
+        if isinstance(page, DynamicPage):
+            try:
+                page.refresh()
+                if not page.loaded:
+                    # nothing redraws the page while the prompt waits for input, so a
+                    # first fetch that finishes soon is waited for and shown at once
+                    page.wait(timeout=LOAD_TIMEOUT)
+                    page.refresh()
+            except Exception as e:
+                # the stale commands are still shown
+                self.renderer.invalidate()
+                console.error(f"{e}")
+        with self.metrics.measure(kind="render"):
+            if self.incremental:
+                self.renderer.draw(self.interface())
+            else:
+                console.print(self.interface())
+
+    def dispatch(
+        self,
+        node: Union[Command, Page],
+        pages: List[Page],
+        args: List[str],
+        background: bool = False,
+    ) -> bool:
+        result: bool = False
+        path: str = self.index.path(node) or node.description
+        if isinstance(node, Command):
+            self.renderer.invalidate()
+            if background or node.background:
+                job = self.jobs.submit(node.description, node.callback, *args)
+                self.emit("job", path=path, description=node.description, args=args, job=job.id)
+                console.info(f"started job {job.id}: {node.description}")
+            else:
+                self.emit("start", path=path, description=node.description, args=args)
+                start: float = time.monotonic()
+                with self.metrics.measure(kind="callback", path=path), self.metrics.profile(path=path):
+                    result, returncode = self.capture(node, *args)
+                self.finish(node, path, args, returncode, time.monotonic() - start)
+            console.input(prompt="press enter to continue")
+        if isinstance(node, Page):
+            if isinstance(node, LazyPage):
+                node.load()
+            self._pages = pages + [node]
+            self.emit("navigate", path=path, description=node.description)
+        return result
+
+    def finish(self, command: Command, path: str, args: List[str], returncode: Optional[int], duration: float) -> None:
+        # the latest capture is this call's, since every session keeps its own
+        latest: Optional[Capture] = self.captures.latest
+        self.emit(
+            "finish",
+            path=path,
+            description=command.description,
+            args=args,
+            returncode=returncode,
+            duration=duration,
+            bytes=latest.size if latest is not None else 0,
+        )
+
+    def parse(self, args: List[str]) -> Tuple[List[str], bool]:
+        # a trailing "&" runs the command as a background job
+        background: bool = bool(args) and args[-1] == "&"
+        if background:
+            args = args[:-1]
+        # "/query" is shorthand for "/ query"
+        if args and args[0].startswith("/") and args[0] != "/" and "/" in self.builtins:
+            args = ["/", args[0][1:], *args[1:]]
+        return args, background
+
+    def locate(self, name: str) -> Tuple[Union[Command, Page], List[Page]]:
+        if name in self.current_page.commands:
+            return self.current_page.commands[name], self.pages
+        entry: Optional[Entry] = self.lookup(name)
+        if entry is not None:
+            # a full path or alias jumps straight to any node in the tree
+            return entry.node, entry.pages
+        raise Exception(f"command not found: {name}")
 
     def execute(self, args: List[str]) -> bool:
+        args, background = self.parse(args)
         if not args:
             return False
 
         result: bool = False
+        start: float = time.monotonic()
         try:
+            self.trigger("before_execute", args)
             if args[0] in self.builtins:
-                result = self.builtins[args[0]].callback()
-            elif args[0] in self.current_page.commands:
-                command: Optional[Union[Command, Page]] = self.current_page.commands.get(args[0])
-                if isinstance(command, Command):
-                    result = command.callback(*args[1:])
-                    console.input(prompt="press enter to continue")
-                if isinstance(command, Page):
-                    self._pages.append(command)
+                self.emit("builtin", name=args[0], args=args[1:])
+                result = self.builtins[args[0]].callback(*args[1:])
             else:
-                raise Exception(f"command not found: {args[0]}")
+                node, pages = self.locate(args[0])
+                result = self.dispatch(node, pages, args[1:], background)
         except Exception as e:
+            self.renderer.invalidate()
             console.error(f"{e}")
             console.input(prompt="press enter to continue")
+        self.trigger("after_execute", args, result, time.monotonic() - start)
         return result
 
+    def complete(self, text: str, state: int) -> Optional[str]:
+        import readline
+
+        # readline asks for one match at a time, starting from state 0
+        if state == 0:
+            begin: int = readline.get_begidx()
+            words: List[str] = readline.get_line_buffer()[:begin].split()
+            self._matches = self.completer.matches(page=self.current_page, words=words, text=text)
+        return self._matches[state] if state < len(self._matches) else None
+
+    def setup(self) -> None:
+        # line editing for the prompt is only needed once the interface is shown
+        import readline
+
+        readline.set_completer(self.complete)
+        # paths and aliases are completed as a whole, separators included
+        readline.set_completer_delims(" \t\n")
+        if "libedit" in (readline.__doc__ or ""):
+            readline.parse_and_bind("bind ^I rl_complete")
+        else:
+            readline.parse_and_bind("tab: complete")
+        if self.history is not None:
+            self.history.restore()
+
     def loop(self, is_test: bool = False) -> None:
+        self.setup()
         status: bool = False
         while not status:
-            console.clear()
+            if not self.incremental:
+                console.clear()
             self.render()
             try:
-                line: str = console.input(prompt=f"{self.prompt} ", markup=False)
+                with self.metrics.measure(kind="input"):
+                    line: str = console.input(prompt=f"{self.prompt} ", markup=False)
+                self.remember(line)
                 args: List[str] = line.split()
                 status = self.execute(args=args)
             except EOFError:
@@ -155,7 +778,269 @@ class Interpreter:
                 console.info("exited with EOF")
             except KeyboardInterrupt:
                 status = False
+                self.renderer.invalidate()
 
             # exit the loop after one iteration if running in test mode
             if is_test:
                 break
+
+    async def ainput(self, prompt: str, markup: bool = True) -> str:
+        import asyncio
+
+        # input blocks, so it is read on a daemon thread that holds up neither
+        # the event loop nor the exit of the interpreter
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+
+        def settle(line: Optional[str], error: Optional[Exception]) -> None:
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(line)
+
+        def read() -> None:
+            try:
+                line: str = console.input(prompt=prompt, markup=markup)
+                loop.call_soon_threadsafe(settle, line, None)
+            except Exception as e:
+                loop.call_soon_threadsafe(settle, None, e)
+
+        threading.Thread(target=read, daemon=True).start()
+        return await future
+
+    def awaitable(self, args: List[str]) -> Optional[Tuple[Command, List[str]]]:
+        # only foreground commands with an event loop implementation are awaited directly
+        args, background = self.parse(args)
+        if not args or background or args[0] in self.builtins:
+            return None
+        try:
+            node, _ = self.locate(args[0])
+        except Exception:
+            return None
+        if isinstance(node, Command) and not node.background and node.callback.awaitable:
+            return node, args[1:]
+        return None
+
+    async def acapture(self, command: Command, *args: str) -> Tuple[bool, Optional[int]]:
+        # the target is set in this task's context, so output from other tasks is not captured
+        output: Output = Output.install()
+        previous = output.target
+        capture: Capture = self.captures.open(description=command.description, stream=previous or output.stream)
+        output.target = cast(TextIO, capture)
+        try:
+            return await command.callback.ainvoke(*args)
+        finally:
+            output.target = previous
+            capture.finish()
+
+    async def adispatch(self, command: Command, args: List[str]) -> bool:
+        import asyncio
+
+        self.renderer.invalidate()
+        result: bool = False
+        returncode: Optional[int] = None
+        path: str = self.index.path(command) or command.description
+        self.emit("start", path=path, description=command.description, args=args)
+        start: float = time.monotonic()
+        self._task = asyncio.ensure_future(self.acapture(command, *args))
+        try:
+            with self.metrics.measure(kind="callback", path=path), self.metrics.profile(path=path):
+                result, returncode = await self._task
+        except asyncio.CancelledError:
+            current: Optional[asyncio.Task] = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+            console.error("command interrupted")
+        finally:
+            self._task = None
+            self.finish(command, path, args, returncode, time.monotonic() - start)
+        await self.ainput(prompt="press enter to continue")
+        return result
+
+    async def aexecute(self, args: List[str]) -> bool:
+        import asyncio
+
+        awaitable: Optional[Tuple[Command, List[str]]] = self.awaitable(args)
+        if awaitable is None:
+            # builtins, pages and synchronous commands run as usual on a worker thread
+            return await asyncio.to_thread(self.execute, args)
+        command, arguments = awaitable
+        args, _ = self.parse(args)
+        start: float = time.monotonic()
+        self.trigger("before_execute", args)
+        result: bool = await self.adispatch(command, arguments)
+        self.trigger("after_execute", args, result, time.monotonic() - start)
+        return result
+
+    def interrupt(self) -> None:
+        # ctrl-c cancels a running awaitable command and is otherwise ignored,
+        # since neither a worker thread nor the input thread can be interrupted
+        if self._task is not None:
+            self._task.cancel()
+
+    async def aloop(self) -> None:
+        import asyncio
+
+        self.setup()
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        interruptible: bool = True
+        try:
+            loop.add_signal_handler(signal.SIGINT, self.interrupt)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # signal handlers are only available to unix event loops on the main thread
+            interruptible = False
+        try:
+            status: bool = False
+            while not status:
+                if not self.incremental:
+                    console.clear()
+                self.render()
+                try:
+                    with self.metrics.measure(kind="input"):
+                        line: str = await self.ainput(prompt=f"{self.prompt} ", markup=False)
+                    self.remember(line)
+                    status = await self.aexecute(args=line.split())
+                except EOFError:
+                    status = True
+                    console.print()
+                    console.info("exited with EOF")
+        finally:
+            if interruptible:
+                loop.remove_signal_handler(signal.SIGINT)
+
+    def lookup(self, name: str) -> Optional[Entry]:
+        # a bare index is relative to the current page, so only paths and aliases are looked up
+        if "." not in name and name.isdigit():
+            return None
+        return self.index.get(name)
+
+    def resolve(self, args: List[str]) -> Tuple[Union[Command, Page], List[str]]:
+        node: Union[Command, Page] = self.pages[0]
+        entry: Optional[Entry] = self.lookup(args[0]) if args else None
+        if entry is not None:
+            # a full path or alias stands in for the leading names
+            node, args = entry.node, args[1:]
+        for index, key in enumerate(args):
+            if isinstance(node, Command):
+                return node, args[index:]
+            if isinstance(node, DynamicPage):
+                # a script goes on to the page's commands, so it waits for them
+                node.load(wait=True)
+            elif isinstance(node, LazyPage):
+                node.load()
+            if key not in node.commands:
+                raise Exception(f"command not found: {' '.join(args[: index + 1])}")
+            node = node.commands[key]
+        return node, []
+
+    def run_script(self, lines: Iterable[str], fail_fast: bool = True) -> Result:
+        steps: List[Step] = []
+        for line in lines:
+            args: List[str] = shlex.split(line, comments=True)
+            if not args:
+                continue
+            start: float = time.monotonic()
+            description: Optional[str] = None
+            error: Optional[str] = None
+            try:
+                node, arguments = self.resolve(args=args)
+                description = node.description
+                if isinstance(node, Page):
+                    raise Exception(f"path resolves to a page: {' '.join(args)}")
+                returncode = node.callback.run(*arguments)
+            except Exception as e:
+                returncode = 1
+                error = f"{e}"
+                console.error(error)
+            step = Step(
+                line=" ".join(args),
+                returncode=returncode,
+                duration=time.monotonic() - start,
+                description=description,
+                error=error,
+            )
+            steps.append(step)
+            console.info(f"{step.line}: exited with code {step.returncode} in {step.duration:.2f}s")
+            if fail_fast and not step.ok:
+                break
+        return Result(steps=steps)
+
+    def warm(self) -> None:
+        # search and completion are shared by every session, so they are built before
+        # serving rather than by the first session that needs them
+        if self._search is None:
+            self._search = Search(index=self.index)
+        if self._completer is None:
+            self._completer = Completer(index=self.index, builtins=self.builtins)
+
+    def session(self) -> "Interpreter":
+        # a session shares the tree, its index, search, completion, the metrics and the
+        # event log with the interpreter, but navigates, renders, captures output, runs
+        # jobs and keeps history on its own
+        session: Interpreter = copy.copy(self)
+        session._pages = [self.pages[0]]
+        session._renderer = Renderer()
+        session._captures = Captures()
+        session._jobs = JobManager()
+        if self.history is not None:
+            session._history = History(
+                name=self.history.name,
+                path=self.history.path,
+                length=self.history.length,
+                max_entries=self.history.max_entries,
+            )
+        session._hot = {}
+        session._offsets = {}
+        session._matches = []
+        session._task = None
+        session._builtins = session.create_builtins()
+        return session
+
+    def serve(self, path: str, width: int = DEFAULT_WIDTH) -> None:
+        from repli.server import Server
+
+        # sessions are rendered in colour at a fixed width, whatever the server's own terminal
+        console.configure(width=width, color_system="256")
+        self.warm()
+        with Server(interpreter=self, path=path) as server:
+            console.info(f"serving {self.name} on {path}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                console.info("stopped serving")
+
+    def main(self, argv: Optional[List[str]] = None) -> int:
+        import argparse
+
+        parser = argparse.ArgumentParser(prog=self.name)
+        parser.add_argument(
+            "--script",
+            metavar="FILE",
+            help="run the command paths in FILE ('-' for stdin) without the interface and exit",
+        )
+        parser.add_argument(
+            "--keep-going",
+            action="store_true",
+            help="continue the script after a failed step",
+        )
+        parser.add_argument(
+            "--serve",
+            metavar="SOCKET",
+            help="keep the interpreter running and serve sessions on the unix socket SOCKET",
+        )
+        options = parser.parse_args(argv)
+        if options.serve is not None:
+            self.serve(path=os.path.expanduser(options.serve))
+            return 0
+        if options.script is None:
+            self.loop()
+            return 0
+        result: Result
+        if options.script == "-":
+            result = self.run_script(lines=sys.stdin, fail_fast=not options.keep_going)
+        else:
+            with open(options.script, encoding="utf-8") as file:
+                result = self.run_script(lines=file, fail_fast=not options.keep_going)
+        return result.returncode
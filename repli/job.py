@@ -0,0 +1,358 @@
+import abc
+import atexit
+import contextvars
+import io
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from repli.callback import Callback, NativeFunction, Subprocess
+from typing import TYPE_CHECKING, Dict, List, Optional, TextIO, Union
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+    from repli.fanout import FanOut
+    from repli.workflow import Workflow
+
+
+DEFAULT_MAX_WORKERS: int = 4
+
+# set on the thread of a background fan-out or workflow to a future that is completed when the job
+# is killed. there is no terminal to draw a live table on there
+background: contextvars.ContextVar[Optional["Future"]] = contextvars.ContextVar("background", default=None)
+
+
+class Output(io.TextIOBase):
+    # sys.stdout is shared by every thread and task, so writes made from a job
+    # thread are routed into that job's buffer and everything else passes through.
+    # the target is a context variable, which threads start without and tasks
+    # and asyncio.to_thread inherit from where they were started
+    def __init__(self, stream: TextIO) -> None:
+        super().__init__()
+        self._stream: TextIO = stream
+        self._target: contextvars.ContextVar[Optional[TextIO]] = contextvars.ContextVar("target", default=None)
+
+    @property
+    def stream(self) -> TextIO:
+        return self._stream
+
+    @property
+    def target(self) -> Optional[TextIO]:
+        return self._target.get()
+
+    @target.setter
+    def target(self, target: Optional[TextIO]) -> None:
+        self._target.set(target)
+
+    def write(self, text: str) -> int:
+        return (self.target or self.stream).write(text)
+
+    def flush(self) -> None:
+        (self.target or self.stream).flush()
+
+    def isatty(self) -> bool:
+        return (self.target or self.stream).isatty()
+
+    def fileno(self) -> int:
+        return self.stream.fileno()
+
+    @property
+    def encoding(self) -> str:  # type: ignore[override]
+        return getattr(self.stream, "encoding", "utf-8")
+
+    @classmethod
+    def install(cls) -> "Output":
+        if not isinstance(sys.stdout, cls):
+            sys.stdout = cls(stream=sys.stdout)
+        return sys.stdout
+
+
+class Input(io.TextIOBase):
+    # like Output for sys.stdin, so that a session served over a socket reads its
+    # own lines. it has no file descriptor, so input() always reads through it
+    def __init__(self, stream: TextIO) -> None:
+        super().__init__()
+        self._stream: TextIO = stream
+        self._target: contextvars.ContextVar[Optional[TextIO]] = contextvars.ContextVar("target", default=None)
+
+    @property
+    def stream(self) -> TextIO:
+        return self._stream
+
+    @property
+    def target(self) -> Optional[TextIO]:
+        return self._target.get()
+
+    @target.setter
+    def target(self, target: Optional[TextIO]) -> None:
+        self._target.set(target)
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, size: Optional[int] = -1) -> str:  # type: ignore[override]
+        return (self.target or self.stream).readline()
+
+    def isatty(self) -> bool:
+        return (self.target or self.stream).isatty()
+
+    @classmethod
+    def install(cls) -> "Input":
+        if not isinstance(sys.stdin, cls):
+            sys.stdin = cls(stream=sys.stdin)
+        return sys.stdin
+
+
+class Job(abc.ABC):
+    def __init__(self, id: int, description: str) -> None:
+        self._id: int = id
+        self._description: str = description
+        self._started: float = time.monotonic()
+        self._finished: Optional[float] = None
+        self._returncode: Optional[int] = None
+        self._killed: bool = False
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @property
+    def returncode(self) -> Optional[int]:
+        return self._returncode
+
+    @property
+    def running(self) -> bool:
+        return self.returncode is None
+
+    @property
+    def status(self) -> str:
+        if self.running:
+            return "running"
+        if self._killed:
+            return "killed"
+        return "finished" if self.returncode == 0 else "failed"
+
+    @property
+    def runtime(self) -> float:
+        return (self._finished or time.monotonic()) - self._started
+
+    def finish(self, returncode: int) -> None:
+        self._finished = time.monotonic()
+        self._returncode = returncode
+
+    def tail(self, lines: int) -> List[str]:
+        return self.output().splitlines()[-lines:]
+
+    def close(self) -> None:
+        # releases what the job keeps of its output once it is no longer listed
+        pass
+
+    @abc.abstractmethod
+    def output(self) -> str:
+        pass
+
+    @abc.abstractmethod
+    def kill(self) -> None:
+        pass
+
+
+class NativeFunctionJob(Job):
+    def __init__(
+        self,
+        id: int,
+        description: str,
+        executor: "ThreadPoolExecutor",
+        callback: NativeFunction,
+        *args: str,
+    ) -> None:
+        super().__init__(id=id, description=description)
+        self._buffer: io.StringIO = io.StringIO()
+        self._output: Output = Output.install()
+        self._future: "Future" = executor.submit(self.run, callback, *args)
+
+    def run(self, callback: NativeFunction, *args: str) -> None:
+        self._output.target = self._buffer
+        try:
+            callback.run(*args)
+            self.finish(returncode=0)
+        except Exception as e:
+            self._buffer.write(f"native function raised an exception: {e}\n")
+            self.finish(returncode=1)
+        finally:
+            self._output.target = None
+
+    def output(self) -> str:
+        return self._buffer.getvalue()
+
+    def kill(self) -> None:
+        if not self._future.cancel():
+            raise Exception(f"job {self.id} is a native function and cannot be killed while running")
+        self._killed = True
+        self.finish(returncode=-signal.SIGTERM)
+
+
+class WorkflowJob(Job):
+    # a fan-out runs like a workflow of one step per target. killing a running workflow
+    # cancels the steps that have not started, and the job finishes once the running ones have
+    def __init__(
+        self,
+        id: int,
+        description: str,
+        executor: "ThreadPoolExecutor",
+        callback: Union["FanOut", "Workflow"],
+        *args: str,
+    ) -> None:
+        from concurrent.futures import Future
+
+        super().__init__(id=id, description=description)
+        self._buffer: io.StringIO = io.StringIO()
+        self._output: Output = Output.install()
+        self._stop: "Future" = Future()
+        self._future: "Future" = executor.submit(self.run, callback, *args)
+
+    def run(self, callback: Union["FanOut", "Workflow"], *args: str) -> None:
+        self._output.target = self._buffer
+        background.set(self._stop)
+        try:
+            self.finish(returncode=callback.run(*args))
+        except Exception as e:
+            self._buffer.write(f"command raised an exception: {e}\n")
+            self.finish(returncode=1)
+        finally:
+            background.set(None)
+            self._output.target = None
+
+    def output(self) -> str:
+        return self._buffer.getvalue()
+
+    def kill(self) -> None:
+        if not self.running:
+            raise Exception(f"job {self.id} is not running")
+        self._killed = True
+        if self._future.cancel():
+            self.finish(returncode=-signal.SIGTERM)
+        elif not self._stop.done():
+            self._stop.set_result(None)
+
+
+class SubprocessJob(Job):
+    def __init__(self, id: int, description: str, callback: Subprocess, *args: str) -> None:
+        super().__init__(id=id, description=description)
+        arguments: str = callback.callable(*args)
+        with tempfile.NamedTemporaryFile(prefix=f"repli-job-{id}-", suffix=".log", delete=False) as log:
+            self._path: str = log.name
+            self._process: subprocess.Popen = subprocess.Popen(
+                args=shlex.split(arguments),
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def returncode(self) -> Optional[int]:
+        if self._returncode is None:
+            returncode: Optional[int] = self._process.poll()
+            if returncode is not None:
+                self.finish(returncode=returncode)
+        return self._returncode
+
+    def output(self) -> str:
+        with open(self.path, encoding="utf-8", errors="replace") as log:
+            return log.read()
+
+    def close(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def kill(self) -> None:
+        if not self.running:
+            raise Exception(f"job {self.id} is not running")
+        self._killed = True
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self._process.pid, signal.SIGTERM)
+            else:
+                self._process.terminate()
+        except ProcessLookupError:
+            pass
+
+
+class JobManager:
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        self._max_workers: int = max_workers
+        self._executor: Optional["ThreadPoolExecutor"] = None
+        self._jobs: Dict[int, Job] = {}
+        self._index: int = 1
+        self._registered: bool = False
+
+    @property
+    def jobs(self) -> Dict[int, Job]:
+        return self._jobs
+
+    @property
+    def executor(self) -> "ThreadPoolExecutor":
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="repli-job")
+        return self._executor
+
+    def submit(self, description: str, callback: Callback, *args: str) -> Job:
+        from repli.fanout import FanOut
+        from repli.workflow import Workflow
+
+        job: Job
+        if isinstance(callback, NativeFunction):
+            job = NativeFunctionJob(self._index, description, self.executor, callback, *args)
+        elif isinstance(callback, (FanOut, Workflow)):
+            job = WorkflowJob(self._index, description, self.executor, callback, *args)
+        elif isinstance(callback, Subprocess):
+            job = SubprocessJob(self._index, description, callback, *args)
+            if not self._registered:
+                # the log files of the jobs still listed are removed when the process exits
+                self._registered = True
+                atexit.register(self.close)
+        else:
+            raise Exception("command cannot run in background")
+        self._jobs[job.id] = job
+        self._index += 1
+        return job
+
+    def get(self, id: str) -> Job:
+        if not id.isdigit() or int(id) not in self.jobs:
+            raise Exception(f"job not found: {id}")
+        return self.jobs[int(id)]
+
+    def remove(self, id: str) -> Job:
+        job: Job = self.get(id)
+        if job.running:
+            raise Exception(f"job {job.id} is still running")
+        del self._jobs[job.id]
+        job.close()
+        return job
+
+    def clear(self) -> List[Job]:
+        # only finished jobs are removed, running ones are kept
+        return [self.remove(str(job.id)) for job in list(self.jobs.values()) if not job.running]
+
+    def close(self) -> None:
+        for job in list(self.jobs.values()):
+            job.close()
+        if self._registered:
+            # a closed manager, like a finished session's, is not kept alive by the hook
+            self._registered = False
+            atexit.unregister(self.close)
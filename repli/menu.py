@@ -0,0 +1,224 @@
+import hashlib
+import importlib
+import os
+import shlex
+import string
+import sys
+from repli.callback import NativeFunction, Subprocess
+from repli.command import Page
+from repli.fanout import FANOUT_OPTIONS
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+FORMAT: int = 1
+# a snapshot holds instances of these modules' classes, so it is only valid for the same code
+SNAPSHOT_MODULES: List[str] = ["repli.callback", "repli.command", "repli.fanout", "repli.menu", "repli.workflow"]
+
+COMMON_KEYS: List[str] = ["description", "alias"]
+COMMAND_KEYS: List[str] = [*COMMON_KEYS, "background", "arguments", *FANOUT_OPTIONS]
+KEYS: Dict[str, List[str]] = {
+    "commands": COMMON_KEYS,
+    "loader": COMMON_KEYS,
+    "provider": [*COMMON_KEYS, "ttl"],
+    "function": [*COMMAND_KEYS, "cache"],
+    "subprocess": [*COMMAND_KEYS, "stream", "timeout", "pooled"],
+}
+
+
+def directory() -> str:
+    cache: str = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache, "repli", "menus")
+
+
+class Reference:
+    # a "module:attribute" callable, which is only imported when it is first called
+    def __init__(self, target: str) -> None:
+        if target.count(":") != 1:
+            raise ValueError(f"invalid reference: {target}")
+        module, attribute = target.split(":")
+        self._target: str = target
+        self._callable: Optional[Callable[..., Any]] = None
+        # cached results are named after these, as they would be for the callable itself
+        self.__module__ = module
+        self.__qualname__ = attribute
+
+    @property
+    def target(self) -> str:
+        return self._target
+
+    @property
+    def resolved(self) -> bool:
+        return self._callable is not None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # a snapshot keeps the reference, not what it was resolved to
+        return {**self.__dict__, "_callable": None}
+
+    def resolve(self) -> Callable[..., Any]:
+        if self._callable is None:
+            module, attribute = self.target.split(":")
+            resolved: Any = importlib.import_module(module)
+            for name in attribute.split("."):
+                resolved = getattr(resolved, name)
+            if not callable(resolved):
+                raise Exception(f"reference is not callable: {self.target}")
+            self._callable = resolved
+        return self._callable
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        import inspect
+
+        result: Any = self.resolve()(*args, **kwargs)
+        if inspect.iscoroutine(result):
+            import asyncio
+
+            # whether the callable is a coroutine function is unknown until it is imported
+            return asyncio.run(result)
+        return result
+
+
+class Template:
+    # "{0}", "{1}", ... are replaced by the arguments and "{args}" by all of them,
+    # each quoted, so that the command splits back into the same arguments
+    def __init__(self, template: str) -> None:
+        for _, field, _, _ in string.Formatter().parse(template):
+            if field is not None and field != "args" and not field.isdigit():
+                raise ValueError(f"invalid template: {template}")
+        self._template: str = template
+
+    @property
+    def template(self) -> str:
+        return self._template
+
+    def __call__(self, *args: str, **kwargs: str) -> str:
+        try:
+            return self.template.format(*[shlex.quote(arg) for arg in args], args=shlex.join(args))
+        except IndexError:
+            raise Exception(f"missing arguments for: {self.template}")
+
+
+def parse(path: str, source: bytes) -> Dict[str, Any]:
+    if path.endswith(".toml"):
+        import tomllib
+
+        return tomllib.loads(source.decode("utf-8"))
+    if path.endswith(".json"):
+        import json
+
+        return json.loads(source)
+    raise ValueError(f"invalid menu format: {path}")
+
+
+def normalize(entry: Dict[str, Any], where: str = "root") -> Dict[str, Any]:
+    # the entry is checked and reduced to plain data, which is what a snapshot holds
+    if not isinstance(entry, dict):
+        raise ValueError(f"invalid menu entry: {where}")
+    kinds: List[str] = [kind for kind in KEYS if kind in entry]
+    if len(kinds) != 1:
+        raise ValueError(f"invalid menu entry: {where}")
+    kind: str = kinds[0]
+    if "description" not in entry:
+        raise ValueError(f"missing description: {where}")
+    for key in entry:
+        if key != kind and key not in KEYS[kind]:
+            raise ValueError(f"invalid key in {where}: {key}")
+    if kind == "commands":
+        if not isinstance(entry["commands"], list):
+            raise ValueError(f"invalid menu entry: {where}")
+        commands: List[Dict[str, Any]] = [
+            normalize(entry=child, where=f"{where}.{index}") for index, child in enumerate(entry["commands"], start=1)
+        ]
+        return {**entry, "commands": commands}
+    if kind == "function":
+        Reference(target=entry["function"])
+    if isinstance(entry.get("targets"), str):
+        Reference(target=entry["targets"])
+    if kind == "subprocess":
+        Template(template=entry["subprocess"])
+    return dict(entry)
+
+
+def build(tree: Dict[str, Any]) -> Page:
+    page: Page = Page(description=tree["description"], alias=tree.get("alias"))
+    for node in tree["commands"]:
+        options: Dict[str, Any] = {key: value for key, value in node.items() if key not in ["function", "subprocess"]}
+        if isinstance(options.get("targets"), str):
+            options["targets"] = Reference(target=options["targets"])
+        if "commands" in node:
+            page.add_page(page=build(tree=node))
+        elif "loader" in node:
+            page.add_lazy_page(**options)
+        elif "provider" in node:
+            page.add_dynamic_page(**options)
+        elif "function" in node:
+            page.command(NativeFunction, **options)(Reference(target=node["function"]))
+        else:
+            page.command(Subprocess, **options)(Template(template=node["subprocess"]))
+    return page
+
+
+def stamp() -> str:
+    stamps: List[str] = []
+    for name in SNAPSHOT_MODULES:
+        file: Optional[str] = getattr(sys.modules[name], "__file__", None)
+        if file is not None:
+            stat: os.stat_result = os.stat(file)
+            stamps.append(f"{name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return ";".join(stamps)
+
+
+def snapshot(path: str, source: bytes, cache: str) -> Tuple[str, str]:
+    # named after the menu file and its content, so that an edited menu gets a new
+    # snapshot and the one it replaces can be found and removed
+    prefix: str = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    digest: str = hashlib.sha256(f"{FORMAT}:{sys.version}:{stamp()}\n".encode("utf-8") + source).hexdigest()
+    return prefix, os.path.join(cache, f"{prefix}-{digest}.snapshot")
+
+
+def read(path: str) -> Optional[Page]:
+    import pickle
+
+    try:
+        with open(path, "rb") as file:
+            page: Any = pickle.load(file)
+    except Exception:
+        # a missing, cut short or outdated snapshot is compiled again
+        return None
+    return page if isinstance(page, Page) else None
+
+
+def write(path: str, prefix: str, page: Page) -> None:
+    import pickle
+
+    cache: str = os.path.dirname(path)
+    os.makedirs(cache, mode=0o700, exist_ok=True)
+    for name in os.listdir(cache):
+        if name.startswith(f"{prefix}-") and name.endswith(".snapshot"):
+            os.remove(os.path.join(cache, name))
+    temporary: str = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        pickle.dump(page, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+
+def load(path: str, cache: Optional[str] = None) -> Page:
+    # the menu is checked and built once, then unpickled from its snapshot until it
+    # changes, which skips registering every command again and importing the modules
+    # its functions live in
+    path = os.path.expanduser(path)
+    with open(path, "rb") as file:
+        source: bytes = file.read()
+    prefix, name = snapshot(path=path, source=source, cache=cache or directory())
+    snapshotted: Optional[Page] = read(path=name)
+    if snapshotted is not None:
+        return snapshotted
+    tree: Dict[str, Any] = normalize(entry=parse(path=path, source=source))
+    if "commands" not in tree:
+        raise ValueError(f"menu is not a page: {path}")
+    page: Page = build(tree=tree)
+    try:
+        write(path=name, prefix=prefix, page=page)
+    except (OSError, ValueError):
+        # a menu still loads without a writable cache, only more slowly
+        pass
+    return page
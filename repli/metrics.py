@@ -0,0 +1,187 @@
+import collections
+import contextlib
+import io
+import time
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import cProfile
+
+
+DEFAULT_SAMPLES: int = 1024
+DEFAULT_PROFILE_LINES: int = 20
+
+EXPORT_FORMATS: List[str] = ["json", "prometheus"]
+
+
+def quantile(samples: List[float], q: float) -> float:
+    # nearest rank over the sorted samples
+    if not samples:
+        return 0.0
+    ordered: List[float] = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+def label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Series:
+    # durations of one kind of measurement for one command path, of which only
+    # the latest samples are kept for the quantiles
+    def __init__(self, kind: str, path: str, samples: int = DEFAULT_SAMPLES) -> None:
+        self._kind: str = kind
+        self._path: str = path
+        self._samples: Deque[float] = collections.deque(maxlen=samples)
+        self._count: int = 0
+        self._total: float = 0.0
+        self._max: float = 0.0
+
+    @property
+    def kind(self) -> str:
+        return self._kind
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def total(self) -> float:
+        return self._total
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    @property
+    def p50(self) -> float:
+        return quantile(list(self._samples), 0.5)
+
+    @property
+    def p95(self) -> float:
+        return quantile(list(self._samples), 0.95)
+
+    def observe(self, duration: float) -> None:
+        self._samples.append(duration)
+        self._count += 1
+        self._total += duration
+        self._max = max(self.max, duration)
+
+
+class Metrics:
+    def __init__(self, samples: int = DEFAULT_SAMPLES) -> None:
+        self._samples: int = samples
+        self._series: Dict[Tuple[str, str], Series] = {}
+        self._profiling: bool = False
+        self._profiles: Dict[str, "cProfile.Profile"] = {}
+
+    @property
+    def series(self) -> List[Series]:
+        return list(self._series.values())
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiling
+
+    @profiling.setter
+    def profiling(self, profiling: bool) -> None:
+        self._profiling = profiling
+
+    @property
+    def profiles(self) -> Dict[str, "cProfile.Profile"]:
+        return self._profiles
+
+    def get(self, kind: str, path: str = "") -> Optional[Series]:
+        return self._series.get((kind, path))
+
+    def observe(self, kind: str, path: str, duration: float) -> None:
+        series: Optional[Series] = self._series.get((kind, path))
+        if series is None:
+            series = Series(kind=kind, path=path, samples=self._samples)
+            self._series[(kind, path)] = series
+        series.observe(duration)
+
+    @contextlib.contextmanager
+    def measure(self, kind: str, path: str = "") -> Iterator[None]:
+        start: float = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(kind=kind, path=path, duration=time.monotonic() - start)
+
+    @contextlib.contextmanager
+    def profile(self, path: str) -> Iterator[None]:
+        # only the latest run of each command path is kept
+        if not self.profiling:
+            yield
+            return
+        import cProfile
+
+        profile: cProfile.Profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._profiles[path] = profile
+
+    def report(self, path: str, lines: int = DEFAULT_PROFILE_LINES) -> str:
+        import pstats
+
+        profile: Optional["cProfile.Profile"] = self._profiles.get(path)
+        if profile is None:
+            raise Exception(f"profile not found: {path}")
+        stream: io.StringIO = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(lines)
+        return stream.getvalue()
+
+    def reset(self) -> None:
+        self._series.clear()
+        self._profiles.clear()
+
+    def export(self, format: str) -> str:
+        if format == "json":
+            return self.as_json()
+        if format == "prometheus":
+            return self.as_prometheus()
+        raise ValueError(f"invalid export format: {format}")
+
+    def as_json(self) -> str:
+        import json
+
+        data: List[Dict[str, Any]] = [
+            {
+                "kind": series.kind,
+                "path": series.path,
+                "count": series.count,
+                "total": series.total,
+                "p50": series.p50,
+                "p95": series.p95,
+                "max": series.max,
+            }
+            for series in self.series
+        ]
+        return json.dumps(data, indent=2)
+
+    def as_prometheus(self) -> str:
+        # a summary per series, with the maximum as a separate gauge
+        lines: List[str] = [
+            "# HELP repli_duration_seconds Duration of interpreter operations per command path.",
+            "# TYPE repli_duration_seconds summary",
+        ]
+        maxima: List[str] = [
+            "# HELP repli_duration_seconds_max Maximum duration of interpreter operations per command path.",
+            "# TYPE repli_duration_seconds_max gauge",
+        ]
+        for series in self.series:
+            labels: str = f'kind="{label(series.kind)}",path="{label(series.path)}"'
+            lines.append(f'repli_duration_seconds{{{labels},quantile="0.5"}} {series.p50}')
+            lines.append(f'repli_duration_seconds{{{labels},quantile="0.95"}} {series.p95}')
+            lines.append(f"repli_duration_seconds_sum{{{labels}}} {series.total}")
+            lines.append(f"repli_duration_seconds_count{{{labels}}} {series.count}")
+            maxima.append(f"repli_duration_seconds_max{{{labels}}} {series.max}")
+        return "\n".join(lines + maxima) + "\n"
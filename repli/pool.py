@@ -0,0 +1,234 @@
+import atexit
+import contextlib
+import os
+import secrets
+import selectors
+import shlex
+import signal
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+
+DEFAULT_SHELL: str = "/bin/sh"
+DEFAULT_SIZE: int = 2
+CLOSE_TIMEOUT: float = 1.0
+BLOCK_SIZE: int = 64 * 1024
+
+# builtins that change the shell itself rather than run a program
+STATEFUL: Set[str] = set(
+    ". alias bg cd command eval exec exit export fg getopts hash local read readonly set shift source trap ulimit umask "
+    "unalias unset wait".split()
+)
+
+
+class Worker:
+    # a long-lived shell that runs one command at a time from the environment it
+    # was started with. a marker line followed by the exit code ends a command's
+    # output on stdout, and the marker alone on stderr
+    def __init__(self, shell: str = DEFAULT_SHELL) -> None:
+        self._marker: bytes = f"__repli_{secrets.token_hex(8)}__".encode("ascii")
+        self._environ: Dict[str, str] = dict(os.environ)
+        self._process: subprocess.Popen = subprocess.Popen(
+            args=[shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=self._environ,
+            start_new_session=True,
+        )
+        self._runs: int = 0
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    @property
+    def environ(self) -> Dict[str, str]:
+        return self._environ
+
+    @property
+    def runs(self) -> int:
+        return self._runs
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def script(self, arguments: str) -> bytes:
+        # the arguments are split and quoted again, so that they mean what they do
+        # without a worker rather than being interpreted by the shell. external
+        # commands cannot change the worker, builtins that could run in a subshell
+        argv: List[str] = shlex.split(arguments)
+        command: str = f"cd {shlex.quote(os.getcwd())} && {shlex.join(argv)} </dev/null"
+        if argv and argv[0] in STATEFUL:
+            command = f"( {command} )"
+        marker: str = self._marker.decode("ascii")
+        return f"{command}\nprintf '%s %d\\n' {marker} $?\nprintf '%s\\n' {marker} >&2\n".encode("utf-8")
+
+    def run(self, arguments: str, output: Callable[[str, str], Any], timeout: Optional[float] = None) -> int:
+        stdin, stdout, stderr = self._process.stdin, self._process.stdout, self._process.stderr
+        if stdin is None or stdout is None or stderr is None:
+            raise Exception("worker has no pipes")
+        self._runs += 1
+        try:
+            stdin.write(self.script(arguments=arguments))
+            stdin.flush()
+        except OSError:
+            raise Exception("worker exited unexpectedly")
+
+        # both pipes are read on the calling thread, a line at a time
+        start: float = time.monotonic()
+        returncode: int = -1
+        pending: Dict[str, bytes] = {"stdout": b"", "stderr": b""}
+        with selectors.DefaultSelector() as selector:
+            selector.register(stdout, selectors.EVENT_READ, "stdout")
+            selector.register(stderr, selectors.EVENT_READ, "stderr")
+            while selector.get_map():
+                remaining: Optional[float] = None
+                if timeout is not None:
+                    remaining = timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        raise subprocess.TimeoutExpired(cmd=arguments, timeout=timeout)
+                for key, _ in selector.select(timeout=remaining):
+                    name: str = key.data
+                    data: bytes = os.read(key.fd, BLOCK_SIZE)
+                    if not data:
+                        raise Exception("worker exited unexpectedly")
+                    lines: List[bytes] = (pending[name] + data).split(b"\n")
+                    pending[name] = lines.pop()
+                    for line in lines:
+                        if self._marker not in line:
+                            output(name, f"{line.decode('utf-8', errors='replace')}\n")
+                            continue
+                        # output without a trailing newline ends right before the marker
+                        before, _, after = line.partition(self._marker)
+                        if before:
+                            output(name, before.decode("utf-8", errors="replace"))
+                        if name == "stdout":
+                            returncode = int(after.strip())
+                        selector.unregister(key.fileobj)
+                        break
+        return returncode
+
+    def kill(self) -> None:
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self._process.pid, signal.SIGKILL)
+            else:
+                self._process.kill()
+        except ProcessLookupError:
+            pass
+        self._process.wait()
+
+    def close(self) -> None:
+        if self.alive and self._process.stdin is not None:
+            try:
+                self._process.stdin.write(b"exit\n")
+                self._process.stdin.close()
+                self._process.wait(timeout=CLOSE_TIMEOUT)
+                return
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self.kill()
+
+
+class Pool:
+    # up to size idle workers are kept. when every worker is busy another one is
+    # started rather than waited for, and closed again once it is no longer needed
+    def __init__(self, size: int = DEFAULT_SIZE, shell: str = DEFAULT_SHELL) -> None:
+        self._size: int = size
+        self._shell: str = shell
+        self._idle: List[Worker] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._spawned: int = 0
+        self._registered: bool = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @size.setter
+    def size(self, size: int) -> None:
+        if size < 0:
+            raise ValueError(f"invalid size: {size}")
+        self._size = size
+
+    @property
+    def shell(self) -> str:
+        return self._shell
+
+    @property
+    def idle(self) -> List[Worker]:
+        return list(self._idle)
+
+    @property
+    def spawned(self) -> int:
+        return self._spawned
+
+    def spawn(self) -> Worker:
+        worker: Worker = Worker(shell=self.shell)
+        with self._lock:
+            self._spawned += 1
+            if not self._registered:
+                self._registered = True
+                atexit.register(self.close)
+        return worker
+
+    def start(self) -> None:
+        # workers are otherwise started by the first commands that need them
+        with self._lock:
+            missing: int = self.size - len(self._idle)
+        workers: List[Worker] = [self.spawn() for _ in range(missing)]
+        with self._lock:
+            self._idle.extend(workers)
+
+    def acquire(self) -> Worker:
+        # a worker that died or was started before the environment changed is replaced
+        environ: Dict[str, str] = dict(os.environ)
+        stale: List[Worker] = []
+        worker: Optional[Worker] = None
+        with self._lock:
+            while self._idle:
+                candidate: Worker = self._idle.pop()
+                if candidate.alive and candidate.environ == environ:
+                    worker = candidate
+                    break
+                stale.append(candidate)
+        for candidate in stale:
+            candidate.close()
+        return worker if worker is not None else self.spawn()
+
+    def release(self, worker: Worker) -> None:
+        with self._lock:
+            if worker.alive and len(self._idle) < self.size:
+                self._idle.append(worker)
+                return
+        worker.close()
+
+    @contextlib.contextmanager
+    def worker(self) -> Iterator[Worker]:
+        # a worker interrupted in the middle of a command is killed, along with the
+        # command, and a fresh one takes its place next time
+        worker: Worker = self.acquire()
+        try:
+            yield worker
+        except BaseException:
+            worker.kill()
+            raise
+        finally:
+            self.release(worker)
+
+    def run(self, arguments: str, output: Callable[[str, str], Any], timeout: Optional[float] = None) -> int:
+        with self.worker() as worker:
+            return worker.run(arguments=arguments, output=output, timeout=timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+
+workers: Pool = Pool()
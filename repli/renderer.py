@@ -0,0 +1,99 @@
+from repli.terminal import console
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import rich.console
+    from rich.console import ConsoleDimensions, ConsoleOptions, RenderableType, RenderResult
+    from rich.measure import Measurement
+    from rich.segment import Segment
+
+
+CURSOR_HOME: str = "\x1b[H"
+ERASE_SCREEN: str = "\x1b[2J"
+ERASE_LINE: str = "\x1b[K"
+ERASE_BELOW: str = "\x1b[J"
+
+
+def cursor_to(row: int) -> str:
+    return f"\x1b[{row};1H"
+
+
+class Cached:
+    def __init__(self, renderable: "RenderableType") -> None:
+        self._renderable: "RenderableType" = renderable
+        self._lines: Dict[Tuple[int, Optional[int]], List[List["Segment"]]] = {}
+        self._measurements: Dict[int, "Measurement"] = {}
+
+    @property
+    def renderable(self) -> "RenderableType":
+        return self._renderable
+
+    def __rich_console__(self, console: "rich.console.Console", options: "ConsoleOptions") -> "RenderResult":
+        from rich.segment import Segment
+
+        key: Tuple[int, Optional[int]] = (options.max_width, options.height)
+        if key not in self._lines:
+            self._lines[key] = console.render_lines(self.renderable, options, pad=False)
+        new_line: Segment = Segment.line()
+        for line in self._lines[key]:
+            yield from line
+            yield new_line
+
+    def __rich_measure__(self, console: "rich.console.Console", options: "ConsoleOptions") -> "Measurement":
+        from rich.measure import Measurement
+
+        if options.max_width not in self._measurements:
+            self._measurements[options.max_width] = Measurement.get(console, options, self.renderable)
+        return self._measurements[options.max_width]
+
+
+class Renderer:
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+        self._size: Optional["ConsoleDimensions"] = None
+
+    @property
+    def lines(self) -> List[str]:
+        return self._lines
+
+    @property
+    def size(self) -> Optional["ConsoleDimensions"]:
+        return self._size
+
+    def invalidate(self) -> None:
+        self._lines = []
+        self._size = None
+
+    def capture(self, renderable: "RenderableType") -> List[str]:
+        with console.capture() as capture:
+            console.print(renderable)
+        return capture.get().splitlines()
+
+    def write(self, data: str) -> None:
+        console.file.write(data)
+        console.file.flush()
+
+    def redraw(self, lines: List[str]) -> str:
+        return CURSOR_HOME + ERASE_SCREEN + "".join(f"{line}\n" for line in lines)
+
+    def diff(self, lines: List[str]) -> str:
+        data: str = ""
+        for row, line in enumerate(lines):
+            if row >= len(self.lines) or self.lines[row] != line:
+                data += cursor_to(row + 1) + line + ERASE_LINE
+        return data + cursor_to(len(lines) + 1) + ERASE_BELOW
+
+    def draw(self, renderable: "RenderableType") -> None:
+        if not console.is_terminal:
+            console.print(renderable)
+            return
+        lines: List[str] = self.capture(renderable)
+        size: "ConsoleDimensions" = console.size
+        # the frame plus the prompt line must fit on screen, otherwise the
+        # terminal scrolls and row addressing no longer matches the frame
+        if not self.lines or size != self.size or len(lines) + 1 >= size.height:
+            self.write(self.redraw(lines))
+        else:
+            self.write(self.diff(lines))
+        self._lines = lines
+        self._size = size
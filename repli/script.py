@@ -0,0 +1,66 @@
+from typing import List, Optional
+
+
+class Step:
+    def __init__(
+        self,
+        line: str,
+        returncode: int,
+        duration: float,
+        description: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        self._line: str = line
+        self._returncode: int = returncode
+        self._duration: float = duration
+        self._description: Optional[str] = description
+        self._error: Optional[str] = error
+
+    @property
+    def line(self) -> str:
+        return self._line
+
+    @property
+    def returncode(self) -> int:
+        return self._returncode
+
+    @property
+    def duration(self) -> float:
+        return self._duration
+
+    @property
+    def description(self) -> Optional[str]:
+        return self._description
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._error
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+class Result:
+    def __init__(self, steps: List[Step]) -> None:
+        self._steps: List[Step] = steps
+
+    @property
+    def steps(self) -> List[Step]:
+        return self._steps
+
+    @property
+    def ok(self) -> bool:
+        return all(step.ok for step in self.steps)
+
+    @property
+    def duration(self) -> float:
+        return sum(step.duration for step in self.steps)
+
+    @property
+    def returncode(self) -> int:
+        # the first failure decides the process exit code, which must fit 1-255
+        for step in self.steps:
+            if not step.ok:
+                return step.returncode if 0 < step.returncode < 256 else 1
+        return 0
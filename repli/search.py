@@ -0,0 +1,108 @@
+import heapq
+import math
+from collections import Counter
+from operator import itemgetter
+from repli.index import Entry, Index
+from typing import Dict, FrozenSet, List, Tuple
+
+
+DEFAULT_LIMIT: int = 10
+# share of the query trigrams a description must contain to be a match
+MINIMUM_SIMILARITY: float = 1 / 3
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    padded: str = f" {' '.join(text.lower().split())} "
+    return frozenset(a + b + c for a, b, c in zip(padded, padded[1:], padded[2:]))
+
+
+class Document:
+    def __init__(self, entry: Entry) -> None:
+        self._entry: Entry = entry
+        self._text: str = entry.node.description.lower()
+        self._trigrams: FrozenSet[str] = trigrams(entry.node.description)
+        self._breadcrumb: str = " > ".join([page.description for page in entry.pages] + [entry.node.description])
+
+    @property
+    def entry(self) -> Entry:
+        return self._entry
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @property
+    def trigrams(self) -> FrozenSet[str]:
+        return self._trigrams
+
+    @property
+    def breadcrumb(self) -> str:
+        return self._breadcrumb
+
+
+class Match:
+    def __init__(self, document: Document, score: float) -> None:
+        self._document: Document = document
+        self._score: float = score
+
+    @property
+    def entry(self) -> Entry:
+        return self._document.entry
+
+    @property
+    def breadcrumb(self) -> str:
+        return self._document.breadcrumb
+
+    @property
+    def score(self) -> float:
+        return self._score
+
+
+class Search:
+    def __init__(self, index: Index) -> None:
+        self._documents: List[Document] = []
+        self._texts: List[str] = []
+        self._postings: Dict[str, List[int]] = {}
+        for entry in index.nodes():
+            self.add(entry=entry)
+        index.observe(self.add)
+
+    @property
+    def documents(self) -> List[Document]:
+        return self._documents
+
+    def add(self, entry: Entry) -> None:
+        document: Document = Document(entry=entry)
+        identifier: int = len(self._documents)
+        self._documents.append(document)
+        self._texts.append(document.text)
+        for trigram in document.trigrams:
+            self._postings.setdefault(trigram, []).append(identifier)
+
+    def scores(self, text: str) -> Dict[int, int]:
+        query: FrozenSet[str] = trigrams(text)
+        if len(text) < 3:
+            # a query this short has no trigram inside a word, so descriptions are scanned
+            return {identifier: len(query) for identifier, line in enumerate(self._texts) if text in line}
+        counts: Counter = Counter()
+        for trigram in query:
+            counts.update(self._postings.get(trigram, []))
+        minimum: int = max(1, math.ceil(len(query) * MINIMUM_SIMILARITY))
+        return {identifier: count for identifier, count in counts.items() if count >= minimum}
+
+    def query(self, text: str, limit: int = DEFAULT_LIMIT) -> List[Match]:
+        text = " ".join(text.lower().split())
+        if not text:
+            return []
+        total: int = len(trigrams(text))
+        scores: Dict[int, int] = self.scores(text=text)
+        # only the best candidates by trigram count are checked for an exact substring,
+        # which always has one of the highest counts, so ranking stays proportional to limit
+        best: List[Tuple[int, int]] = heapq.nlargest(limit * 4, scores.items(), key=itemgetter(1))
+        matches: List[Match] = []
+        for identifier, _ in best:
+            document: Document = self._documents[identifier]
+            score: float = scores[identifier] / total + (1.0 if text in document.text else 0.0)
+            matches.append(Match(document=document, score=score))
+        matches.sort(key=lambda match: (-match.score, len(match.breadcrumb)))
+        return matches[:limit]
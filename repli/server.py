@@ -0,0 +1,166 @@
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+from repli.job import Input, Output
+from repli.terminal import remote
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TextIO, cast
+
+if TYPE_CHECKING:
+    from repli.interpreter import Interpreter
+    from repli.script import Result
+
+
+class Connection(io.TextIOBase):
+    # one client session, which speaks newline delimited json: writes are sent as
+    # output messages, and reading a line asks the client for one
+    def __init__(self, reader: io.BufferedIOBase, writer: io.BufferedIOBase) -> None:
+        super().__init__()
+        self._reader: io.BufferedIOBase = reader
+        self._writer: io.BufferedIOBase = writer
+        self._tty: bool = False
+        self._connected: bool = True
+
+    @property
+    def tty(self) -> bool:
+        return self._tty
+
+    @tty.setter
+    def tty(self, tty: bool) -> None:
+        self._tty = tty
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    def send(self, message: Dict[str, Any]) -> None:
+        if not self.connected:
+            return
+        try:
+            self._writer.write((json.dumps(message) + "\n").encode("utf-8"))
+            self._writer.flush()
+        except OSError:
+            # the client is gone, which the next read reports as the end of input
+            self._connected = False
+
+    def receive(self) -> Optional[Dict[str, Any]]:
+        try:
+            line: bytes = self._reader.readline()
+        except OSError:
+            line = b""
+        if not line:
+            self._connected = False
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def write(self, text: str) -> int:
+        if text:
+            self.send({"type": "output", "data": text})
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return self.tty
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, size: Optional[int] = -1) -> str:  # type: ignore[override]
+        # an empty string is the end of input, which input() raises as EOFError
+        self.send({"type": "input"})
+        message: Optional[Dict[str, Any]] = self.receive()
+        if message is None or message.get("type") != "line":
+            return ""
+        return f"{message.get('line', '')}\n"
+
+
+def report(result: "Result") -> Dict[str, Any]:
+    steps: List[Dict[str, Any]] = [
+        {
+            "line": step.line,
+            "returncode": step.returncode,
+            "duration": step.duration,
+            "description": step.description,
+            "error": step.error,
+        }
+        for step in result.steps
+    ]
+    return {"type": "result", "returncode": result.returncode, "steps": steps}
+
+
+class Session(socketserver.StreamRequestHandler):
+    server: "Server"
+
+    def handle(self) -> None:
+        connection: Connection = Connection(reader=self.rfile, writer=self.wfile)
+        hello: Optional[Dict[str, Any]] = connection.receive()
+        if hello is None or hello.get("type") != "hello":
+            return
+        connection.tty = bool(hello.get("tty", False))
+        interpreter: "Interpreter" = self.server.interpreter.session()
+        output: Output = Output.install()
+        stdin: Input = Input.install()
+        # each session runs on its own thread, so these only apply to this session
+        output.target = cast(TextIO, connection)
+        stdin.target = cast(TextIO, connection)
+        remote.set(True)
+        try:
+            if hello.get("mode") == "batch":
+                lines: List[str] = hello.get("lines", [])
+                connection.send(report(interpreter.run_script(lines=lines, fail_fast=hello.get("fail_fast", True))))
+            else:
+                interpreter.loop()
+        finally:
+            output.target = None
+            stdin.target = None
+            # the session's jobs end with it, along with their log files
+            interpreter.jobs.close()
+            connection.send({"type": "exit"})
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, interpreter: "Interpreter", path: str) -> None:
+        self._interpreter: "Interpreter" = interpreter
+        self.unlink(path=path)
+        # sys.stdout and sys.stdin are replaced before any session thread starts
+        Output.install()
+        Input.install()
+        # the socket is created owner-only, rather than restricted once another user may
+        # already have connected to it
+        umask: int = os.umask(0o177)
+        try:
+            super().__init__(path, Session)
+        finally:
+            os.umask(umask)
+
+    @property
+    def interpreter(self) -> "Interpreter":
+        return self._interpreter
+
+    def unlink(self, path: str) -> None:
+        # a socket left behind by a server that is gone is replaced, a live one is not
+        if not os.path.exists(path):
+            return
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise Exception(f"not a socket: {path}")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+            except OSError:
+                os.remove(path)
+                return
+        raise Exception(f"already serving on {path}")
+
+    def server_close(self) -> None:
+        super().server_close()
+        if isinstance(self.server_address, str) and os.path.exists(self.server_address):
+            os.remove(self.server_address)
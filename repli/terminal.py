@@ -0,0 +1,72 @@
+import contextvars
+import sys
+from typing import TYPE_CHECKING, Any, Optional, cast
+
+if TYPE_CHECKING:
+    from repli.console import Console
+
+
+class Plain:
+    # prints what the console would print as plain text, so that headless
+    # runs never import rich
+    is_terminal: bool = False
+
+    def print(self, *objects: Any, sep: str = " ", end: str = "\n", **kwargs: Any) -> None:
+        sys.stdout.write(sep.join(str(item) for item in objects) + end)
+        sys.stdout.flush()
+
+    def out(self, *objects: Any, sep: str = " ", end: str = "\n", **kwargs: Any) -> None:
+        self.print(*objects, sep=sep, end=end)
+
+    def line(self, count: int = 1) -> None:
+        self.print(end="\n" * count)
+
+    def info(self, message: str) -> None:
+        self.print(f"info: {message}")
+
+    def error(self, message: str) -> None:
+        self.print(f"error: {message}")
+
+    def configure(self, width: int, color_system: str) -> None:
+        pass
+
+
+class Terminal:
+    # stands in for the console singleton, which is only imported and created
+    # the first time one of its attributes is used
+    def __init__(self) -> None:
+        self._target: Optional[Any] = None
+        self._headless: bool = False
+
+    @property
+    def headless(self) -> bool:
+        return self._headless
+
+    @headless.setter
+    def headless(self, headless: bool) -> None:
+        self._headless = headless
+        self._target = None
+
+    @property
+    def target(self) -> Any:
+        if self._target is None:
+            if self.headless:
+                self._target = Plain()
+            else:
+                from repli.console import Console
+
+                # calling Console() again would reset a console configured before first use
+                self._target = Console._instance or Console()
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.target, name)
+
+
+terminal: Terminal = Terminal()
+
+# set while a session is served over a socket, where subprocesses cannot
+# inherit the terminal and their output has to be forwarded instead
+remote: contextvars.ContextVar[bool] = contextvars.ContextVar("remote", default=False)
+
+console: "Console" = cast("Console", terminal)
@@ -0,0 +1,148 @@
+import contextlib
+import os
+import select
+import sys
+import time
+from repli.callback import NativeFunction, Subprocess
+from repli.fanout import Target, execute
+from repli.renderer import Renderer
+from repli.terminal import console
+from typing import TYPE_CHECKING, Iterator, List, Optional, Union
+
+if TYPE_CHECKING:
+    from rich.console import RenderableType
+    from repli.command import Command
+
+
+DEFAULT_INTERVAL: float = 2.0
+MIN_INTERVAL: float = 0.1
+MAX_DELAY: float = 60.0
+# the title, the status line, the blank line below them and the line left for the cursor
+CHROME_ROWS: int = 4
+BLOCK_SIZE: int = 1024
+
+
+def backoff(interval: float, delay: float, duration: float) -> float:
+    # a run slower than the interval at least doubles the time until the next one,
+    # up to MAX_DELAY, and a run that fits in the interval brings it back
+    if duration <= interval:
+        return interval
+    return min(max(delay, duration) * 2, max(interval, MAX_DELAY))
+
+
+@contextlib.contextmanager
+def keys() -> Iterator[Optional[int]]:
+    # keys are read as they are pressed, without echo, when stdin is a terminal.
+    # otherwise there is nothing to read them from and only ctrl-c stops a watch
+    try:
+        fd: int = sys.stdin.fileno()
+    except (AttributeError, OSError, ValueError):
+        yield None
+        return
+    if not os.isatty(fd):
+        yield None
+        return
+    import termios
+    import tty
+
+    attributes = termios.tcgetattr(fd)
+    tty.setcbreak(fd)
+    try:
+        yield fd
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, attributes)
+
+
+def pressed(fd: Optional[int], timeout: float) -> bool:
+    # waits up to timeout for a key, which is consumed
+    if fd is None:
+        time.sleep(timeout)
+        return False
+    ready, _, _ = select.select([fd], [], [], timeout)
+    if not ready:
+        return False
+    os.read(fd, BLOCK_SIZE)
+    return True
+
+
+class Watch:
+    # the command runs again once the delay since its previous run started has
+    # passed, never while that run is still going, and only the lines of the
+    # screen that changed are redrawn
+    def __init__(self, command: "Command", args: List[str], interval: float = DEFAULT_INTERVAL) -> None:
+        if not isinstance(command.callback, (NativeFunction, Subprocess)):
+            raise Exception("only native functions and subprocesses can be watched")
+        if interval < MIN_INTERVAL:
+            raise Exception(f"invalid interval: {interval:g}")
+        self._command: "Command" = command
+        self._callback: Union[NativeFunction, Subprocess] = command.callback
+        self._args: List[str] = args
+        self._interval: float = interval
+        self._delay: float = interval
+        self._runs: int = 0
+        self._renderer: Renderer = Renderer()
+
+    @property
+    def command(self) -> "Command":
+        return self._command
+
+    @property
+    def args(self) -> List[str]:
+        return self._args
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def delay(self) -> float:
+        return self._delay
+
+    @property
+    def runs(self) -> int:
+        return self._runs
+
+    @property
+    def renderer(self) -> Renderer:
+        return self._renderer
+
+    def step(self) -> Target:
+        target: Target = Target(name=self.command.description)
+        execute(self._callback, target, *self.args)
+        self._runs += 1
+        self._delay = backoff(interval=self.interval, delay=self.delay, duration=target.duration or 0.0)
+        return target
+
+    def frame(self, target: Target) -> "RenderableType":
+        from rich.console import Group
+        from rich.text import Text
+
+        title: Text = Text()
+        title.append(f"every {self.delay:g}s", style="bold cyan")
+        title.append(f"  {self.command.description}")
+        if self.args:
+            title.append(f" {' '.join(self.args)}")
+        status: Text = Text(style="dim")
+        status.append(time.strftime("%H:%M:%S"))
+        status.append(f"  exit {target.returncode} in {target.duration or 0.0:.1f}s")
+        if self.delay > self.interval:
+            status.append(f"  backed off from {self.interval:g}s")
+        status.append("  press any key to stop")
+        # the output is cut to the screen, so that each line keeps its row between runs
+        rows: int = max(console.size.height - CHROME_ROWS, 1)
+        lines: List[str] = target.output.splitlines()[:rows]
+        output: Text = Text.from_ansi("\n".join(lines), no_wrap=True, overflow="crop")
+        return Group(title, status, Text(), output)
+
+    def run(self) -> None:
+        with keys() as fd:
+            try:
+                while True:
+                    start: float = time.monotonic()
+                    target: Target = self.step()
+                    self.renderer.draw(self.frame(target))
+                    # a key pressed during a run stops the watch once the run is done
+                    if pressed(fd=fd, timeout=max(start + self.delay - time.monotonic(), 0.0)):
+                        break
+            except KeyboardInterrupt:
+                pass
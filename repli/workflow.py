@@ -0,0 +1,228 @@
+from repli.callback import Callback, NativeFunction, Subprocess
+from repli.fanout import DEFAULT_CONCURRENCY, Target, execute, live
+from repli.job import Output, background
+from repli.terminal import console, terminal
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple, Union
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from rich.table import Table
+    from repli.command import Command
+
+
+POLICIES: List[str] = ["stop", "skip", "continue"]
+DEFAULT_POLICY: str = "skip"
+
+
+class Step:
+    # a command of the workflow, which runs once every step it comes after has finished.
+    # the command is either a command or the key or alias of one on the page it is added to
+    def __init__(
+        self,
+        name: str,
+        command: Union["Command", str],
+        after: Optional[List[str]] = None,
+        arguments: Optional[List[str]] = None,
+    ) -> None:
+        self._name: str = name
+        self._command: Union["Command", str] = command
+        self._after: List[str] = after or []
+        self._arguments: List[str] = arguments or []
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def command(self) -> Union["Command", str]:
+        return self._command
+
+    @property
+    def after(self) -> List[str]:
+        return self._after
+
+    @property
+    def arguments(self) -> List[str]:
+        return self._arguments
+
+
+def order(steps: List[Step]) -> List[Step]:
+    # the steps sorted so that each one follows its dependencies, as declared otherwise
+    names: Set[str] = set()
+    for step in steps:
+        if step.name in names:
+            raise ValueError(f"duplicate step: {step.name}")
+        names.add(step.name)
+    for step in steps:
+        for name in step.after:
+            if name not in names:
+                raise ValueError(f"unknown dependency of step {step.name}: {name}")
+    ordered: List[Step] = []
+    done: Set[str] = set()
+    remaining: List[Step] = list(steps)
+    while remaining:
+        ready: List[Step] = [step for step in remaining if all(name in done for name in step.after)]
+        if not ready:
+            raise ValueError(f"dependency cycle between steps: {', '.join(step.name for step in remaining)}")
+        ordered.extend(ready)
+        done.update(step.name for step in ready)
+        remaining = [step for step in remaining if step.name not in done]
+    return ordered
+
+
+class Workflow(Callback):
+    # independent steps run concurrently. when a step fails, the stop policy cancels
+    # every step that has not started, skip only the steps that depend on it, and
+    # continue runs them anyway
+    def __init__(
+        self,
+        steps: List[Step],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        policy: str = DEFAULT_POLICY,
+    ) -> None:
+        super().__init__()
+        if policy not in POLICIES:
+            raise ValueError(f"invalid policy: {policy}")
+        self._callbacks: Dict[str, Union[NativeFunction, Subprocess]] = {}
+        for step in steps:
+            if isinstance(step.command, str):
+                raise ValueError(f"unresolved command of step {step.name}: {step.command}")
+            if not isinstance(step.command.callback, (NativeFunction, Subprocess)):
+                raise ValueError(f"invalid callback type of step: {step.name}")
+            self._callbacks[step.name] = step.command.callback
+        self._steps: List[Step] = order(steps)
+        self._concurrency: int = concurrency
+        self._policy: str = policy
+
+    @property
+    def steps(self) -> List[Step]:
+        return self._steps
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    def dispatch(self, step: Step, target: Target, *args: str) -> None:
+        execute(self._callbacks[step.name], target, *step.arguments, *args)
+
+    def table(self, targets: Dict[str, Target]) -> "Table":
+        from rich.table import Table
+
+        table: Table = Table(box=None, header_style="bold cyan", pad_edge=False)
+        table.add_column("step", style="bold cyan")
+        table.add_column("after")
+        table.add_column("status")
+        table.add_column("duration", justify="right")
+        table.add_column("exit", justify="right")
+        for step in self.steps:
+            target: Target = targets[step.name]
+            duration = "-" if target.duration is None else f"{target.duration:.1f}s"
+            returncode = "-" if target.returncode is None else str(target.returncode)
+            table.add_row(step.name, ", ".join(step.after) or "-", target.status, duration, returncode)
+        return table
+
+    def __call__(self, *args: str, **kwargs: str) -> bool:
+        result, _ = self.invoke(*args, **kwargs)
+        return result
+
+    def invoke(self, *args: str, **kwargs: str) -> Tuple[bool, Optional[int]]:
+        super().__call__(*args, **kwargs)
+        return False, self.run(*args)
+
+    def schedule(self, targets: Dict[str, Target], submitted: Set[str]) -> List[Step]:
+        # the steps whose dependencies have all finished, in order. the steps after one
+        # that did not succeed are skipped, unless the policy is to continue
+        ready: List[Step] = []
+        for step in self.steps:
+            target: Target = targets[step.name]
+            if step.name in submitted or target.status != "pending":
+                continue
+            dependencies: List[Target] = [targets[name] for name in step.after]
+            if any(dependency.status in ["pending", "running"] for dependency in dependencies):
+                continue
+            if self.policy != "continue" and any(dependency.status != "ok" for dependency in dependencies):
+                target.skip()
+                continue
+            ready.append(step)
+        return ready
+
+    def run(self, *args: str, **kwargs: str) -> int:
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        # completed when the background job running the workflow is killed
+        stop: Optional["Future"] = background.get()
+        targets: Dict[str, Target] = {step.name: Target(name=step.name) for step in self.steps}
+        console.info(f"running {len(targets)} steps with concurrency {self.concurrency}")
+        Output.install()
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="repli-workflow")
+        futures: Dict["Future", Step] = {}
+        submitted: Set[str] = set()
+        reported: Set[str] = set()
+        with live(lambda: self.table(targets)):
+            try:
+                while True:
+                    # steps are only submitted when a worker is free, so that none is
+                    # left queued to start after a failure has stopped the workflow
+                    pending: Set["Future"] = {future for future in futures if not future.done()}
+                    ready: List[Step] = self.schedule(targets, submitted)[: self.concurrency - len(pending)]
+                    for step in ready:
+                        submitted.add(step.name)
+                        future: "Future" = executor.submit(self.dispatch, step, targets[step.name], *args)
+                        futures[future] = step
+                        pending.add(future)
+                    # steps that finish at once make others ready without anything to wait for
+                    pending = {future for future in pending if not future.done()}
+                    if not pending and not ready:
+                        break
+                    if pending:
+                        wait(pending if stop is None else {*pending, stop}, return_when=FIRST_COMPLETED)
+                    self.report(targets, reported)
+                    if stop is not None and stop.done():
+                        console.error("workflow killed, cancelling remaining steps")
+                        self.cancel(futures, targets)
+                        break
+                    failed: List[Target] = [target for target in targets.values() if target.status == "failed"]
+                    if self.policy == "stop" and failed:
+                        console.error(f"step {failed[0].name} failed, cancelling remaining steps")
+                        self.cancel(futures, targets)
+                        break
+            except KeyboardInterrupt:
+                console.error("workflow interrupted, cancelling remaining steps")
+                self.cancel(futures, targets)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        if not terminal.headless and not console.is_terminal:
+            # rich leaves the final frame unterminated outside a terminal
+            console.line()
+        # steps still running when the loop stopped early finish before shutdown returns
+        self.report(targets, reported)
+
+        failed = [target for target in targets.values() if target.status != "ok"]
+        if failed:
+            console.error(f"{len(failed)} of {len(targets)} steps did not succeed")
+            return 1
+        console.info(f"all {len(targets)} steps succeeded")
+        return 0
+
+    def report(self, targets: Dict[str, Target], reported: Set[str]) -> None:
+        for step in self.steps:
+            target: Target = targets[step.name]
+            if step.name in reported or target.returncode is None:
+                continue
+            reported.add(step.name)
+            console.print(f"[{target.name}]", style="bold cyan", markup=False, highlight=False)
+            if target.output:
+                console.out(target.output.rstrip("\n"), highlight=False)
+
+    def cancel(self, futures: Dict["Future", Step], targets: Dict[str, Target]) -> None:
+        # queued steps are cancelled along with the ones that were never scheduled
+        for future, step in futures.items():
+            if future.cancel():
+                targets[step.name].cancel()
+        for target in targets.values():
+            if target.status == "pending":
+                target.cancel()
@@ -0,0 +1,121 @@
+import io
+import threading
+import time
+from pytest_mock import MockerFixture
+from repli.cache import Record, ResultCache, Tee, key
+
+
+def test_key():
+    assert key(name="name", args=("arg1",), kwargs={"b": "2", "a": "1"}) == ("name", ("arg1",), (("a", "1"), ("b", "2")))
+
+
+def test_tee():
+    stream = io.StringIO()
+    tee = Tee(stream=stream)
+    tee.write("output\n")
+
+    assert stream.getvalue() == "output\n"
+    assert tee.getvalue() == "output\n"
+
+
+def test_record():
+    record = Record(key=("name", (), ()), output="é\n", created=time.time(), expires=time.time() + 60)
+
+    assert record.size == 3
+    assert record.expired == False
+    record.hit()
+    assert record.hits == 1
+
+
+def test_result_cache_get(mocker: MockerFixture):
+    results = ResultCache()
+    results.put(key=("name", (), ()), output="output\n", ttl=60)
+
+    record = results.get(key=("name", (), ()))
+
+    assert record is not None
+    assert record.output == "output\n"
+    assert results.get(key=("other", (), ())) is None
+
+
+def test_result_cache_get_expired(mocker: MockerFixture):
+    mock_time = mocker.patch("time.time", return_value=100.0)
+    results = ResultCache()
+    results.put(key=("name", (), ()), output="output\n", ttl=60)
+    mock_time.return_value = 160.0
+
+    assert results.get(key=("name", (), ())) is None
+    assert len(results) == 0
+    assert results.size == 0
+
+
+def test_result_cache_max_entries():
+    results = ResultCache(max_entries=2)
+    results.put(key=("1", (), ()), output="1", ttl=60)
+    results.put(key=("2", (), ()), output="2", ttl=60)
+    results.get(key=("1", (), ()))
+    results.put(key=("3", (), ()), output="3", ttl=60)
+
+    assert [record.key[0] for record in results.records] == ["1", "3"]
+
+
+def test_result_cache_max_bytes():
+    results = ResultCache(max_bytes=10)
+    results.put(key=("1", (), ()), output="12345", ttl=60)
+    results.put(key=("2", (), ()), output="12345", ttl=60)
+    results.put(key=("3", (), ()), output="123", ttl=60)
+    results.put(key=("4", (), ()), output="12345678901", ttl=60)
+
+    assert [record.key[0] for record in results.records] == ["2", "3"]
+    assert results.size == 8
+
+
+def test_result_cache_concurrent(tmp_path):
+    results = ResultCache(max_entries=16, path=str(tmp_path / "cache.json"))
+    errors = []
+
+    def use(name: str) -> None:
+        try:
+            for index in range(200):
+                results.put(key=(name, (str(index),), ()), output="12345", ttl=60)
+                results.get(key=(name, (str(index),), ()))
+                if index % 50 == 0:
+                    results.flush(key=(name, (str(index),), ()))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=use, args=(str(name),)) for name in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(results) == 16
+    assert results.size == sum(record.size for record in results.records)
+
+
+def test_result_cache_flush():
+    results = ResultCache()
+    results.put(key=("1", (), ()), output="1", ttl=60)
+    results.put(key=("2", (), ()), output="2", ttl=60)
+
+    assert results.flush(key=("1", (), ())) == 1
+    assert results.flush(key=("1", (), ())) == 0
+    assert results.flush() == 1
+    assert len(results) == 0
+
+
+def test_result_cache_persist(tmp_path):
+    path = str(tmp_path / "cache" / "results.json")
+    results = ResultCache(path=path)
+    results.put(key=("name", ("arg1",), (("key", "value"),)), output="output\n", ttl=60)
+    results.put(key=("expired", (), ()), output="output\n", ttl=0)
+    results.put(key=("transient#1", (), ()), output="output\n", ttl=60)
+
+    restored = ResultCache(path=path)
+
+    assert [record.key for record in restored.records] == [("name", ("arg1",), (("key", "value"),))]
+    record = restored.get(key=("name", ("arg1",), (("key", "value"),)))
+    assert record is not None
+    assert record.output == "output\n"
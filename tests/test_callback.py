@@ -1,4 +1,10 @@
+import asyncio
+import io
+import signal
+import sys
+import time
 from pytest_mock import MockerFixture
+from repli.cache import ResultCache
 from repli.callback import Builtin, Callback, NativeFunction, Subprocess
 
 
@@ -51,11 +57,11 @@ def test_callback_native_function_call(mocker: MockerFixture):
     mock_callback_call = mocker.patch("repli.callback.Callback.__call__")
     mock_console_print = mocker.patch("repli.console.Console.print")
     mock_console_error = mocker.patch("repli.console.Console.error")
-    mock_rich_rule = mocker.patch("repli.callback.Rule")
+    mock_rich_rule = mocker.patch("rich.rule.Rule")
     mock_callable = mocker.MagicMock()
 
     native_function = NativeFunction(callable=mock_callable)
-    result = native_function("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
+    result, returncode = native_function.invoke("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
 
     mock_callback_call.assert_called_once_with("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
     mock_console_print.assert_has_calls(
@@ -66,6 +72,7 @@ def test_callback_native_function_call(mocker: MockerFixture):
     )
     mock_callable.assert_called_once_with("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
     mock_console_error.assert_not_called()
+    assert returncode == 0
     assert result == False
 
 
@@ -73,11 +80,11 @@ def test_callback_native_function_call_exception(mocker: MockerFixture):
     mock_callback_call = mocker.patch("repli.callback.Callback.__call__")
     mock_console_print = mocker.patch("repli.console.Console.print")
     mock_console_error = mocker.patch("repli.console.Console.error")
-    mock_rich_rule = mocker.patch("repli.callback.Rule")
+    mock_rich_rule = mocker.patch("rich.rule.Rule")
     mock_callable = mocker.MagicMock(side_effect=Exception("test"))
 
     native_function = NativeFunction(callable=mock_callable)
-    result = native_function("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
+    result, returncode = native_function.invoke("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
 
     mock_callback_call.assert_called_once_with("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
     mock_console_print.assert_has_calls(
@@ -87,9 +94,81 @@ def test_callback_native_function_call_exception(mocker: MockerFixture):
     )
     mock_callable.assert_called_once_with("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
     mock_console_error.assert_called_once_with("native function raised an exception: test")
+    assert returncode == 1
     assert result == False
 
 
+def test_callback_native_function_cache(mocker: MockerFixture):
+    assert NativeFunction(callable=mocker.MagicMock()).ttl is None
+    assert NativeFunction(callable=mocker.MagicMock(), cache=True).ttl == 300.0
+    assert NativeFunction(callable=mocker.MagicMock(), cache=10).ttl == 10.0
+
+
+def test_callback_native_function_call_cached(mocker: MockerFixture, monkeypatch):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mocker.patch("rich.rule.Rule")
+    results = mocker.patch("repli.callback.results", ResultCache())
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+    mock_callable = mocker.MagicMock(side_effect=lambda *args: print("output", *args))
+
+    native_function = NativeFunction(callable=mock_callable, cache=60)
+    native_function("arg1")
+    native_function("arg1")
+    native_function("arg2")
+
+    assert mock_callable.call_count == 2
+    assert stdout.getvalue() == "output arg1\noutput arg1\noutput arg2\n"
+    assert len(results) == 2
+    assert results.records[0].hits == 1
+    mock_console_info.assert_called_once_with("cached result from 0s ago")
+
+
+def status(host: str):
+    def status(*args: str) -> None:
+        print(f"{host} is up")
+
+    return status
+
+
+def test_callback_native_function_call_cached_closures(mocker: MockerFixture, monkeypatch):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("repli.console.Console.info")
+    mocker.patch("rich.rule.Rule")
+    results = mocker.patch("repli.callback.results", ResultCache())
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    alpha = NativeFunction(callable=status("alpha"), cache=60)
+    beta = NativeFunction(callable=status("beta"), cache=60)
+    alpha()
+    beta()
+
+    assert alpha.name != beta.name
+    assert stdout.getvalue() == "alpha is up\nbeta is up\n"
+    assert len(results) == 2
+    alpha.scope = "1"
+    assert alpha.name == "1:tests.test_callback.status.<locals>.status"
+
+
+def test_callback_native_function_call_cached_exception(mocker: MockerFixture, monkeypatch):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mocker.patch("rich.rule.Rule")
+    results = mocker.patch("repli.callback.results", ResultCache())
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+
+    native_function = NativeFunction(callable=mocker.MagicMock(side_effect=Exception("test")), cache=True)
+    native_function("arg1")
+
+    assert len(results) == 0
+    mock_console_error.assert_called_once_with("native function raised an exception: test")
+
+
 def test_callback_subprocess_init(mocker: MockerFixture):
     mock_callable = mocker.MagicMock()
 
@@ -103,7 +182,7 @@ def test_callback_subprocess_call(mocker: MockerFixture):
     mock_console_info = mocker.patch("repli.console.Console.info")
     mock_console_error = mocker.patch("repli.console.Console.error")
     mock_console_print = mocker.patch("repli.console.Console.print")
-    mock_rich_rule = mocker.patch("repli.callback.Rule")
+    mock_rich_rule = mocker.patch("rich.rule.Rule")
     mock_callable = mocker.MagicMock(return_value="test")
     mock_subprocess_call = mocker.patch("subprocess.call", return_value=False)
     mock_shlex_split = mocker.patch("shlex.split", return_value=["test"])
@@ -120,7 +199,7 @@ def test_callback_subprocess_call(mocker: MockerFixture):
         ]
     )
     mock_callable.assert_called_once_with("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
-    mock_subprocess_call.assert_called_once_with(args=["test"], text=True, encoding="utf-8")
+    mock_subprocess_call.assert_called_once_with(args=["test"], text=True, encoding="utf-8", timeout=None)
     mock_shlex_split.assert_called_once_with("test")
     mock_console_error.assert_not_called()
     assert result == False
@@ -131,13 +210,13 @@ def test_callback_subprocess_call_bad_return_code(mocker: MockerFixture):
     mock_console_info = mocker.patch("repli.console.Console.info")
     mock_console_error = mocker.patch("repli.console.Console.error")
     mock_console_print = mocker.patch("repli.console.Console.print")
-    mock_rich_rule = mocker.patch("repli.callback.Rule")
+    mock_rich_rule = mocker.patch("rich.rule.Rule")
     mock_callable = mocker.MagicMock(return_value="test")
     mock_subprocess_call = mocker.patch("subprocess.call", return_value=1)
     mock_shlex_split = mocker.patch("shlex.split", return_value=["test"])
 
     subprocess = Subprocess(callable=mock_callable)
-    result = subprocess("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
+    result, returncode = subprocess.invoke("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
 
     mock_callback_call.assert_called_once_with("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
     mock_console_info.assert_has_calls([mocker.call("running subprocess command: 'test'")])
@@ -148,9 +227,10 @@ def test_callback_subprocess_call_bad_return_code(mocker: MockerFixture):
         ]
     )
     mock_callable.assert_called_once_with("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
-    mock_subprocess_call.assert_called_once_with(args=["test"], text=True, encoding="utf-8")
+    mock_subprocess_call.assert_called_once_with(args=["test"], text=True, encoding="utf-8", timeout=None)
     mock_shlex_split.assert_called_once_with("test")
     mock_console_error.assert_called_once_with("subprocess returned an error code: 1")
+    assert returncode == 1
     assert result == False
 
 
@@ -159,13 +239,13 @@ def test_callback_subprocess_call_exception(mocker: MockerFixture):
     mock_console_info = mocker.patch("repli.console.Console.info")
     mock_console_error = mocker.patch("repli.console.Console.error")
     mock_console_print = mocker.patch("repli.console.Console.print")
-    mock_rich_rule = mocker.patch("repli.callback.Rule")
+    mock_rich_rule = mocker.patch("rich.rule.Rule")
     mock_callable = mocker.MagicMock(return_value="test")
     mock_subprocess_call = mocker.patch("subprocess.call", side_effect=Exception("test"))
     mock_shlex_split = mocker.patch("shlex.split", return_value=["test"])
 
     subprocess = Subprocess(callable=mock_callable)
-    result = subprocess("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
+    result, returncode = subprocess.invoke("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
 
     mock_callback_call.assert_called_once_with("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
     mock_console_info.assert_has_calls([mocker.call("running subprocess command: 'test'")])
@@ -175,7 +255,394 @@ def test_callback_subprocess_call_exception(mocker: MockerFixture):
         ]
     )
     mock_callable.assert_called_once_with("arg1", "arg2", kwarg1="kwarg1", kwarg2="kwarg2")
-    mock_subprocess_call.assert_called_once_with(args=["test"], text=True, encoding="utf-8")
+    mock_subprocess_call.assert_called_once_with(args=["test"], text=True, encoding="utf-8", timeout=None)
     mock_shlex_split.assert_called_once_with("test")
     mock_console_error.assert_called_once_with("subprocess raised an exception: test")
+    assert returncode == -1
+    assert result == False
+
+
+def test_callback_subprocess_call_stream(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    mock_subprocess_call = mocker.patch("subprocess.call")
+    script = "import sys; print('out'); print('err', file=sys.stderr)"
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "{script}"')
+
+    subprocess = Subprocess(callable=mock_callable, stream=True)
+    result = subprocess()
+
+    assert subprocess.stream == True
+    assert subprocess.timeout is None
+    mock_subprocess_call.assert_not_called()
+    mock_console_out.assert_has_calls(
+        [
+            mocker.call("out", highlight=False),
+            mocker.call("err", style="yellow", highlight=False),
+        ],
+        any_order=True,
+    )
+    assert mock_console_info.call_args_list[-1].args[0].startswith("subprocess exited with code 0 in ")
+    mock_console_error.assert_not_called()
+    assert result == False
+
+
+def test_callback_subprocess_call_stream_bad_return_code(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "raise SystemExit(3)"')
+
+    subprocess = Subprocess(callable=mock_callable, stream=True)
+    result = subprocess()
+
+    mock_console_error.assert_called_once_with("subprocess returned an error code: 3")
+    assert result == False
+
+
+def test_callback_subprocess_call_timeout(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "import time; time.sleep(10)"')
+
+    subprocess = Subprocess(callable=mock_callable, timeout=0.2)
+    start = time.monotonic()
+    result, returncode = subprocess.invoke()
+
+    assert time.monotonic() - start < 5
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("subprocess timed out after 0.2 seconds"),
+            mocker.call(f"subprocess returned an error code: -{signal.SIGKILL}"),
+        ]
+    )
+    assert result == False
+    assert returncode == -signal.SIGKILL
+
+
+def test_callback_subprocess_acall_timeout(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "import time; time.sleep(10)"')
+
+    subprocess = Subprocess(callable=mock_callable, timeout=0.2)
+    result, returncode = asyncio.run(subprocess.ainvoke())
+
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("subprocess timed out after 0.2 seconds"),
+            mocker.call(f"subprocess returned an error code: -{signal.SIGKILL}"),
+        ]
+    )
+    assert returncode == -signal.SIGKILL
+
+
+def test_callback_subprocess_call_stream_timeout(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "import time; time.sleep(10)"')
+
+    subprocess = Subprocess(callable=mock_callable, stream=True, timeout=0.2)
+    result = subprocess()
+
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("subprocess timed out after 0.2 seconds"),
+            mocker.call(f"subprocess returned an error code: -{signal.SIGTERM}"),
+        ]
+    )
+    assert result == False
+
+
+def test_callback_subprocess_communicate_keyboard_interrupt(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mocker.patch("queue.Queue.get", side_effect=KeyboardInterrupt)
+    mock_callable = mocker.MagicMock()
+
+    subprocess = Subprocess(callable=mock_callable, stream=True)
+    process = subprocess.popen(arguments=f'{sys.executable} -c "import time; time.sleep(10)"')
+    returncode = subprocess.communicate(process=process)
+
+    mock_console_error.assert_called_once_with("subprocess interrupted, sending SIGINT to its process group")
+    assert returncode == -signal.SIGINT
+
+
+def test_callback_run(mocker: MockerFixture):
+    callback = Callback()
+
+    try:
+        callback.run()
+    except Exception as e:
+        assert str(e) == "callback cannot run non-interactively"
+
+
+def test_callback_native_function_run(mocker: MockerFixture):
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    mock_callable = mocker.MagicMock()
+
+    native_function = NativeFunction(callable=mock_callable)
+    returncode = native_function.run("arg1", kwarg1="kwarg1")
+
+    mock_callable.assert_called_once_with("arg1", kwarg1="kwarg1")
+    mock_console_print.assert_not_called()
+    assert returncode == 0
+
+
+def test_callback_subprocess_run(mocker: MockerFixture):
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    mock_callable = mocker.MagicMock(return_value="test")
+    mock_subprocess_call = mocker.patch("subprocess.call", return_value=2)
+
+    subprocess = Subprocess(callable=mock_callable)
+    returncode = subprocess.run("arg1")
+
+    mock_callable.assert_called_once_with("arg1")
+    mock_subprocess_call.assert_called_once_with(args=["test"], text=True, encoding="utf-8", timeout=None)
+    mock_console_print.assert_not_called()
+    assert returncode == 2
+
+
+def test_callback_acall(mocker: MockerFixture):
+    mock_callback_call = mocker.patch("repli.callback.Callback.__call__", return_value=True)
+
+    callback = Callback()
+    result = asyncio.run(callback.acall("arg1"))
+
+    assert callback.awaitable == False
+    mock_callback_call.assert_called_once_with("arg1")
+    assert result == True
+
+
+def test_callback_native_function_acall(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.AsyncMock()
+
+    native_function = NativeFunction(callable=mock_callable)
+    result = asyncio.run(native_function.acall("arg1", kwarg1="kwarg1"))
+
+    assert native_function.awaitable == True
+    mock_callable.assert_awaited_once_with("arg1", kwarg1="kwarg1")
+    mock_console_error.assert_not_called()
+    assert result == False
+
+
+def test_callback_native_function_acall_exception(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+
+    native_function = NativeFunction(callable=mocker.AsyncMock(side_effect=Exception("test")))
+    asyncio.run(native_function.acall())
+
+    mock_console_error.assert_called_once_with("native function raised an exception: test")
+
+
+def test_callback_native_function_acall_cached(mocker: MockerFixture, monkeypatch):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("repli.console.Console.info")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.callback.results", ResultCache())
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+    mock_callable = mocker.AsyncMock(side_effect=lambda *args: print("output"))
+
+    native_function = NativeFunction(callable=mock_callable, cache=True)
+    asyncio.run(native_function.acall("arg1"))
+    asyncio.run(native_function.acall("arg1"))
+
+    assert mock_callable.await_count == 1
+    assert stdout.getvalue() == "output\noutput\n"
+
+
+def test_callback_native_function_run_coroutine(mocker: MockerFixture):
+    mock_callable = mocker.AsyncMock()
+
+    native_function = NativeFunction(callable=mock_callable)
+    returncode = native_function.run("arg1")
+
+    mock_callable.assert_awaited_once_with("arg1")
+    assert returncode == 0
+
+
+def test_callback_subprocess_acall_stream(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    script = "import sys; print('out'); print('err', file=sys.stderr)"
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "{script}"')
+
+    subprocess = Subprocess(callable=mock_callable, stream=True)
+    result = asyncio.run(subprocess.acall())
+
+    assert subprocess.awaitable == True
+    mock_console_out.assert_has_calls(
+        [
+            mocker.call("out", highlight=False),
+            mocker.call("err", style="yellow", highlight=False),
+        ],
+        any_order=True,
+    )
+    assert mock_console_info.call_args_list[-1].args[0].startswith("subprocess exited with code 0 in ")
+    mock_console_error.assert_not_called()
     assert result == False
+
+
+def test_callback_subprocess_acall_stream_timeout(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    script = "import time; time.sleep(10)"
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "{script}"')
+
+    subprocess = Subprocess(callable=mock_callable, stream=True, timeout=0.2)
+    asyncio.run(subprocess.acall())
+
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("subprocess timed out after 0.2 seconds"),
+            mocker.call(f"subprocess returned an error code: -{signal.SIGTERM}"),
+        ]
+    )
+
+
+def test_callback_subprocess_acall_stream_interrupt(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    script = "import time; time.sleep(10)"
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "{script}"')
+
+    async def interrupt() -> bool:
+        task = asyncio.ensure_future(Subprocess(callable=mock_callable, stream=True).acall())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        return await task
+
+    result = asyncio.run(interrupt())
+
+    assert result == False
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("subprocess interrupted, sending SIGINT to its process group"),
+            mocker.call(f"subprocess returned an error code: -{signal.SIGINT}"),
+        ]
+    )
+
+
+def test_callback_subprocess_call_pooled(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    mock_subprocess_call = mocker.patch("subprocess.call")
+    mock_callable = mocker.MagicMock(return_value="sh -c 'echo out; echo err >&2; exit 3'")
+
+    subprocess = Subprocess(callable=mock_callable, pooled=True)
+    result, returncode = subprocess.invoke()
+
+    assert subprocess.pooled == True
+    assert returncode == 3
+    mock_subprocess_call.assert_not_called()
+    mock_console_out.assert_has_calls(
+        [
+            mocker.call("out", highlight=False),
+            mocker.call("err", style="yellow", highlight=False),
+        ],
+        any_order=True,
+    )
+    assert mock_console_info.call_args_list[-1].args[0].startswith("subprocess exited with code 3 in ")
+    mock_console_error.assert_called_once_with("subprocess returned an error code: 3")
+    assert result == False
+
+
+def test_callback_subprocess_call_pooled_timeout(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.MagicMock(return_value="sleep 10")
+
+    subprocess = Subprocess(callable=mock_callable, pooled=True, timeout=0.2)
+    result = subprocess()
+
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("subprocess timed out after 0.2 seconds"),
+            mocker.call(f"subprocess returned an error code: -{signal.SIGKILL}"),
+        ]
+    )
+    assert result == False
+
+
+def test_callback_subprocess_acall_pooled(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    mock_callable = mocker.MagicMock(return_value="echo out")
+
+    subprocess = Subprocess(callable=mock_callable, pooled=True)
+    result, returncode = asyncio.run(subprocess.ainvoke())
+
+    mock_console_out.assert_called_once_with("out", highlight=False)
+    mock_console_error.assert_not_called()
+    assert returncode == 0
+    assert result == False
+
+
+def test_callback_subprocess_acall_pooled_interrupt(mocker: MockerFixture):
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("rich.rule.Rule")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.MagicMock(return_value="sleep 10")
+
+    async def interrupt() -> bool:
+        task = asyncio.ensure_future(Subprocess(callable=mock_callable, pooled=True).acall())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        return await task
+
+    result = asyncio.run(interrupt())
+
+    assert result == False
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("subprocess interrupted, killing its worker"),
+            mocker.call(f"subprocess returned an error code: -{signal.SIGINT}"),
+        ]
+    )
@@ -0,0 +1,59 @@
+import io
+from repli.capture import Capture, Captures
+
+
+def test_capture_write():
+    stream = io.StringIO()
+    capture = Capture(id=1, description="description", stream=stream)
+    capture.write("line 1\n")
+    capture.write("line 2\n")
+    capture.finish()
+    capture.write("line 3\n")
+
+    assert stream.getvalue() == "line 1\nline 2\n"
+    assert capture.text() == "line 1\nline 2\nline 3\n"
+    assert capture.size == 21
+    assert capture.spilled == False
+
+
+def test_capture_spill():
+    capture = Capture(id=1, description="description", stream=None, threshold=10)
+    capture.write("line 1\n")
+    capture.write("line 2\n")
+
+    assert capture.spilled == True
+    assert capture.text() == "line 1\nline 2\n"
+    capture.write("é\n")
+    assert capture.text() == "line 1\nline 2\né\n"
+    capture.close()
+
+
+def test_capture_search():
+    capture = Capture(id=1, description="description", stream=None)
+    capture.write("\x1b[33merror: one\x1b[0m\ninfo: two\nerror: three\n")
+
+    assert capture.search(pattern="^error") == [(1, "error: one"), (3, "error: three")]
+    assert capture.search(pattern="four") == []
+
+
+def test_captures_open():
+    captures = Captures(capacity=2)
+    first = captures.open(description="first", stream=None)
+    captures.open(description="second", stream=None)
+    captures.open(description="third", stream=None)
+
+    assert [capture.id for capture in captures.captures] == [2, 3]
+    assert captures.get("3").description == "third"
+    assert first.closed == True
+
+
+def test_captures_get_not_found():
+    captures = Captures()
+    captures.open(description="first", stream=None)
+
+    for id in ["2", "x"]:
+        try:
+            captures.get(id)
+            assert False
+        except Exception as e:
+            assert str(e) == f"output not found: {id}"
@@ -0,0 +1,39 @@
+import json
+import threading
+from pytest import CaptureFixture
+from repli.callback import NativeFunction
+from repli.client import main
+from repli.command import Page
+from repli.interpreter import Interpreter
+from repli.server import Server
+
+
+def test_client_script(capsys: CaptureFixture, tmp_path):
+    page = Page(description="home")
+    page.command(NativeFunction, "hello")(lambda *args: print("hello", *args))
+    path = str(tmp_path / "repli.sock")
+    script = tmp_path / "script"
+    script.write_text("1 a\n1 b\n")
+
+    with Server(interpreter=Interpreter(page=page), path=path) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        returncode = main(argv=[path, "--script", str(script)])
+        output = capsys.readouterr().out
+        json_returncode = main(argv=[path, "--script", str(script), "--json"])
+        result = json.loads(capsys.readouterr().out)
+        server.shutdown()
+
+    assert returncode == 0
+    assert "hello a\n" in output
+    assert "hello b\n" in output
+    assert json_returncode == 0
+    assert [step["line"] for step in result["steps"]] == ["1 a", "1 b"]
+
+
+def test_client_connect_error(capsys: CaptureFixture, tmp_path):
+    path = str(tmp_path / "repli.sock")
+
+    returncode = main(argv=[path])
+
+    assert returncode == 1
+    assert f"cannot connect to {path}" in capsys.readouterr().err
@@ -1,7 +1,12 @@
+import threading
+import time
 from pytest_mock import MockerFixture
 from repli.callback import NativeFunction
-from repli.command import Command, Page
+from repli.command import RESERVED_NAMES, Command, DynamicPage, LazyPage, Page
 from repli.callback import Subprocess
+from repli.fanout import FanOut
+from repli.workflow import Step, Workflow
+from rich.table import Table
 
 
 def test_command_init(mocker: MockerFixture):
@@ -10,6 +15,7 @@ def test_command_init(mocker: MockerFixture):
 
     assert command.description == "description"
     assert command.callback == mock_callback
+    assert command.background == False
 
 
 def test_page_init(mocker: MockerFixture):
@@ -70,3 +76,406 @@ def test_page_add_page(mocker: MockerFixture):
     assert "1" in page.commands
     assert page.commands["1"] == mock_page
     assert page.index == 2
+
+
+def test_page_panel(mocker: MockerFixture):
+    mock_rich_table = mocker.patch("rich.table.Table")
+    spy_rich_table_add_column = mocker.spy(mock_rich_table.return_value, "add_column")
+    spy_rich_table_add_row = mocker.spy(mock_rich_table.return_value, "add_row")
+
+    command = Command(description="description", callback=mocker.MagicMock())
+    page = Page(description="description")
+    mocker.patch.object(page, "_commands", {"1": command, "10": command})
+    panel = page.panel()
+
+    assert panel.renderable == mock_rich_table.return_value
+    mock_rich_table.assert_called_once_with(
+        show_header=False,
+        expand=True,
+        box=None,
+        pad_edge=False,
+    )
+    spy_rich_table_add_column.assert_has_calls(
+        [
+            mocker.call("index", style="bold cyan"),
+            mocker.call("description", justify="left", ratio=1),
+        ]
+    )
+    spy_rich_table_add_row.assert_has_calls(
+        [
+            mocker.call("1", command.description),
+            mocker.call("10", command.description),
+        ]
+    )
+
+
+def test_page_panel_cached(mocker: MockerFixture):
+    mock_rich_table = mocker.patch("rich.table.Table")
+
+    page = Page(description="description")
+    panel_1 = page.panel()
+    panel_2 = page.panel()
+
+    assert panel_1 is panel_2
+    mock_rich_table.assert_called_once()
+
+
+def test_page_panel_invalidated_on_mutation(mocker: MockerFixture):
+    page = Page(description="description")
+    panel_1 = page.panel()
+    page.command(NativeFunction, "test description")(mocker.MagicMock())
+    panel_2 = page.panel()
+    page.add_page(Page(description="nested"))
+    panel_3 = page.panel()
+
+    assert panel_1 is not panel_2
+    assert panel_2 is not panel_3
+    assert isinstance(panel_3.renderable, Table)
+    assert panel_3.renderable.row_count == 2
+    assert page.version == 2
+
+
+def test_page_panel_window(mocker: MockerFixture):
+    page = Page(description="description")
+    for index in range(10):
+        page.command(NativeFunction, f"command {index}")(mocker.MagicMock())
+    panel_1 = page.panel(window=(4, 3))
+    panel_2 = page.panel(window=(4, 3))
+    panel_3 = page.panel(window=(7, 3))
+
+    assert panel_1 is panel_2
+    assert panel_2 is not panel_3
+    assert isinstance(panel_1.renderable, Table)
+    assert isinstance(panel_3.renderable, Table)
+    assert list(panel_1.renderable.columns[0].cells) == ["5", "6", "7"]
+    assert list(panel_3.renderable.columns[0].cells) == ["8", "9", "10"]
+    assert panel_1.renderable.columns[1].no_wrap == True
+
+
+def test_page_panel_hot(mocker: MockerFixture):
+    mock_rich_table = mocker.patch("rich.table.Table")
+    spy_rich_table_add_row = mocker.spy(mock_rich_table.return_value, "add_row")
+
+    command = Command(description="description", callback=mocker.MagicMock())
+    page = Page(description="description")
+    mocker.patch.object(page, "_commands", {"1": command, "2": command, "3": command})
+    panel_1 = page.panel(hot=["3", "4"], reorder=True)
+    panel_2 = page.panel(hot=["3"], reorder=True)
+    panel_3 = page.panel(hot=["3"])
+
+    assert panel_1 is panel_2
+    assert panel_2 is not panel_3
+    assert spy_rich_table_add_row.call_args_list[:3] == [
+        mocker.call("3", command.description, style="bold"),
+        mocker.call("1", command.description),
+        mocker.call("2", command.description),
+    ]
+    assert spy_rich_table_add_row.call_args_list[3:] == [
+        mocker.call("1", command.description),
+        mocker.call("2", command.description),
+        mocker.call("3", command.description, style="bold"),
+    ]
+
+
+def test_page_command_options(mocker: MockerFixture):
+    page = Page(description="description")
+    decorator = page.command(Subprocess, "test description", stream=True, timeout=1.0)
+    decorator(mocker.MagicMock())
+
+    command = page.commands["1"]
+    assert isinstance(command, Command)
+    assert isinstance(command.callback, Subprocess)
+    assert command.callback.stream == True
+    assert command.callback.timeout == 1.0
+
+
+def test_page_command_arguments(mocker: MockerFixture):
+    page = Page(description="description")
+    page.command(Subprocess, "test description", arguments=[["prod", "staging"]])(mocker.MagicMock())
+    page.command(Subprocess, "test description")(mocker.MagicMock())
+
+    command_1 = page.commands["1"]
+    command_2 = page.commands["2"]
+    assert isinstance(command_1, Command)
+    assert isinstance(command_2, Command)
+    assert command_1.arguments == [["prod", "staging"]]
+    assert command_2.arguments == []
+
+
+def test_page_command_background(mocker: MockerFixture):
+    page = Page(description="description")
+    decorator = page.command(NativeFunction, "test description", background=True)
+    decorator(mocker.MagicMock())
+
+    command = page.commands["1"]
+    assert isinstance(command, Command)
+    assert command.background == True
+
+
+def test_page_command_fanout(mocker: MockerFixture):
+    page = Page(description="description")
+    decorator = page.command(Subprocess, "test description", targets=["a", "b"], concurrency=2, timeout=1.0)
+    decorator(mocker.MagicMock())
+
+    command = page.commands["1"]
+    assert isinstance(command, Command)
+    assert isinstance(command.callback, FanOut)
+    assert command.callback.targets() == ["a", "b"]
+    assert command.callback.concurrency == 2
+    assert isinstance(command.callback.callback, Subprocess)
+    assert command.callback.callback.timeout == 1.0
+
+
+def test_page_command_fanout_without_targets(mocker: MockerFixture):
+    page = Page(description="description")
+
+    try:
+        page.command(Subprocess, "test description", concurrency=2)
+    except ValueError as e:
+        assert str(e) == "fan-out options require targets"
+
+
+def test_page_add_workflow(mocker: MockerFixture):
+    page = Page(description="description")
+    page.command(Subprocess, "build", alias="build")(mocker.MagicMock())
+    page.command(NativeFunction, "test")(mocker.MagicMock())
+    page.add_workflow(
+        description="release",
+        steps=[Step(name="build", command="build"), Step(name="test", command="2", after=["build"])],
+        policy="stop",
+    )
+
+    command = page.commands["3"]
+    assert isinstance(command, Command)
+    assert isinstance(command.callback, Workflow)
+    assert [step.command for step in command.callback.steps] == [page.commands["1"], page.commands["2"]]
+    assert command.callback.policy == "stop"
+
+
+def test_page_add_workflow_unknown_command(mocker: MockerFixture):
+    page = Page(description="description")
+
+    try:
+        page.add_workflow(description="release", steps=[Step(name="build", command="build")])
+    except ValueError as e:
+        assert str(e) == "unknown command: build"
+
+
+def test_page_command_cache(mocker: MockerFixture):
+    page = Page(description="description")
+    page.command(NativeFunction, "test description", cache=60)(mocker.MagicMock())
+
+    command = page.commands["1"]
+    assert isinstance(command, Command)
+    assert isinstance(command.callback, NativeFunction)
+    assert command.callback.ttl == 60.0
+
+
+def test_page_command_cache_subprocess(mocker: MockerFixture):
+    page = Page(description="description")
+
+    try:
+        page.command(Subprocess, "test description", cache=True)
+        assert False
+    except ValueError as e:
+        assert str(e) == "only native functions can be cached"
+
+
+def test_command_alias(mocker: MockerFixture):
+    command = Command(description="description", callback=mocker.MagicMock(), alias="alias")
+
+    assert command.alias == "alias"
+
+
+def test_command_invalid_alias(mocker: MockerFixture):
+    for alias in ["", "a/b", "a.b", "1", "e", "w"]:
+        try:
+            Command(description="description", callback=mocker.MagicMock(), alias=alias)
+            assert False
+        except ValueError as e:
+            assert str(e) == f"invalid alias: {alias}"
+
+
+def test_page_alias():
+    page = Page(description="description", alias="alias")
+
+    assert page.alias == "alias"
+
+
+def test_page_reserved_alias():
+    for alias in RESERVED_NAMES:
+        try:
+            Page(description="description", alias=alias)
+            assert False
+        except ValueError as e:
+            assert str(e) == f"invalid alias: {alias}"
+
+
+def test_page_add_command(mocker: MockerFixture):
+    page = Page(description="description")
+    mock_observer = mocker.MagicMock()
+    page.observe(mock_observer)
+    page.observe(mock_observer)
+    command = Command(description="description", callback=mocker.MagicMock())
+    page.add_command(command=command)
+
+    assert page.commands["1"] == command
+    assert page.index == 2
+    mock_observer.assert_called_once_with(page, "1")
+
+
+def test_page_command_alias(mocker: MockerFixture):
+    page = Page(description="description")
+    page.command(NativeFunction, "test description", alias="alias")(mocker.MagicMock())
+
+    command = page.commands["1"]
+    assert isinstance(command, Command)
+    assert command.alias == "alias"
+
+
+def test_page_add_lazy_page(mocker: MockerFixture):
+    source = Page(description="source")
+    command = Command(description="description", callback=mocker.MagicMock())
+    source.add_command(command=command)
+    mock_loader = mocker.MagicMock(return_value=source)
+    page = Page(description="description")
+    page.add_lazy_page("lazy", mock_loader)
+
+    lazy_page = page.commands["1"]
+    assert isinstance(lazy_page, LazyPage)
+    assert not lazy_page.loaded
+    assert lazy_page.commands == {}
+    mock_loader.assert_not_called()
+
+    lazy_page.load()
+    lazy_page.load()
+
+    mock_loader.assert_called_once_with()
+    assert lazy_page.loaded
+    assert lazy_page.commands["1"] == command
+
+
+def test_lazy_page_module_loader():
+    lazy_page = LazyPage(description="lazy", loader="example:page")
+    lazy_page.load()
+
+    assert lazy_page.loaded
+    assert len(lazy_page.commands) > 0
+
+
+def test_lazy_page_invalid_loader():
+    try:
+        LazyPage(description="lazy", loader="example.page")
+        assert False
+    except ValueError as e:
+        assert str(e) == "invalid loader: example.page"
+
+
+def test_lazy_page_load_failure(mocker: MockerFixture):
+    lazy_page = LazyPage(description="lazy", loader=mocker.MagicMock(return_value=None))
+
+    try:
+        lazy_page.load()
+        assert False
+    except Exception as e:
+        assert str(e) == "failed to load page lazy: loader did not return a page: lazy"
+    assert not lazy_page.loaded
+
+
+def resources(*names: str) -> Page:
+    page = Page(description="resources")
+    for name in names:
+        page.command(Subprocess, name)(lambda *args, name=name: f"echo {name}")
+    return page
+
+
+def wait(page: DynamicPage, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while page.refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_page_add_dynamic_page(mocker: MockerFixture):
+    mock_provider = mocker.MagicMock(return_value=resources("a", "b"))
+    page = Page(description="description")
+    page.add_dynamic_page("dynamic", mock_provider, ttl=60)
+
+    dynamic_page = page.commands["1"]
+    assert isinstance(dynamic_page, DynamicPage)
+    assert dynamic_page.ttl == 60
+    assert dynamic_page.stale
+    mock_provider.assert_not_called()
+
+    dynamic_page.load()
+    wait(dynamic_page)
+    # opening the page only starts the provider, whose commands are applied on the next load
+    assert not dynamic_page.loaded
+    dynamic_page.load()
+
+    mock_provider.assert_called_once_with()
+    assert dynamic_page.loaded
+    assert not dynamic_page.stale
+    assert not dynamic_page.refreshing
+    assert [command.description for command in dynamic_page.commands.values()] == ["a", "b"]
+
+
+def test_dynamic_page_refresh(mocker: MockerFixture):
+    release = threading.Event()
+    mock_provider = mocker.MagicMock(side_effect=[resources("a"), resources("b", "c")])
+
+    def provider() -> Page:
+        if mock_provider.call_count == 1:
+            release.wait(timeout=5.0)
+        return mock_provider()
+
+    dynamic_page = DynamicPage(description="dynamic", provider=provider, ttl=0)
+    dynamic_page.load(wait=True)
+    version = dynamic_page.version
+    dynamic_page.refresh()
+
+    # the stale commands stay in place while the provider runs
+    assert dynamic_page.refreshing
+    assert [command.description for command in dynamic_page.commands.values()] == ["a"]
+    release.set()
+    wait(dynamic_page)
+    assert [command.description for command in dynamic_page.commands.values()] == ["a"]
+
+    dynamic_page.refresh()
+    wait(dynamic_page)
+
+    assert [command.description for command in dynamic_page.commands.values()] == ["b", "c"]
+    assert dynamic_page.version > version
+    assert dynamic_page.index == 3
+
+
+def test_dynamic_page_refresh_failure(mocker: MockerFixture):
+    mock_provider = mocker.MagicMock(side_effect=[resources("a"), Exception("unavailable")])
+    dynamic_page = DynamicPage(description="dynamic", provider=mock_provider, ttl=0)
+    dynamic_page.load(wait=True)
+    dynamic_page.refresh()
+    wait(dynamic_page)
+
+    try:
+        dynamic_page.refresh()
+        assert False
+    except Exception as e:
+        assert str(e) == "failed to refresh page dynamic: unavailable"
+    assert [command.description for command in dynamic_page.commands.values()] == ["a"]
+
+
+def test_dynamic_page_load_failure(mocker: MockerFixture):
+    dynamic_page = DynamicPage(description="dynamic", provider=mocker.MagicMock(side_effect=Exception("unavailable")))
+    dynamic_page.load()
+    wait(dynamic_page)
+
+    try:
+        dynamic_page.load()
+        assert False
+    except Exception as e:
+        assert str(e) == "failed to load page dynamic: unavailable"
+    assert not dynamic_page.loaded
+    try:
+        dynamic_page.load(wait=True)
+        assert False
+    except Exception as e:
+        assert str(e) == "failed to load page dynamic: unavailable"
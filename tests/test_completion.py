@@ -0,0 +1,105 @@
+from pytest_mock import MockerFixture
+from repli.callback import NativeFunction
+from repli.command import DynamicPage, Page
+from repli.completion import Completer, Trie
+from repli.index import Index
+
+
+def build() -> Page:
+    root = Page(description="root")
+    deploy = Page(description="deploy", alias="deploy")
+    root.add_page(deploy)
+    for index in range(12):
+        deploy.command(NativeFunction, f"command {index}")(lambda: None)
+    deploy.command(NativeFunction, "rollback", alias="rollback", arguments=[["prod", "preview", "staging"]])(lambda: None)
+    return root
+
+
+def test_trie_complete():
+    trie = Trie(words=["1", "10", "11", "2", "1"])
+
+    assert len(trie) == 4
+    assert trie.complete("1") == ["1", "10", "11"]
+    assert trie.complete("") == ["1", "10", "11", "2"]
+    assert trie.complete("3") == []
+
+
+def test_trie_complete_separators():
+    trie = Trie(words=["1", "1.1", "1.1.1", "1.2", "a", "a/b", "a/b/c"])
+
+    assert trie.complete("1", separators="./") == ["1"]
+    assert trie.complete("1.", separators="./") == ["1.1", "1.2"]
+    assert trie.complete("a/", separators="./") == ["a/b"]
+
+
+def test_completer_matches():
+    root = build()
+    completer = Completer(index=Index(root=root), builtins=["e", "q", "/"])
+
+    assert completer.matches(page=root, words=[], text="") == ["/", "1", "deploy", "e", "q"]
+    assert completer.matches(page=root, words=[], text="1.1") == ["1.1", "1.10", "1.11", "1.12", "1.13"]
+    assert len(completer.matches(page=root, words=[], text="deploy/")) == 13
+    assert completer.matches(page=root, words=[], text="deploy/r") == ["deploy/rollback"]
+    deploy = root.commands["1"]
+    assert isinstance(deploy, Page)
+    assert completer.matches(page=deploy, words=[], text="1") == ["1", "10", "11", "12", "13"]
+
+
+def test_completer_matches_arguments():
+    root = build()
+    completer = Completer(index=Index(root=root), builtins=["e"])
+    deploy = root.commands["1"]
+    assert isinstance(deploy, Page)
+
+    assert completer.matches(page=deploy, words=["13"], text="pr") == ["preview", "prod"]
+    assert completer.matches(page=root, words=["deploy/rollback"], text="s") == ["staging"]
+    assert completer.matches(page=root, words=["deploy/rollback", "prod"], text="") == []
+    assert completer.matches(page=deploy, words=["1"], text="") == []
+    assert completer.matches(page=root, words=["1"], text="") == []
+    assert completer.matches(page=root, words=["unknown"], text="") == []
+
+
+def test_completer_incremental(mocker: MockerFixture):
+    root = build()
+    completer = Completer(index=Index(root=root), builtins=[])
+    completer.matches(page=root, words=[], text="")
+    spy_trie_init = mocker.spy(Trie, "__init__")
+
+    root.command(NativeFunction, "new command")(lambda: None)
+    nested = Page(description="nested")
+    root.add_page(nested)
+    nested.command(NativeFunction, "nested command")(lambda: None)
+
+    assert completer.matches(page=root, words=[], text="") == ["1", "2", "3", "deploy"]
+    assert completer.matches(page=root, words=[], text="3.") == ["3.1"]
+    spy_trie_init.assert_not_called()
+
+
+def test_completer_dynamic_page(mocker: MockerFixture):
+    sources = []
+    for size in [3, 12]:
+        source = Page(description="source")
+        for index in range(size):
+            source.command(NativeFunction, f"command {index}")(lambda: None)
+        sources.append(source)
+    page = DynamicPage(description="dynamic", provider=mocker.MagicMock(side_effect=sources))
+    completer = Completer(index=Index(root=Page(description="root")), builtins=[])
+
+    page.load(wait=True)
+    assert completer.matches(page=page, words=[], text="1") == ["1"]
+    page.apply(source=sources[1])
+
+    assert completer.matches(page=page, words=[], text="1") == ["1", "10", "11", "12"]
+
+
+def test_completer_replaced_pages():
+    completer = Completer(index=Index(root=Page(description="root")), builtins=[])
+
+    # pages made and dropped one after another are often given the same id
+    for size in range(1, 20):
+        page = Page(description="source")
+        for index in range(size):
+            page.command(NativeFunction, f"command {index}", arguments=[[f"value{size}"]])(lambda: None)
+        assert completer.matches(page=page, words=[], text="") == sorted(page.commands)
+        assert completer.matches(page=page, words=["1"], text="") == [f"value{size}"]
+        del page
@@ -18,3 +18,18 @@ def test_console_error(mocker: MockerFixture):
     console.error("message")
 
     mock_console_print.assert_called_with("error: message", style="yellow", markup=False)
+
+
+def test_console_configure():
+    console = Console()
+    width, color_system = console.width, console._color_system
+
+    try:
+        console.configure(width=80, color_system="256")
+
+        assert Console._instance is console
+        assert console.width == 80
+        assert console.color_system == "256"
+    finally:
+        console.width = width
+        console._color_system = color_system
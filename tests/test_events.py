@@ -0,0 +1,86 @@
+import json
+import threading
+from pytest_mock import MockerFixture
+from repli.events import EventLog, files, main, read, summarize
+
+
+def test_event_log_emit(tmp_path):
+    log = EventLog(path=str(tmp_path / "events.jsonl"), interval=60)
+    log.emit("start", path="1", args=["arg"])
+    log.emit("finish", path="1", duration=0.5)
+
+    assert not (tmp_path / "events.jsonl").exists()
+    log.close()
+    log.emit("start", path="2")
+    log.close()
+
+    records = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert [record["event"] for record in records] == ["start", "finish"]
+    assert records[0]["args"] == ["arg"]
+    assert records[1]["duration"] == 0.5
+    assert "time" in records[0]
+
+
+def test_event_log_background_flush(tmp_path, mocker: MockerFixture):
+    flushed = threading.Event()
+    log = EventLog(path=str(tmp_path / "events.jsonl"), interval=0.01)
+    flush = log.flush
+
+    def spy() -> None:
+        flush()
+        if (tmp_path / "events.jsonl").exists():
+            flushed.set()
+
+    mocker.patch.object(log, "flush", side_effect=spy)
+    log.emit("start", path="1")
+
+    assert flushed.wait(timeout=5)
+    log.close()
+
+
+def test_event_log_rotate(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    log = EventLog(path=path, max_bytes=100, backups=2, interval=60)
+    for index in range(5):
+        log.emit("finish", path=str(index), padding="x" * 40)
+        log.flush()
+    log.close()
+
+    assert files(path) == [f"{path}.2", f"{path}.1", path]
+    assert [record["path"] for record in read(path)] == ["2", "3", "4"]
+
+
+def test_read_skips_partial_lines(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"event": "start"}\n{"event": "fin')
+
+    assert list(read(str(path))) == [{"event": "start"}]
+
+
+def test_summarize():
+    records = [
+        {"event": "start", "path": "1"},
+        {"event": "finish", "path": "1", "description": "one", "duration": 1.0, "returncode": 0},
+        {"event": "finish", "path": "1", "description": "one", "duration": 3.0, "returncode": 1},
+        {"event": "finish", "path": "2", "description": "two", "duration": 2.0, "returncode": None},
+    ]
+    summaries = summarize(records)
+
+    assert [(summary.path, summary.count, summary.failures, summary.max) for summary in summaries] == [
+        ("1", 2, 1, 3.0),
+        ("2", 1, 0, 2.0),
+    ]
+    assert summaries[0].p50 == 1.0
+    assert summaries[0].description == "one"
+
+
+def test_main(tmp_path, mocker: MockerFixture):
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"event": "finish", "path": "1", "description": "one", "duration": 1.0, "returncode": 0}\n')
+
+    assert main([str(path)]) == 0
+    assert mock_console_print.call_count == 2
+    assert main([str(tmp_path / "missing.jsonl")]) == 1
+    mock_console_error.assert_called_once_with(f"no commands found in {tmp_path / 'missing.jsonl'}")
@@ -0,0 +1,208 @@
+import io
+import sys
+import threading
+from pytest import MonkeyPatch
+from pytest_mock import MockerFixture
+from repli.callback import Builtin, NativeFunction, Subprocess
+from repli.fanout import FanOut, Target
+
+
+def test_target():
+    target = Target(name="name")
+
+    assert target.name == "name"
+    assert target.status == "pending"
+    assert target.duration is None
+    target.start()
+    assert target.status == "running"
+    target.finish(returncode=1, output="output")
+    assert target.status == "failed"
+    assert target.returncode == 1
+    assert target.output == "output"
+    assert target.duration is not None
+    target.skip()
+    assert target.status == "skipped"
+
+
+def test_fanout_init(mocker: MockerFixture):
+    callback = NativeFunction(callable=mocker.MagicMock())
+    fanout = FanOut(callback=callback, targets=["a", "b"], concurrency=2, fail_fast=True, ordered=False)
+
+    assert fanout.callback == callback
+    assert fanout.targets() == ["a", "b"]
+    assert fanout.concurrency == 2
+    assert fanout.fail_fast == True
+    assert fanout.ordered == False
+
+
+def test_fanout_init_invalid_callback(mocker: MockerFixture):
+    try:
+        FanOut(callback=Builtin(callable=mocker.MagicMock()), targets=["a"])
+    except ValueError as e:
+        assert str(e) == "invalid callback type"
+
+
+def test_fanout_targets_callable(mocker: MockerFixture):
+    mock_targets = mocker.MagicMock(return_value=["a", "b"])
+    fanout = FanOut(callback=NativeFunction(callable=mocker.MagicMock()), targets=mock_targets)
+
+    assert fanout.targets() == ["a", "b"]
+    mock_targets.assert_called_once_with()
+
+
+def test_fanout_dispatch_native_function(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mock_callable = mocker.MagicMock(side_effect=lambda target, arg: print(f"{target} {arg}"))
+    fanout = FanOut(callback=NativeFunction(callable=mock_callable), targets=["a"])
+    target = Target(name="a")
+
+    fanout.dispatch(target, "arg1")
+
+    mock_callable.assert_called_once_with("a", "arg1")
+    assert target.status == "ok"
+    assert target.output == "a arg1\n"
+
+
+def test_fanout_dispatch_native_function_exception(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mock_callable = mocker.MagicMock(side_effect=Exception("test"))
+    fanout = FanOut(callback=NativeFunction(callable=mock_callable), targets=["a"])
+    target = Target(name="a")
+
+    fanout.dispatch(target)
+
+    assert target.status == "failed"
+    assert target.returncode == 1
+    assert target.output == "native function raised an exception: test\n"
+
+
+def test_fanout_dispatch_subprocess(mocker: MockerFixture):
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "print(1); raise SystemExit(2)"')
+    fanout = FanOut(callback=Subprocess(callable=mock_callable), targets=["a"])
+    target = Target(name="a")
+
+    fanout.dispatch(target, "arg1")
+
+    mock_callable.assert_called_once_with("a", "arg1")
+    assert target.status == "failed"
+    assert target.returncode == 2
+    assert target.output == "1\n"
+
+
+def test_fanout_dispatch_subprocess_template_exception(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    mock_callable = mocker.MagicMock(side_effect=Exception("missing arguments for: ping {1}"))
+    fanout = FanOut(callback=Subprocess(callable=mock_callable), targets=["a"])
+    target = Target(name="a")
+
+    fanout.dispatch(target)
+    result, returncode = fanout.invoke()
+
+    assert target.status == "failed"
+    assert target.returncode == -1
+    assert target.output == "subprocess raised an exception: missing arguments for: ping {1}\n"
+    output = "subprocess raised an exception: missing arguments for: ping {1}"
+    mock_console_out.assert_called_once_with(output, highlight=False)
+    mock_console_error.assert_called_once_with("1 of 1 targets did not succeed")
+    assert returncode == 1
+    assert result == False
+
+
+def test_fanout_dispatch_subprocess_timeout(mocker: MockerFixture):
+    mock_callable = mocker.MagicMock(return_value=f'{sys.executable} -c "import time; time.sleep(10)"')
+    fanout = FanOut(callback=Subprocess(callable=mock_callable, timeout=0.1), targets=["a"])
+    target = Target(name="a")
+
+    fanout.dispatch(target)
+
+    assert target.status == "failed"
+    assert target.output == "subprocess timed out after 0.1 seconds\n"
+
+
+def test_fanout_dispatch_subprocess_pooled(mocker: MockerFixture):
+    mock_callable = mocker.MagicMock(return_value="sh -c 'echo $0; exit 2'")
+    fanout = FanOut(callback=Subprocess(callable=mock_callable, pooled=True), targets=["a"])
+    target = Target(name="a")
+
+    fanout.dispatch(target)
+
+    assert target.status == "failed"
+    assert target.returncode == 2
+    assert target.output == "sh\n"
+
+
+def test_fanout_call(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mocker.patch("repli.callback.Callback.__call__")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    mock_callable = mocker.MagicMock(side_effect=lambda target: print(target))
+
+    fanout = FanOut(callback=NativeFunction(callable=mock_callable), targets=["a", "b", "c"], concurrency=2)
+    result = fanout()
+
+    assert mock_callable.call_count == 3
+    mock_console_out.assert_has_calls(
+        [
+            mocker.call("a", highlight=False),
+            mocker.call("b", highlight=False),
+            mocker.call("c", highlight=False),
+        ]
+    )
+    mock_console_info.assert_has_calls(
+        [
+            mocker.call("running on 3 targets with concurrency 2"),
+            mocker.call("all 3 targets succeeded"),
+        ]
+    )
+    mock_console_error.assert_not_called()
+    assert result == False
+
+
+def test_fanout_call_ordered(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.info")
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    released = threading.Event()
+
+    def callable(target: str) -> None:
+        # the first target finishes last
+        if target == "a":
+            released.wait(timeout=5)
+        else:
+            released.set()
+        print(target)
+
+    fanout = FanOut(callback=NativeFunction(callable=mocker.MagicMock(side_effect=callable)), targets=["a", "b"])
+    fanout()
+
+    assert mock_console_out.call_args_list == [
+        mocker.call("a", highlight=False),
+        mocker.call("b", highlight=False),
+    ]
+
+
+def test_fanout_call_fail_fast(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.out")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.MagicMock(side_effect=Exception("test"))
+
+    fanout = FanOut(callback=NativeFunction(callable=mock_callable), targets=["a", "b", "c"], concurrency=1, fail_fast=True)
+    fanout()
+
+    assert mock_callable.call_args_list[0] == mocker.call("a")
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("target a failed, cancelling remaining targets"),
+            mocker.call("3 of 3 targets did not succeed"),
+        ]
+    )
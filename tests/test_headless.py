@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+from typing import Optional
+
+
+def python(*args: str, input: Optional[str] = None) -> subprocess.CompletedProcess:
+    root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run(
+        args=[sys.executable, *args],
+        input=input,
+        capture_output=True,
+        text=True,
+        cwd=root,
+        env={**os.environ, "PYTHONPATH": root},
+    )
+
+
+def test_import_does_not_load_rich():
+    process = python("-c", "import sys, repli; print('\\n'.join(sys.modules))")
+
+    assert process.returncode == 0
+    assert [module for module in process.stdout.split() if module.split(".")[0] in ["rich", "readline"]] == []
+
+
+def test_import_interpreter_is_lazy():
+    # the interface's dependencies are only imported when they are first used, which keeps
+    # startup fast without measuring it. benchmarks.suite times the imports themselves
+    process = python("-c", "import sys, repli.interpreter; print('\\n'.join(sys.modules))")
+    modules = process.stdout.split()
+
+    assert process.returncode == 0, process.stderr
+    assert "repli.interpreter" in modules
+    assert [module for module in modules if module.split(".")[0] in ["rich", "readline"]] == []
+    assert [module for module in modules if module.startswith("concurrent.futures")] == []
+
+
+def test_headless_script():
+    script = "\n".join(
+        [
+            "import sys",
+            "from repli.headless import Interpreter, NativeFunction, Page",
+            "page = Page('home')",
+            "page.command(NativeFunction, 'print hello world')(lambda: print('hello world'))",
+            "returncode = Interpreter(page).main(argv=['--script', '-'])",
+            "assert not [module for module in sys.modules if module.split('.')[0] == 'rich']",
+            "sys.exit(returncode)",
+        ]
+    )
+    process = python("-c", script, input="1\n")
+
+    assert process.returncode == 0, process.stderr
+    assert process.stdout.startswith("hello world\ninfo: 1: exited with code 0 in ")
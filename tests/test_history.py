@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from pytest_mock import MockerFixture
+from repli.history import HALF_LIFE, History, Stat, directory, rewrite
+
+
+def test_directory(mocker: MockerFixture):
+    mocker.patch.dict(os.environ, {"XDG_STATE_HOME": "/state"})
+
+    assert directory() == os.path.join("/state", "repli")
+
+
+def test_history_path(mocker: MockerFixture):
+    mocker.patch.dict(os.environ, {"XDG_STATE_HOME": "/state"})
+    history = History(name="my app/🐟")
+
+    assert history.path == os.path.join("/state", "repli", "my%20app%2F%F0%9F%90%9F.history")
+    assert history.index_path == f"{history.path}.index"
+
+
+def test_stat_score():
+    stat = Stat()
+    stat.hit(timestamp=100.0)
+    stat.hit(timestamp=50.0)
+
+    assert stat.count == 2
+    assert stat.last == 100.0
+    assert stat.score(now=100.0) == 2.0
+    assert stat.score(now=100.0 + HALF_LIFE) == 1.0
+
+
+def test_history_append(tmp_path):
+    history = History(name="name", path=str(tmp_path / "name.history"))
+    history.append(line="1 a", path="1")
+    history.append(line="  ")
+    history.append(line="q")
+    history.append(line="1 b", path="1")
+
+    assert history.entries == 3
+    assert history.offset == os.path.getsize(history.path)
+    assert history.stats["1"].count == 2
+    assert history.tail() == ["1 a", "q", "1 b"]
+    assert history.tail(count=2) == ["q", "1 b"]
+
+
+def test_history_update_from_other_session(tmp_path):
+    path = str(tmp_path / "name.history")
+    history_1 = History(name="name", path=path)
+    history_2 = History(name="name", path=path)
+    history_1.append(line="1", path="1")
+    history_2.append(line="2", path="2")
+    history_1.append(line="1", path="1")
+
+    assert history_1.entries == 3
+    assert history_1.stats["1"].count == 2
+    assert history_1.stats["2"].count == 1
+
+
+def test_history_stats_lazy(tmp_path, mocker: MockerFixture):
+    history = History(name="name", path=str(tmp_path / "name.history"))
+    history.append(line="1", path="1")
+
+    reloaded = History(name="name", path=history.path)
+    spy_update = mocker.spy(reloaded, "update")
+    assert spy_update.call_count == 0
+    assert reloaded.stats["1"].count == 1
+    assert reloaded.stats["1"].count == 1
+    spy_update.assert_called_once()
+
+
+def test_history_index_rebuilt(tmp_path):
+    history = History(name="name", path=str(tmp_path / "name.history"))
+    history.append(line="1", path="1")
+    with open(history.index_path, "w", encoding="utf-8") as file:
+        file.write("not json")
+
+    reloaded = History(name="name", path=history.path)
+    assert reloaded.entries == 1
+    assert reloaded.stats["1"].count == 1
+
+
+def test_history_compact(tmp_path):
+    history = History(name="name", path=str(tmp_path / "name.history"), max_entries=8)
+    for index in range(9):
+        history.append(line=f"line {index}", path="1")
+
+    assert history.entries == 6
+    assert history.tail(count=10) == [f"line {index}" for index in range(3, 9)]
+    assert history.stats["1"].count == 9
+    assert history.offset == os.path.getsize(history.path)
+
+
+def test_rewrite_concurrent(tmp_path):
+    path = str(tmp_path / "name.history")
+    datas = [f"line {index}\n".encode("utf-8") * 1000 for index in range(8)]
+    threads = [threading.Thread(target=rewrite, args=(path, data)) for data in datas]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(path, "rb") as file:
+        assert file.read() in datas
+    assert os.listdir(tmp_path) == ["name.history"]
+
+
+def test_rewrite_failed(tmp_path, mocker: MockerFixture):
+    path = str(tmp_path / "name.history")
+    mocker.patch("os.replace", side_effect=OSError("test"))
+
+    try:
+        rewrite(path=path, data=b"line\n")
+        assert False
+    except OSError as e:
+        assert str(e) == "test"
+    assert os.listdir(tmp_path) == []
+
+
+def test_history_hot(tmp_path):
+    history = History(name="name", path=str(tmp_path / "name.history"))
+    history.append(line="1", path="a")
+    history.append(line="2", path="b")
+    history.append(line="2", path="b")
+
+    assert history.hot(paths={"1": "a", "2": "b", "3": "c"}) == ["2", "1"]
+    assert history.hot(paths={"1": "a", "2": "b"}, count=1) == ["2"]
+    assert history.score(path="c") == 0.0
+
+
+def test_history_restore(tmp_path, mocker: MockerFixture):
+    mock_readline_add_history = mocker.patch("readline.add_history")
+    mocker.patch("readline.clear_history")
+    mocker.patch("readline.set_history_length")
+    history = History(name="name", path=str(tmp_path / "name.history"), length=2)
+    history.append(line="1")
+    history.append(line="2")
+    history.append(line="3")
+    history.restore()
+    history.restore()
+
+    assert mock_readline_add_history.call_args_list == [mocker.call("2"), mocker.call("3")]
+
+
+def test_history_load_large(tmp_path):
+    path = str(tmp_path / "name.history")
+    with open(path, "w", encoding="utf-8") as file:
+        for index in range(100_000):
+            file.write(f"{1700000000 + index}.000\t1.{index % 50}\t1.{index % 50} argument\n")
+    History(name="name", path=path).update()
+
+    start = time.perf_counter()
+    history = History(name="name", path=path)
+    lines = history.tail()
+    stats = history.stats
+    elapsed = time.perf_counter() - start
+
+    assert len(lines) == 1000
+    assert len(stats) == 50
+    assert history.entries == 100_000
+    # the index spares reading the whole log again
+    assert elapsed < 0.05
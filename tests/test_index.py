@@ -0,0 +1,125 @@
+from pytest_mock import MockerFixture
+from repli.callback import NativeFunction
+from repli.command import Command, Page
+from repli.index import Index
+
+
+def build() -> Page:
+    root = Page(description="root")
+    deploy = Page(description="deploy", alias="deploy")
+    prod = Page(description="prod", alias="prod")
+    root.add_page(Page(description="other"))
+    root.add_page(deploy)
+    deploy.add_page(prod)
+    prod.command(NativeFunction, "rollback", alias="rollback")(lambda: None)
+    prod.command(NativeFunction, "status")(lambda: None)
+    return root
+
+
+def test_index_paths():
+    root = build()
+    index = Index(root=root)
+
+    deploy = root.commands["2"]
+    assert isinstance(deploy, Page)
+    prod = deploy.commands["1"]
+    assert isinstance(prod, Page)
+    rollback = prod.commands["1"]
+    assert isinstance(rollback, Command)
+
+    assert set(index.entries) == {
+        "1",
+        "2",
+        "2.1",
+        "2.1.1",
+        "2.1.2",
+        "deploy",
+        "deploy/prod",
+        "deploy/prod/rollback",
+        "deploy/prod/2",
+    }
+    entry = index.get("2.1.1")
+    assert entry is not None
+    assert entry.node == rollback
+    assert entry.pages == [root, deploy, prod]
+    assert entry.path == "2.1.1"
+    assert index.get("deploy/prod/rollback") == entry
+    assert index.get("3") is None
+
+
+def test_index_incremental(mocker: MockerFixture):
+    root = build()
+    index = Index(root=root)
+    spy_index_add_page = mocker.spy(index, "add_page")
+
+    deploy = root.commands["2"]
+    assert isinstance(deploy, Page)
+    staging = Page(description="staging", alias="staging")
+    deploy.add_page(staging)
+    staging.command(NativeFunction, "restart", alias="restart")(lambda: None)
+
+    assert "2.2" in index
+    assert "2.2.1" in index
+    entry = index.get("deploy/staging/restart")
+    assert entry is not None
+    assert entry.pages == [root, deploy, staging]
+    spy_index_add_page.assert_called_once()
+
+
+def test_index_duplicate_alias():
+    root = build()
+    deploy = root.commands["2"]
+    assert isinstance(deploy, Page)
+    deploy.add_page(Page(description="production", alias="prod"))
+
+    try:
+        Index(root=root)
+        assert False
+    except ValueError as e:
+        assert str(e) == "duplicate path: deploy/prod is already 2.1"
+
+
+def test_index_duplicate_alias_incremental():
+    root = build()
+    index = Index(root=root)
+    prod = index.get("deploy/prod")
+    assert prod is not None and isinstance(prod.node, Page)
+
+    try:
+        prod.node.command(NativeFunction, "rollback again", alias="rollback")(lambda: None)
+        assert False
+    except ValueError as e:
+        assert str(e) == "duplicate path: deploy/prod/rollback is already 2.1.1"
+    assert index.get("deploy/prod/rollback") == index.get("2.1.1")
+    assert index.get("2.1.3") is None
+
+
+def test_index_cycle():
+    root = Page(description="root")
+    root.add_page(root)
+
+    index = Index(root=root)
+
+    assert set(index.entries) == {"1"}
+
+
+def test_index_path():
+    root = build()
+    index = Index(root=root)
+
+    deploy = root.commands["2"]
+    assert isinstance(deploy, Page)
+    prod = deploy.commands["1"]
+    assert isinstance(prod, Page)
+
+    assert index.path(prod.commands["1"]) == "2.1.1"
+    assert index.path(prod) == "2.1"
+    assert index.path(Page(description="other")) is None
+
+
+def test_index_entry_alias():
+    index = Index(root=build())
+
+    assert index.entries["2.1.1"].alias == "deploy/prod/rollback"
+    assert index.entries["2.1.2"].alias == "deploy/prod/2"
+    assert index.entries["1"].alias is None
@@ -1,13 +1,33 @@
+import asyncio
+import io
+import sys
+import threading
+import time
+from pytest import MonkeyPatch
 from pytest_mock import MockerFixture
-from repli.command import Command, Page
+from repli.cache import ResultCache
+from repli.callback import Builtin, NativeFunction
+from repli.command import Command, DynamicPage, Page
 from repli.interpreter import Interpreter
+from repli.renderer import Cached
+from repli.workflow import Step
 from rich import box
+from rich.console import Console as RichConsole, ConsoleDimensions, Group
+from rich.table import Table
 
 
 def test_interpreter_init(mocker: MockerFixture):
     mock_page = mocker.MagicMock()
     mock_command_exit = mocker.patch("repli.interpreter.Interpreter.command_exit")
     mock_command_quit = mocker.patch("repli.interpreter.Interpreter.command_quit")
+    mock_command_next = mocker.patch("repli.interpreter.Interpreter.command_next")
+    mock_command_previous = mocker.patch("repli.interpreter.Interpreter.command_previous")
+    mock_command_jobs = mocker.patch("repli.interpreter.Interpreter.command_jobs")
+    mock_command_cache = mocker.patch("repli.interpreter.Interpreter.command_cache")
+    mock_command_outputs = mocker.patch("repli.interpreter.Interpreter.command_outputs")
+    mock_command_metrics = mocker.patch("repli.interpreter.Interpreter.command_metrics")
+    mock_command_watch = mocker.patch("repli.interpreter.Interpreter.command_watch")
+    mock_command_search = mocker.patch("repli.interpreter.Interpreter.command_search")
 
     interpreter = Interpreter(page=mock_page, name="name", prompt="prompt")
 
@@ -18,9 +38,25 @@ def test_interpreter_init(mocker: MockerFixture):
     assert interpreter.builtins == {
         "e": mock_command_exit.return_value,
         "q": mock_command_quit.return_value,
+        "n": mock_command_next.return_value,
+        "p": mock_command_previous.return_value,
+        "j": mock_command_jobs.return_value,
+        "c": mock_command_cache.return_value,
+        "o": mock_command_outputs.return_value,
+        "m": mock_command_metrics.return_value,
+        "w": mock_command_watch.return_value,
+        "/": mock_command_search.return_value,
     }
     mock_command_exit.assert_called_once()
     mock_command_quit.assert_called_once()
+    mock_command_next.assert_called_once()
+    mock_command_previous.assert_called_once()
+    mock_command_jobs.assert_called_once()
+    mock_command_cache.assert_called_once()
+    mock_command_outputs.assert_called_once()
+    mock_command_metrics.assert_called_once()
+    mock_command_watch.assert_called_once()
+    mock_command_search.assert_called_once()
 
 
 def test_interpreter_command_exit(mocker: MockerFixture):
@@ -67,8 +103,489 @@ def test_interpreter_command_quit_root_page(mocker: MockerFixture):
         assert str(e) == "current page is root page"
 
 
+def test_interpreter_command_jobs(mocker: MockerFixture):
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    mock_console_input = mocker.patch("repli.console.Console.input")
+    mock_interpreter_jobs_table = mocker.patch("repli.interpreter.Interpreter.jobs_table")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    command = interpreter.command_jobs()
+    result = command.callback()
+
+    assert command.description == "jobs"
+    mock_console_print.assert_called_once_with(mock_interpreter_jobs_table.return_value)
+    mock_console_input.assert_called_once_with(prompt="press enter to continue")
+    assert result == False
+
+
+def test_interpreter_command_cache(mocker: MockerFixture):
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_console_input = mocker.patch("repli.console.Console.input")
+    mock_interpreter_cache_table = mocker.patch("repli.interpreter.Interpreter.cache_table")
+    mocker.patch("repli.interpreter.results", ResultCache(max_bytes=100))
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    command = interpreter.command_cache()
+    result = command.callback()
+
+    assert command.description == "cache"
+    mock_console_print.assert_called_once_with(mock_interpreter_cache_table.return_value)
+    mock_console_info.assert_called_once_with("0 cached results using 0 of 100 bytes")
+    mock_console_input.assert_called_once_with(prompt="press enter to continue")
+    assert result == False
+
+
+def test_interpreter_command_cache_flush(mocker: MockerFixture):
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.input")
+    results = ResultCache()
+    results.put(key=("name", ("1",), ()), output="1\n", ttl=60)
+    results.put(key=("name", ("2",), ()), output="2\n", ttl=60)
+    results.put(key=("name", ("3",), ()), output="3\n", ttl=60)
+    mocker.patch("repli.interpreter.results", results)
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    interpreter.command_cache().callback("flush", "2")
+
+    assert [record.key[1] for record in results.records] == [("1",), ("3",)]
+    interpreter.command_cache().callback("flush")
+
+    assert len(results) == 0
+    mock_console_info.assert_has_calls([mocker.call("flushed 1 cached results"), mocker.call("flushed 2 cached results")])
+
+
+def test_interpreter_command_cache_flush_not_found(mocker: MockerFixture):
+    mocker.patch("repli.interpreter.results", ResultCache())
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    try:
+        interpreter.command_cache().callback("flush", "1")
+        assert False
+    except Exception as e:
+        assert str(e) == "cached result not found: 1"
+
+
+def test_interpreter_cache_table(mocker: MockerFixture):
+    results = ResultCache()
+    results.put(key=("name", ("arg1",), (("key", "value"),)), output="output\n", ttl=60)
+    mocker.patch("repli.interpreter.results", results)
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    table = interpreter.cache_table()
+
+    assert table.row_count == 1
+    assert list(table.columns[2].cells) == ["arg1 key=value"]
+
+
+def test_interpreter_command_outputs(mocker: MockerFixture):
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    mock_console_input = mocker.patch("repli.console.Console.input")
+    mock_interpreter_outputs_table = mocker.patch("repli.interpreter.Interpreter.outputs_table")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    command = interpreter.command_outputs()
+    result = command.callback()
+
+    assert command.description == "outputs"
+    mock_console_print.assert_called_once_with(mock_interpreter_outputs_table.return_value)
+    mock_console_input.assert_called_once_with(prompt="press enter to continue")
+    assert result == False
+
+
+def test_interpreter_command_outputs_pager(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.input")
+    mock_interpreter_pager = mocker.patch("repli.interpreter.Interpreter.pager")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    capture = interpreter.captures.open(description="description", stream=None)
+    interpreter.command_outputs().callback("1")
+    interpreter.command_outputs().callback("1", "error", "one")
+
+    mock_interpreter_pager.assert_has_calls(
+        [
+            mocker.call(capture=capture, pattern=None),
+            mocker.call(capture=capture, pattern="error one"),
+        ]
+    )
+
+
+def test_interpreter_command_metrics(mocker: MockerFixture):
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_console_input = mocker.patch("repli.console.Console.input")
+    mock_interpreter_metrics_table = mocker.patch("repli.interpreter.Interpreter.metrics_table")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    command = interpreter.command_metrics()
+    result = command.callback()
+    command.callback("profile", "on")
+
+    assert command.description == "metrics"
+    assert interpreter.metrics.profiling == True
+    mock_console_print.assert_called_once_with(mock_interpreter_metrics_table.return_value)
+    mock_console_info.assert_has_calls([mocker.call("profiling is off"), mocker.call("profiling turned on")])
+    mock_console_input.assert_called_with(prompt="press enter to continue")
+    assert result == False
+
+
+def test_interpreter_command_metrics_export(mocker: MockerFixture, tmp_path):
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.input")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    interpreter.metrics.observe(kind="callback", path="1", duration=0.25)
+    command = interpreter.command_metrics()
+    command.callback("export", "prometheus")
+    command.callback("export", "json", str(tmp_path / "metrics.json"))
+
+    mock_console_out.assert_called_once_with(interpreter.metrics.export(format="prometheus"), highlight=False)
+    assert (tmp_path / "metrics.json").read_text() == interpreter.metrics.export(format="json")
+    try:
+        command.callback("export", "csv")
+        assert False
+    except Exception as e:
+        assert str(e) == "usage: m [profile on|off|<path> | export json|prometheus [file] | reset]"
+
+
+def test_interpreter_execute_hooks(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.input")
+    mock_before = mocker.MagicMock()
+    mock_after = mocker.MagicMock()
+
+    page = Page(description="description")
+    page.add_command(command=Command(description="description", callback=mocker.MagicMock(return_value=False)))
+    interpreter = Interpreter(page=page)
+    interpreter.hook("before_execute", mock_before)
+    interpreter.hook("after_execute", mock_after)
+    interpreter.execute(args=["1", "arg", "&"])
+    interpreter.execute(args=["1", "arg"])
+
+    mock_before.assert_called_with(["1", "arg"])
+    assert mock_after.call_count == 2
+    args, result, duration = mock_after.call_args.args
+    assert (args, result) == (["1", "arg"], False)
+    assert duration >= 0
+    series = interpreter.metrics.get(kind="callback", path="1")
+    assert series is not None
+    assert series.count == 1
+    try:
+        interpreter.hook("invalid", mock_before)
+        assert False
+    except ValueError as e:
+        assert str(e) == "invalid event: invalid"
+
+
+def test_interpreter_events(mocker: MockerFixture, tmp_path):
+    mocker.patch("repli.console.Console.input")
+    mock_event_log_emit = mocker.patch("repli.events.EventLog.emit")
+
+    page = Page(description="description")
+    nested = Page(description="nested")
+    page.add_page(nested)
+    nested.command(NativeFunction, "command")(lambda arg: print(arg))
+    interpreter = Interpreter(page=page, events=str(tmp_path / "events.jsonl"))
+    interpreter.execute(args=["1"])
+    interpreter.execute(args=["1", "output"])
+    interpreter.execute(args=["q"])
+
+    calls = mock_event_log_emit.call_args_list
+    assert [call.args[0] for call in calls] == ["navigate", "start", "finish", "builtin"]
+    assert calls[0].kwargs == {"path": "1", "description": "nested"}
+    assert calls[1].kwargs == {"path": "1.1", "description": "command", "args": ["output"]}
+    assert calls[2].kwargs["returncode"] == 0
+    assert calls[2].kwargs["bytes"] > len("output\n")
+    assert calls[2].kwargs["duration"] >= 0
+    assert calls[3].kwargs == {"name": "q", "args": []}
+
+
+def test_interpreter_pager(mocker: MockerFixture):
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    mock_console_pager = mocker.patch("repli.console.Console.pager")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    capture = interpreter.captures.open(description="description", stream=None)
+    capture.write("error: one\ninfo: two\n")
+    interpreter.pager(capture=capture, pattern="error")
+
+    mock_console_pager.assert_called_once_with(styles=True)
+    assert str(mock_console_print.call_args.args[0]) == "1: error: one"
+
+
+def test_interpreter_pager_no_matches(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.pager")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    capture = interpreter.captures.open(description="description", stream=None)
+    for pattern, message in [("missing", "no matches: missing"), ("(", "invalid pattern: (")]:
+        try:
+            interpreter.pager(capture=capture, pattern=pattern)
+            assert False
+        except Exception as e:
+            assert str(e) == message
+
+
+def test_interpreter_execute_command_captures_output(mocker: MockerFixture, monkeypatch):
+    mocker.patch("repli.console.Console.input")
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    page = Page(description="description")
+    mock_callback = mocker.MagicMock(side_effect=lambda: print("output"))
+    page.add_command(command=Command(description="description", callback=Builtin(callable=mock_callback)))
+    interpreter = Interpreter(page=page)
+    interpreter.execute(args=["1"])
+
+    assert stdout.getvalue() == "output\n"
+    assert [capture.text() for capture in interpreter.captures.captures] == ["output\n"]
+
+
+def test_interpreter_command_jobs_tail(mocker: MockerFixture):
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    mocker.patch("repli.console.Console.input")
+    mock_job = mocker.MagicMock()
+    mock_job.tail.return_value = ["line 1", "line 2"]
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    mock_job_manager_get = mocker.patch.object(interpreter.jobs, "get", return_value=mock_job)
+    interpreter.command_jobs().callback("tail", "1", "2")
+
+    mock_job_manager_get.assert_called_once_with("1")
+    mock_job.tail.assert_called_once_with(lines=2)
+    mock_console_out.assert_has_calls(
+        [
+            mocker.call("line 1", highlight=False),
+            mocker.call("line 2", highlight=False),
+        ]
+    )
+
+
+def test_interpreter_command_jobs_attach(mocker: MockerFixture):
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.input")
+    mocker.patch("time.sleep")
+    mock_job = mocker.MagicMock(id=1, status="finished", returncode=0)
+    type(mock_job).running = mocker.PropertyMock(side_effect=[True, False])
+    mock_job.output.side_effect = ["line 1\n", "line 1\nline 2\n"]
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    mocker.patch.object(interpreter.jobs, "get", return_value=mock_job)
+    interpreter.command_jobs().callback("attach", "1")
+
+    mock_console_out.assert_has_calls(
+        [
+            mocker.call("line 1\n", end="", highlight=False),
+            mocker.call("line 2\n", end="", highlight=False),
+        ]
+    )
+    mock_console_info.assert_called_once_with("job 1 finished with exit code 0")
+
+
+def test_interpreter_command_jobs_kill(mocker: MockerFixture):
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.input")
+    mock_job = mocker.MagicMock(id=1)
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    mocker.patch.object(interpreter.jobs, "get", return_value=mock_job)
+    interpreter.command_jobs().callback("kill", "1")
+
+    mock_job.kill.assert_called_once_with()
+    mock_console_info.assert_called_once_with("killed job 1")
+
+
+def test_interpreter_command_jobs_remove(mocker: MockerFixture):
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.input")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    mock_jobs_remove = mocker.patch.object(interpreter.jobs, "remove", return_value=mocker.MagicMock(id=1))
+    mock_jobs_clear = mocker.patch.object(interpreter.jobs, "clear", return_value=[mocker.MagicMock(), mocker.MagicMock()])
+    interpreter.command_jobs().callback("rm", "1")
+    interpreter.command_jobs().callback("clear")
+
+    mock_jobs_remove.assert_called_once_with("1")
+    mock_jobs_clear.assert_called_once_with()
+    mock_console_info.assert_has_calls([mocker.call("removed job 1"), mocker.call("removed 2 finished jobs")])
+
+
+def test_interpreter_command_jobs_usage(mocker: MockerFixture):
+    interpreter = Interpreter(page=mocker.MagicMock())
+    command = interpreter.command_jobs()
+
+    try:
+        command.callback("unknown")
+    except Exception as e:
+        assert str(e) == "usage: j [tail <job> [lines] | attach <job> | kill <job> | rm <job> | clear]"
+
+
+def test_interpreter_jobs_table(mocker: MockerFixture):
+    mock_rich_table = mocker.patch("rich.table.Table")
+    spy_rich_table_add_row = mocker.spy(mock_rich_table.return_value, "add_row")
+    mock_job = mocker.MagicMock(id=1, status="finished", runtime=1.25, returncode=0, description="description")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    mocker.patch.object(interpreter.jobs, "_jobs", {1: mock_job})
+    table = interpreter.jobs_table()
+
+    assert table == mock_rich_table.return_value
+    spy_rich_table_add_row.assert_called_once_with("1", "finished", "1.2s", "0", "description")
+
+
+def test_interpreter_scope(mocker: MockerFixture, monkeypatch):
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.input")
+    mocker.patch("repli.callback.results", ResultCache())
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+
+    def status(host: str):
+        return lambda *args: print(f"{host} is up")
+
+    page = Page(description="description")
+    page.command(NativeFunction, "status alpha", cache=60)(status("alpha"))
+    nested = Page(description="nested")
+    page.add_page(nested)
+    interpreter = Interpreter(page=page)
+    nested.command(NativeFunction, "status beta", cache=60)(status("beta"))
+    alpha, beta = page.commands["1"], nested.commands["1"]
+    assert isinstance(alpha, Command) and isinstance(alpha.callback, NativeFunction)
+    assert isinstance(beta, Command) and isinstance(beta.callback, NativeFunction)
+    interpreter.execute(["1"])
+    interpreter.execute(["2.1"])
+
+    assert alpha.callback.scope == "1"
+    assert beta.callback.scope == "2.1"
+    assert "alpha is up\n" in stdout.getvalue()
+    assert "beta is up\n" in stdout.getvalue()
+
+
+def test_interpreter_command_watch(mocker: MockerFixture):
+    mock_watch = mocker.patch("repli.interpreter.Watch")
+    command = Command(description="status", callback=NativeFunction(callable=mocker.MagicMock()))
+    page = Page(description="description")
+    page.add_command(command=command)
+
+    interpreter = Interpreter(page=page)
+    watch = interpreter.command_watch()
+    result = watch.callback("-n", "0.5", "1", "arg1")
+
+    assert watch.description == "watch"
+    mock_watch.assert_called_once_with(command=command, args=["arg1"], interval=0.5)
+    mock_watch.return_value.run.assert_called_once_with()
+    assert result == False
+
+
+def test_interpreter_command_watch_invalid(mocker: MockerFixture):
+    page = Page(description="description")
+    page.add_page(Page(description="nested"))
+
+    interpreter = Interpreter(page=page)
+    watch = interpreter.command_watch()
+    for args, message in [
+        ([], "usage: w [-n <seconds>] <command> [args]"),
+        (["-n", "soon", "1"], "invalid interval: soon"),
+        (["1"], "not a command: 1"),
+    ]:
+        try:
+            watch.callback(*args)
+            assert False
+        except Exception as e:
+            assert str(e) == message
+
+
+def test_interpreter_command_search(mocker: MockerFixture):
+    mock_callback = mocker.MagicMock(return_value=False)
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    mock_console_input = mocker.patch("repli.console.Console.input", side_effect=["1 arg1", ""])
+    mock_interpreter_search_table = mocker.patch("repli.interpreter.Interpreter.search_table")
+
+    command = Command(description="restart service", callback=Builtin(callable=mock_callback))
+    nested_page = Page(description="nested")
+    nested_page.add_command(command=command)
+    page = Page(description="description")
+    page.add_page(nested_page)
+    interpreter = Interpreter(page=page)
+    search = interpreter.command_search()
+    result = search.callback("restart")
+
+    assert search.description == "search"
+    mock_console_print.assert_called_once_with(mock_interpreter_search_table.return_value)
+    mock_console_input.assert_has_calls(
+        [
+            mocker.call(prompt="select a result (enter to cancel) ", markup=False),
+            mocker.call(prompt="press enter to continue"),
+        ]
+    )
+    mock_callback.assert_called_once_with("arg1")
+    assert result == False
+
+
+def test_interpreter_command_search_page(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("repli.console.Console.input", return_value="1")
+
+    nested_page = Page(description="deploy")
+    page = Page(description="description")
+    page.add_page(Page(description="other"))
+    page.add_page(nested_page)
+    interpreter = Interpreter(page=page)
+    interpreter.command_search().callback("deploy")
+
+    assert interpreter.pages == [page, nested_page]
+
+
+def test_interpreter_command_search_cancel(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("repli.console.Console.input", return_value="")
+
+    page = Page(description="description")
+    page.add_page(Page(description="deploy"))
+    interpreter = Interpreter(page=page)
+    result = interpreter.command_search().callback("deploy")
+
+    assert interpreter.pages == [page]
+    assert result == False
+
+
+def test_interpreter_command_search_no_matches(mocker: MockerFixture):
+    interpreter = Interpreter(page=Page(description="description"))
+
+    try:
+        interpreter.command_search().callback("deploy")
+    except Exception as e:
+        assert str(e) == "no matches: deploy"
+
+
+def test_interpreter_command_search_invalid_selection(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("repli.console.Console.input", return_value="2")
+
+    page = Page(description="description")
+    page.add_page(Page(description="deploy"))
+    interpreter = Interpreter(page=page)
+
+    try:
+        interpreter.command_search().callback("deploy")
+    except Exception as e:
+        assert str(e) == "invalid selection: 2"
+
+
+def test_interpreter_execute_search_shorthand(mocker: MockerFixture):
+    mock_callback = mocker.MagicMock(return_value=False)
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    mocker.patch.object(interpreter, "_builtins", {"/": Command(description="search", callback=mock_callback)})
+    interpreter.execute(args=["/deploy", "prod"])
+
+    mock_callback.assert_called_once_with("deploy", "prod")
+
+
 def test_interpreter_header(mocker: MockerFixture):
-    mock_rich_text = mocker.patch("repli.interpreter.Text")
+    mock_rich_text = mocker.patch("rich.text.Text")
     spy_rich_text_append = mocker.spy(mock_rich_text.return_value, "append")
 
     interpreter = Interpreter(page=mocker.MagicMock())
@@ -89,36 +606,330 @@ def test_interpreter_header(mocker: MockerFixture):
     )
 
 
-def test_interpreter_panel(mocker: MockerFixture):
-    mock_rich_table = mocker.patch("repli.interpreter.Table")
-    spy_rich_table_add_column = mocker.spy(mock_rich_table.return_value, "add_column")
-    spy_rich_table_add_row = mocker.spy(mock_rich_table.return_value, "add_row")
+def test_interpreter_panel(mocker: MockerFixture):
+    mock_page = mocker.MagicMock()
+
+    interpreter = Interpreter(page=mock_page)
+    panel = interpreter.panel()
+
+    assert panel == mock_page.panel.return_value
+    mock_page.panel.assert_called_once_with()
+
+
+def large_page(size: int) -> Page:
+    page = Page(description="large")
+    for index in range(size):
+        page.command(NativeFunction, f"item {index}")(lambda: None)
+    return page
+
+
+def test_interpreter_window(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.size", new_callable=mocker.PropertyMock, return_value=ConsoleDimensions(80, 25))
+    small_page = large_page(size=5)
+    page = large_page(size=100)
+
+    interpreter = Interpreter(page=page)
+    interpreter.current_page.add_page(small_page)
+
+    assert interpreter.rows() == 13
+    assert interpreter.window(page) == (0, 13)
+    assert interpreter.window(small_page) is None
+
+
+def test_interpreter_panel_window(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.size", new_callable=mocker.PropertyMock, return_value=ConsoleDimensions(80, 25))
+    page = large_page(size=100)
+    spy_page_panel = mocker.spy(page, "panel")
+
+    interpreter = Interpreter(page=page)
+    panel = interpreter.panel()
+
+    spy_page_panel.assert_called_once_with(window=(0, 13))
+    assert isinstance(panel, Group)
+    assert isinstance(panel.renderables[0], Cached)
+    assert isinstance(panel.renderables[0].renderable, Table)
+    assert panel.renderables[0].renderable.row_count == 13
+    assert str(panel.renderables[1]) == "1-13 of 100"
+
+
+def test_interpreter_command_next_previous(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.size", new_callable=mocker.PropertyMock, return_value=ConsoleDimensions(80, 25))
+    page = large_page(size=100)
+
+    interpreter = Interpreter(page=page)
+    next = interpreter.command_next()
+    previous = interpreter.command_previous()
+
+    assert next.description == "next page"
+    assert previous.description == "previous page"
+    assert next.callback() == False
+    assert interpreter.window(page) == (13, 13)
+    next.callback("10")
+    assert interpreter.window(page) == (87, 13)
+    previous.callback("2")
+    assert interpreter.window(page) == (61, 13)
+    previous.callback("10")
+    assert interpreter.window(page) == (0, 13)
+    try:
+        next.callback("0")
+        assert False
+    except Exception as e:
+        assert str(e) == "invalid count: 0"
+
+
+def test_interpreter_command_next_fits(mocker: MockerFixture):
+    interpreter = Interpreter(page=large_page(size=5))
+
+    try:
+        interpreter.command_next().callback()
+        assert False
+    except Exception as e:
+        assert str(e) == "current page fits on screen"
+
+
+def test_interpreter_footer_paged(mocker: MockerFixture):
+    interpreter = Interpreter(page=mocker.MagicMock())
+
+    assert "next page" not in str(interpreter.footer())
+    assert "next page" in str(interpreter.footer(paged=True))
+
+
+def test_interpreter_panel_loading(mocker: MockerFixture):
+    page = DynamicPage(description="dynamic", provider=mocker.MagicMock(return_value=Page(description="source")))
+
+    interpreter = Interpreter(page=page)
+
+    assert str(interpreter.panel()) == "loading..."
+
+
+def settle(page: DynamicPage, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while page.refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_interpreter_open_dynamic_page(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.print")
+    release = threading.Event()
+    source = Page(description="source")
+    source.command(NativeFunction, "command")(lambda: None)
+
+    def provider() -> Page:
+        release.wait(timeout=5.0)
+        return source
+
+    page = Page(description="description")
+    page.add_dynamic_page("dynamic", provider)
+    dynamic_page = page.commands["1"]
+    assert isinstance(dynamic_page, DynamicPage)
+    interpreter = Interpreter(page=page)
+    interpreter.execute(args=["1"])
+
+    # the page is opened while its provider is still running
+    assert interpreter.current_page is dynamic_page
+    assert dynamic_page.refreshing
+    assert str(interpreter.panel()) == "loading..."
+    release.set()
+    settle(dynamic_page)
+    interpreter.render()
+
+    assert dynamic_page.loaded
+    assert isinstance(interpreter.panel(), Cached)
+
+
+def test_interpreter_resolve_dynamic_page(mocker: MockerFixture):
+    source = Page(description="source")
+    command = Command(description="command", callback=NativeFunction(callable=mocker.MagicMock()))
+    source.add_command(command=command)
+    page = Page(description="description")
+    page.add_dynamic_page("dynamic", mocker.MagicMock(return_value=source))
+    interpreter = Interpreter(page=page)
+
+    assert interpreter.resolve(args=["1", "1", "arg1"]) == (command, ["arg1"])
+
+
+def test_interpreter_location_dynamic_page(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.size", new_callable=mocker.PropertyMock, return_value=ConsoleDimensions(80, 25))
+    mocker.patch("repli.console.Console.input")
+    mocker.patch("repli.console.Console.print")
+    sources = []
+    for _ in range(2):
+        source = Page(description="source")
+        source.add_page(large_page(size=100))
+        sources.append(source)
+    page = Page(description="description")
+    page.add_dynamic_page("dynamic", mocker.MagicMock(side_effect=sources), ttl=0)
+    dynamic_page = page.commands["1"]
+    assert isinstance(dynamic_page, DynamicPage)
+    interpreter = Interpreter(page=page)
+    dynamic_page.load(wait=True)
+    interpreter.execute(args=["1"])
+    interpreter.execute(args=["1"])
+    interpreter.execute(args=["n"])
+
+    assert interpreter.location(interpreter.current_page) == "1.1"
+    assert interpreter.window(interpreter.current_page) == (13, 13)
+    # the page that replaces it on refresh is shown where it was left
+    interpreter.execute(args=["q"])
+    settle(dynamic_page)
+    interpreter.render()
+    interpreter.execute(args=["1"])
+    assert interpreter.current_page is sources[1].commands["1"]
+    assert interpreter.window(interpreter.current_page) == (13, 13)
+
+
+def test_interpreter_render_dynamic_page(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.print")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    page = DynamicPage(description="dynamic", provider=mocker.MagicMock(return_value=Page(description="source")))
+    page.load(wait=True)
+    mock_refresh = mocker.patch.object(page, "refresh", side_effect=[None, Exception("failed to refresh page dynamic: x")])
+
+    interpreter = Interpreter(page=page)
+    interpreter.render()
+    interpreter.render()
+
+    assert mock_refresh.call_count == 2
+    mock_console_error.assert_called_once_with("failed to refresh page dynamic: x")
+
+
+def test_interpreter_render_dynamic_page_first_open(mocker: MockerFixture):
+    mock_console_print = mocker.patch("repli.console.Console.print")
+    source = Page(description="source")
+    source.command(NativeFunction, "restart web")(mocker.MagicMock())
+    page = DynamicPage(description="dynamic", provider=mocker.MagicMock(return_value=source))
+
+    interpreter = Interpreter(page=page)
+    interpreter.render()
+
+    assert page.loaded == True
+    assert "1" in page.commands
+    mock_console_print.assert_called_once()
+    output = io.StringIO()
+    RichConsole(file=output, width=80).print(interpreter.panel())
+    assert "restart web" in output.getvalue()
+
+
+def test_interpreter_render_dynamic_page_slow_first_open(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.print")
+    mocker.patch("repli.interpreter.LOAD_TIMEOUT", 0.05)
+    release = threading.Event()
+
+    def provider() -> Page:
+        release.wait(5)
+        return Page(description="source")
+
+    page = DynamicPage(description="dynamic", provider=provider)
+    interpreter = Interpreter(page=page)
+    interpreter.render()
+
+    assert page.loaded == False
+    assert str(interpreter.panel()) == "loading..."
+    release.set()
+    page.wait(timeout=5)
+    interpreter.render()
+    assert page.loaded == True
+
+
+def test_interpreter_init_ranking(mocker: MockerFixture):
+    try:
+        Interpreter(page=mocker.MagicMock(), history=True, ranking="invalid")
+        assert False
+    except ValueError as e:
+        assert str(e) == "invalid ranking: invalid"
+    try:
+        Interpreter(page=mocker.MagicMock(), ranking="highlight")
+        assert False
+    except ValueError as e:
+        assert str(e) == "ranking requires history"
+
+
+def test_interpreter_panel_ranking(mocker: MockerFixture, tmp_path):
+    mocker.patch.dict("os.environ", {"XDG_STATE_HOME": str(tmp_path)})
+    page = Page(description="description")
+    page.command(NativeFunction, "one")(mocker.MagicMock())
+    page.command(NativeFunction, "two")(mocker.MagicMock())
+    page.add_page(Page(description="nested"))
+
+    interpreter = Interpreter(page=page, name="name", history=True, ranking="reorder")
+    assert interpreter.history is not None
+    interpreter.remember("2 arg")
+    interpreter.remember("3")
+    spy_page_panel = mocker.spy(page, "panel")
+    panel_1 = interpreter.panel()
+    panel_2 = interpreter.panel()
+
+    assert panel_1 is panel_2
+    assert interpreter.hot(page) == ["2"]
+    spy_page_panel.assert_called_with(hot=["2"], reorder=True)
+    assert interpreter.history.tail() == ["2 arg", "3"]
+    assert interpreter.history.stats["2"].count == 1
+
+
+def test_interpreter_remember(mocker: MockerFixture, tmp_path):
+    mocker.patch.dict("os.environ", {"XDG_STATE_HOME": str(tmp_path)})
+    page = Page(description="description")
+    nested = Page(description="nested")
+    page.add_page(nested)
+    nested.command(NativeFunction, "one")(mocker.MagicMock())
+
+    interpreter = Interpreter(page=page, name="name", history=True)
+    assert interpreter.history is not None
+    spy_history_append = mocker.spy(interpreter.history, "append")
+    interpreter.remember("1.1 arg &")
+    interpreter.remember("j")
+    interpreter.remember("unknown")
+    interpreter.remember(" ")
+
+    assert spy_history_append.call_args_list == [
+        mocker.call(line="1.1 arg &", path="1.1"),
+        mocker.call(line="j", path=None),
+        mocker.call(line="unknown", path=None),
+    ]
+
+
+def test_interpreter_complete(mocker: MockerFixture):
+    mocker.patch("readline.get_begidx", return_value=2)
+    mocker.patch("readline.get_line_buffer", return_value="1 pr")
+    page = Page(description="description")
+    page.command(NativeFunction, "description", arguments=[["prod", "preview", "staging"]])(mocker.MagicMock())
+
+    interpreter = Interpreter(page=page)
+    matches = [interpreter.complete(text="pr", state=state) for state in range(3)]
+
+    assert matches == ["preview", "prod", None]
+
+
+def test_interpreter_setup(mocker: MockerFixture):
+    mock_readline_set_completer = mocker.patch("readline.set_completer")
+    mock_readline_set_completer_delims = mocker.patch("readline.set_completer_delims")
+    mock_readline_parse_and_bind = mocker.patch("readline.parse_and_bind")
 
     interpreter = Interpreter(page=mocker.MagicMock())
-    command = Command(description="description", callback=mocker.MagicMock())
-    page = Page(description="description")
-    mocker.patch.object(page, "_commands", {"1": command})
-    mocker.patch.object(interpreter, "_pages", [page])
-    panel = interpreter.panel()
+    interpreter.setup()
 
-    assert panel == mock_rich_table.return_value
-    mock_rich_table.assert_called_once_with(
-        show_header=False,
-        expand=True,
-        box=None,
-        pad_edge=False,
-    )
-    spy_rich_table_add_column.assert_has_calls(
-        [
-            mocker.call("index", style="bold cyan"),
-            mocker.call("description", justify="left", ratio=1),
-        ]
-    )
-    spy_rich_table_add_row.assert_called_once_with("1", command.description)
+    mock_readline_set_completer.assert_called_once_with(interpreter.complete)
+    mock_readline_set_completer_delims.assert_called_once_with(" \t\n")
+    mock_readline_parse_and_bind.assert_called_once()
+
+
+def test_interpreter_loop_history(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.clear")
+    mocker.patch("repli.interpreter.Interpreter.render")
+    mocker.patch("repli.console.Console.input", return_value="test arg1 arg2")
+    mocker.patch("repli.interpreter.Interpreter.execute")
+    mock_history_restore = mocker.patch("repli.history.History.restore")
+    mock_interpreter_remember = mocker.patch("repli.interpreter.Interpreter.remember")
+
+    interpreter = Interpreter(page=mocker.MagicMock(), history=True)
+    interpreter.loop(is_test=True)
+
+    mock_history_restore.assert_called_once_with()
+    mock_interpreter_remember.assert_called_once_with("test arg1 arg2")
 
 
 def test_interpreter_footer(mocker: MockerFixture):
-    mock_rich_text = mocker.patch("repli.interpreter.Text")
+    mock_rich_text = mocker.patch("rich.text.Text")
     spy_rich_text_append = mocker.spy(mock_rich_text.return_value, "append")
 
     interpreter = Interpreter(page=mocker.MagicMock())
@@ -142,13 +953,14 @@ def test_interpreter_footer(mocker: MockerFixture):
 
 
 def test_interpreter_render(mocker: MockerFixture):
-    mock_rich_table = mocker.patch("repli.interpreter.Table")
+    mock_rich_table = mocker.patch("rich.table.Table")
     spy_rich_table_add_column = mocker.spy(mock_rich_table.return_value, "add_column")
     spy_rich_table_add_row = mocker.spy(mock_rich_table.return_value, "add_row")
-    mock_rich_padding = mocker.patch("repli.interpreter.Padding")
+    mock_rich_padding = mocker.patch("rich.padding.Padding")
     mock_interpreter_header = mocker.patch("repli.interpreter.Interpreter.header")
     mock_interpreter_panel = mocker.patch("repli.interpreter.Interpreter.panel")
     mock_interpreter_footer = mocker.patch("repli.interpreter.Interpreter.footer")
+    mocker.patch("repli.interpreter.Interpreter.window", return_value=None)
     mock_console_print = mocker.patch("repli.console.Console.print")
 
     interpreter = Interpreter(page=mocker.MagicMock())
@@ -172,7 +984,7 @@ def test_interpreter_render(mocker: MockerFixture):
     mock_console_print.assert_called_once_with(mock_rich_table.return_value)
     mock_interpreter_header.assert_called_once()
     mock_interpreter_panel.assert_called_once()
-    mock_interpreter_footer.assert_called_once()
+    mock_interpreter_footer.assert_called_once_with(paged=False)
 
 
 def test_interpreter_execute_no_args(mocker: MockerFixture):
@@ -198,7 +1010,7 @@ def test_interpreter_execute_command(mocker: MockerFixture):
     mock_callback = mocker.MagicMock(return_value=False)
     mock_console_input = mocker.patch("repli.console.Console.input")
 
-    command = Command(description="description", callback=mock_callback)
+    command = Command(description="description", callback=Builtin(callable=mock_callback))
     page = Page(description="description")
     mocker.patch.object(page, "_commands", {"1": command})
     interpreter = Interpreter(page=page)
@@ -209,6 +1021,74 @@ def test_interpreter_execute_command(mocker: MockerFixture):
     assert result == False
 
 
+def test_interpreter_execute_builtin_command_args(mocker: MockerFixture):
+    mock_callback = mocker.MagicMock(return_value=False)
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    builtin_command = Command(description="description", callback=mock_callback)
+    mocker.patch.object(interpreter, "_builtins", {"test": builtin_command})
+    interpreter.execute(args=["test", "arg1"])
+
+    mock_callback.assert_called_once_with("arg1")
+
+
+def test_interpreter_execute_command_background(mocker: MockerFixture):
+    mock_callback = mocker.MagicMock(return_value=False)
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_console_input = mocker.patch("repli.console.Console.input")
+
+    command = Command(description="description", callback=mock_callback)
+    page = Page(description="description")
+    mocker.patch.object(page, "_commands", {"1": command})
+    interpreter = Interpreter(page=page)
+    mock_job_manager_submit = mocker.patch.object(interpreter.jobs, "submit", return_value=mocker.MagicMock(id=1))
+    result = interpreter.execute(args=["1", "arg1", "&"])
+
+    mock_callback.assert_not_called()
+    mock_job_manager_submit.assert_called_once_with("description", mock_callback, "arg1")
+    mock_console_info.assert_called_once_with("started job 1: description")
+    mock_console_input.assert_called_once_with(prompt="press enter to continue")
+    assert result == False
+
+
+def test_interpreter_execute_command_background_flag(mocker: MockerFixture):
+    mock_callback = mocker.MagicMock(return_value=False)
+    mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.input")
+
+    command = Command(description="description", callback=mock_callback, background=True)
+    page = Page(description="description")
+    mocker.patch.object(page, "_commands", {"1": command})
+    interpreter = Interpreter(page=page)
+    mock_job_manager_submit = mocker.patch.object(interpreter.jobs, "submit", return_value=mocker.MagicMock(id=1))
+    interpreter.execute(args=["1"])
+
+    mock_callback.assert_not_called()
+    mock_job_manager_submit.assert_called_once_with("description", mock_callback)
+
+
+def test_interpreter_execute_workflow_background(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.input")
+    mock_build = mocker.MagicMock()
+
+    page = Page(description="description")
+    page.command(NativeFunction, "build")(mock_build)
+    page.add_workflow(description="workflow", steps=[Step(name="build", command="1")], background=True)
+    interpreter = Interpreter(page=page)
+    interpreter.execute(args=["2", "arg1"])
+    job = interpreter.jobs.get("1")
+    deadline = time.monotonic() + 5
+    while job.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    mock_console_info.assert_any_call("started job 1: workflow")
+    mock_build.assert_called_once_with("arg1")
+    assert job.status == "finished"
+    assert job.output().startswith("[build]\n")
+
+
 def test_interpreter_execute_page(mocker: MockerFixture):
     nested_page = Page(description="description_1")
     page = Page(description="description_2")
@@ -279,3 +1159,465 @@ def test_interpreter_loop_keyboard_interrupt(mocker: MockerFixture):
     mock_interpreter_render.assert_called_once()
     mock_console_input.assert_called_once_with(prompt=f"{interpreter.prompt} ", markup=False)
     mock_interpreter_execute.assert_not_called()
+
+
+def test_interpreter_render_incremental(mocker: MockerFixture):
+    mock_interpreter_interface = mocker.patch("repli.interpreter.Interpreter.interface")
+    mock_renderer_draw = mocker.patch("repli.renderer.Renderer.draw")
+    mock_console_print = mocker.patch("repli.console.Console.print")
+
+    interpreter = Interpreter(page=mocker.MagicMock(), incremental=True)
+    interpreter.render()
+
+    mock_renderer_draw.assert_called_once_with(mock_interpreter_interface.return_value)
+    mock_console_print.assert_not_called()
+
+
+def test_interpreter_execute_command_invalidates_renderer(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.input")
+    mock_renderer_invalidate = mocker.patch("repli.renderer.Renderer.invalidate")
+
+    command = Command(description="description", callback=Builtin(callable=mocker.MagicMock(return_value=False)))
+    page = Page(description="description")
+    mocker.patch.object(page, "_commands", {"1": command})
+    interpreter = Interpreter(page=page, incremental=True)
+    interpreter.execute(args=["1"])
+
+    mock_renderer_invalidate.assert_called_once()
+
+
+def test_interpreter_loop_incremental(mocker: MockerFixture):
+    mock_console_clear = mocker.patch("repli.console.Console.clear")
+    mock_interpreter_render = mocker.patch("repli.interpreter.Interpreter.render")
+    mocker.patch("repli.console.Console.input", return_value="test")
+    mocker.patch("repli.interpreter.Interpreter.execute")
+
+    interpreter = Interpreter(page=mocker.MagicMock(), incremental=True)
+    interpreter.loop(is_test=True)
+
+    mock_console_clear.assert_not_called()
+    mock_interpreter_render.assert_called_once()
+
+
+def test_interpreter_resolve(mocker: MockerFixture):
+    command = Command(description="description", callback=mocker.MagicMock())
+    nested_page = Page(description="nested")
+    mocker.patch.object(nested_page, "_commands", {"1": command})
+    page = Page(description="description")
+    mocker.patch.object(page, "_commands", {"2": nested_page})
+    interpreter = Interpreter(page=page)
+
+    assert interpreter.resolve(args=["2", "1", "arg1", "arg2"]) == (command, ["arg1", "arg2"])
+    assert interpreter.resolve(args=["2"]) == (nested_page, [])
+
+
+def test_interpreter_resolve_not_found(mocker: MockerFixture):
+    interpreter = Interpreter(page=Page(description="description"))
+
+    try:
+        interpreter.resolve(args=["2", "1"])
+    except Exception as e:
+        assert str(e) == "command not found: 2"
+
+
+def test_interpreter_run_script(mocker: MockerFixture):
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callback = mocker.MagicMock()
+    mock_callback.run.return_value = 0
+    command = Command(description="description", callback=mock_callback)
+    page = Page(description="description")
+    mocker.patch.object(page, "_commands", {"1": command})
+
+    interpreter = Interpreter(page=page)
+    result = interpreter.run_script(lines=["1 arg1 'arg 2'\n", "# comment\n", "\n"])
+
+    mock_callback.run.assert_called_once_with("arg1", "arg 2")
+    mock_callback.assert_not_called()
+    assert len(result.steps) == 1
+    assert result.steps[0].line == "1 arg1 arg 2"
+    assert result.steps[0].description == "description"
+    assert result.returncode == 0
+    mock_console_error.assert_not_called()
+    assert mock_console_info.call_count == 1
+
+
+def test_interpreter_run_script_fail_fast(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callback = mocker.MagicMock()
+    mock_callback.run.return_value = 2
+    command = Command(description="description", callback=mock_callback)
+    page = Page(description="description")
+    mocker.patch.object(page, "_commands", {"1": command, "2": Page(description="nested")})
+
+    interpreter = Interpreter(page=page)
+    result = interpreter.run_script(lines=["1", "2", "3"])
+
+    assert len(result.steps) == 1
+    assert result.returncode == 2
+    mock_console_error.assert_not_called()
+
+
+def test_interpreter_run_script_keep_going(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    page = Page(description="description")
+    mocker.patch.object(page, "_commands", {"2": Page(description="nested")})
+
+    interpreter = Interpreter(page=page)
+    result = interpreter.run_script(lines=["2", "3"], fail_fast=False)
+
+    assert [step.error for step in result.steps] == ["path resolves to a page: 2", "command not found: 3"]
+    assert result.returncode == 1
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("path resolves to a page: 2"),
+            mocker.call("command not found: 3"),
+        ]
+    )
+
+
+def test_interpreter_main(mocker: MockerFixture):
+    mock_interpreter_loop = mocker.patch("repli.interpreter.Interpreter.loop")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    returncode = interpreter.main(argv=[])
+
+    mock_interpreter_loop.assert_called_once_with()
+    assert returncode == 0
+
+
+def test_interpreter_main_script(mocker: MockerFixture, tmp_path):
+    mock_interpreter_loop = mocker.patch("repli.interpreter.Interpreter.loop")
+    mock_interpreter_run_script = mocker.patch("repli.interpreter.Interpreter.run_script")
+    mock_interpreter_run_script.return_value.returncode = 1
+    script = tmp_path / "script"
+    script.write_text("1\n")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    returncode = interpreter.main(argv=["--script", str(script), "--keep-going"])
+
+    mock_interpreter_loop.assert_not_called()
+    mock_interpreter_run_script.assert_called_once_with(lines=mocker.ANY, fail_fast=False)
+    assert returncode == 1
+
+
+def test_interpreter_main_serve(mocker: MockerFixture):
+    mock_interpreter_loop = mocker.patch("repli.interpreter.Interpreter.loop")
+    mock_interpreter_serve = mocker.patch("repli.interpreter.Interpreter.serve")
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    returncode = interpreter.main(argv=["--serve", "/tmp/repli.sock"])
+
+    mock_interpreter_loop.assert_not_called()
+    mock_interpreter_serve.assert_called_once_with(path="/tmp/repli.sock")
+    assert returncode == 0
+
+
+def test_interpreter_session():
+    nested_page = Page(description="nested")
+    page = Page(description="description")
+    page.add_page(nested_page)
+    interpreter = Interpreter(page=page)
+
+    session = interpreter.session()
+    session.execute(args=["1"])
+
+    assert session.pages == [page, nested_page]
+    assert interpreter.pages == [page]
+    assert session.builtins is not interpreter.builtins
+    assert session.index is interpreter.index
+    assert session.metrics is interpreter.metrics
+    assert session.captures is not interpreter.captures
+    assert session.jobs is not interpreter.jobs
+
+
+def test_interpreter_session_state(mocker: MockerFixture, monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path))
+    mocker.patch("repli.console.Console.input")
+    mock_event_log_emit = mocker.patch("repli.events.EventLog.emit")
+
+    def fail(*args: str) -> None:
+        raise Exception("failed")
+
+    page = Page(description="description")
+    page.command(NativeFunction, "succeed")(lambda *args: print("a longer output"))
+    page.command(NativeFunction, "fail")(fail)
+    interpreter = Interpreter(page=page, history=True, events=str(tmp_path / "events.jsonl"))
+    first = interpreter.session()
+    second = interpreter.session()
+    first.execute(args=["1"])
+    second.execute(args=["2"])
+
+    finishes = [call.kwargs for call in mock_event_log_emit.call_args_list if call.args[0] == "finish"]
+    assert [finish["returncode"] for finish in finishes] == [0, 1]
+    assert [finish["bytes"] for finish in finishes] == [first.captures.captures[0].size, second.captures.captures[0].size]
+    assert [len(session.captures.captures) for session in [interpreter, first, second]] == [0, 1, 1]
+    assert first.history is not None and second.history is not None and interpreter.history is not None
+    assert first.history is not second.history
+    assert first.history.path == interpreter.history.path
+
+
+def test_interpreter_serve(mocker: MockerFixture):
+    mock_server = mocker.patch("repli.server.Server")
+    mock_server.return_value.__enter__.return_value.serve_forever.side_effect = KeyboardInterrupt
+    mock_console_configure = mocker.patch("repli.console.Console.configure")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+
+    interpreter = Interpreter(page=Page(description="description"))
+    interpreter.serve(path="/tmp/repli.sock", width=80)
+
+    mock_console_configure.assert_called_once_with(width=80, color_system="256")
+    mock_server.assert_called_once_with(interpreter=interpreter, path="/tmp/repli.sock")
+    mock_console_info.assert_called_with("stopped serving")
+    assert interpreter._search is not None
+    assert interpreter._completer is not None
+
+
+def test_interpreter_execute_command_path(mocker: MockerFixture):
+    mock_callback = mocker.MagicMock(return_value=False)
+    mocker.patch("repli.console.Console.input")
+
+    nested_page = Page(description="nested")
+    nested_page.add_command(command=Command(description="description", callback=Builtin(callable=mock_callback)))
+    page = Page(description="description")
+    page.add_page(nested_page)
+    interpreter = Interpreter(page=page)
+    interpreter.execute(args=["1.1", "arg1"])
+
+    mock_callback.assert_called_once_with("arg1")
+    assert interpreter.pages == [page]
+
+
+def test_interpreter_execute_page_alias(mocker: MockerFixture):
+    nested_page_2 = Page(description="nested 2", alias="nested")
+    nested_page_1 = Page(description="nested 1")
+    nested_page_1.add_page(nested_page_2)
+    page = Page(description="description")
+    page.add_page(nested_page_1)
+    page.add_page(Page(description="other"))
+    interpreter = Interpreter(page=page)
+    interpreter.execute(args=["2"])
+    interpreter.execute(args=["1/nested"])
+
+    assert interpreter.pages == [page, nested_page_1, nested_page_2]
+
+
+def test_interpreter_execute_index_is_relative(mocker: MockerFixture):
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mocker.patch("repli.console.Console.input")
+
+    nested_page = Page(description="nested")
+    page = Page(description="description")
+    page.add_page(nested_page)
+    page.add_page(Page(description="other"))
+    interpreter = Interpreter(page=page)
+    interpreter.execute(args=["1"])
+    interpreter.execute(args=["2"])
+
+    mock_console_error.assert_called_once_with("command not found: 2")
+    assert interpreter.pages == [page, nested_page]
+
+
+def test_interpreter_resolve_path(mocker: MockerFixture):
+    command = Command(description="description", callback=mocker.MagicMock())
+    nested_page = Page(description="nested")
+    nested_page.add_command(command=command)
+    page = Page(description="description")
+    page.add_page(nested_page)
+    interpreter = Interpreter(page=page)
+
+    assert interpreter.resolve(args=["1.1", "arg1"]) == (command, ["arg1"])
+
+
+def test_interpreter_execute_lazy_page(mocker: MockerFixture):
+    mock_callback = mocker.MagicMock(return_value=False)
+    mocker.patch("repli.console.Console.input")
+
+    source = Page(description="source")
+    source.add_command(command=Command(description="description", callback=Builtin(callable=mock_callback)))
+    mock_loader = mocker.MagicMock(return_value=source)
+    page = Page(description="description")
+    page.add_lazy_page("lazy", mock_loader, alias="lazy")
+    interpreter = Interpreter(page=page)
+    lazy_page = page.commands["1"]
+
+    assert "1.1" not in interpreter.index
+    mock_loader.assert_not_called()
+
+    interpreter.execute(args=["1"])
+
+    assert interpreter.pages == [page, lazy_page]
+    assert "1.1" in interpreter.index
+    assert "lazy/1" in interpreter.index
+
+    interpreter.execute(args=["1", "arg1"])
+
+    mock_callback.assert_called_once_with("arg1")
+    mock_loader.assert_called_once_with()
+
+
+def test_interpreter_execute_hooks_failing(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.input")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.MagicMock(return_value=False)
+    mock_after = mocker.MagicMock()
+
+    page = Page(description="description")
+    page.add_command(command=Command(description="description", callback=NativeFunction(callable=mock_callable)))
+    interpreter = Interpreter(page=page)
+    mocker.patch("repli.callback.Callback.__call__")
+    interpreter.hook("before_execute", mocker.MagicMock(side_effect=Exception("before")))
+    interpreter.hook("after_execute", mocker.MagicMock(side_effect=Exception("after")))
+    interpreter.hook("after_execute", mock_after)
+    result = interpreter.execute(args=["1", "arg1"])
+
+    mock_callable.assert_called_once_with("arg1")
+    mock_after.assert_called_once()
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("before_execute hook failed: before"),
+            mocker.call("after_execute hook failed: after"),
+        ]
+    )
+    assert result == False
+
+
+def test_interpreter_resolve_lazy_page(mocker: MockerFixture):
+    command = Command(description="description", callback=mocker.MagicMock())
+    source = Page(description="source")
+    source.add_command(command=command)
+    page = Page(description="description")
+    page.add_lazy_page("lazy", mocker.MagicMock(return_value=source))
+    interpreter = Interpreter(page=page)
+
+    assert interpreter.resolve(args=["1", "1", "arg1"]) == (command, ["arg1"])
+
+
+def test_interpreter_aexecute_awaitable(mocker: MockerFixture):
+    mock_interpreter_ainput = mocker.patch("repli.interpreter.Interpreter.ainput")
+    mock_interpreter_execute = mocker.patch("repli.interpreter.Interpreter.execute")
+    mock_callable = mocker.AsyncMock()
+
+    page = Page(description="description")
+    page.add_command(command=Command(description="description", callback=NativeFunction(callable=mock_callable)))
+    interpreter = Interpreter(page=page)
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    result = asyncio.run(interpreter.aexecute(args=["1", "arg1"]))
+
+    mock_callable.assert_awaited_once_with("arg1")
+    mock_interpreter_execute.assert_not_called()
+    mock_interpreter_ainput.assert_awaited_once_with(prompt="press enter to continue")
+    assert len(interpreter.captures.captures) == 1
+    assert result == False
+
+
+def test_interpreter_aexecute_hooks_failing(mocker: MockerFixture):
+    mocker.patch("repli.interpreter.Interpreter.ainput")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_callable = mocker.AsyncMock(return_value=False)
+
+    page = Page(description="description")
+    page.add_command(command=Command(description="description", callback=NativeFunction(callable=mock_callable)))
+    interpreter = Interpreter(page=page)
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    interpreter.hook("before_execute", mocker.MagicMock(side_effect=Exception("before")))
+    interpreter.hook("after_execute", mocker.MagicMock(side_effect=Exception("after")))
+    result = asyncio.run(interpreter.aexecute(args=["1"]))
+
+    mock_callable.assert_awaited_once_with()
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("before_execute hook failed: before"),
+            mocker.call("after_execute hook failed: after"),
+        ]
+    )
+    assert result == False
+
+
+def test_interpreter_adispatch_profile(mocker: MockerFixture):
+    mocker.patch("repli.interpreter.Interpreter.ainput")
+
+    async def work(*args: str) -> bool:
+        await asyncio.sleep(0)
+        return False
+
+    page = Page(description="description")
+    page.add_command(command=Command(description="description", callback=NativeFunction(callable=work)))
+    interpreter = Interpreter(page=page)
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+    interpreter.metrics.profiling = True
+    asyncio.run(interpreter.aexecute(args=["1"]))
+
+    assert "1" in interpreter.metrics.profiles
+
+
+def test_interpreter_aexecute_synchronous(mocker: MockerFixture):
+    mock_interpreter_execute = mocker.patch("repli.interpreter.Interpreter.execute", return_value=True)
+
+    page = Page(description="description")
+    page.add_command(command=Command(description="description", callback=NativeFunction(callable=mocker.MagicMock())))
+    page.add_command(command=Command(description="description", callback=NativeFunction(callable=mocker.AsyncMock())))
+    interpreter = Interpreter(page=page)
+
+    for args in [["1"], ["e"], ["2", "&"], ["3"]]:
+        assert asyncio.run(interpreter.aexecute(args=args)) == True
+    assert mock_interpreter_execute.call_args_list == [
+        mocker.call(["1"]),
+        mocker.call(["e"]),
+        mocker.call(["2", "&"]),
+        mocker.call(["3"]),
+    ]
+
+
+def test_interpreter_adispatch_interrupt(mocker: MockerFixture):
+    mocker.patch("repli.interpreter.Interpreter.ainput")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+
+    async def sleep() -> None:
+        await asyncio.sleep(10)
+
+    command = Command(description="description", callback=NativeFunction(callable=mocker.AsyncMock(side_effect=sleep)))
+    interpreter = Interpreter(page=Page(description="description"))
+    mocker.patch("repli.callback.Callback.__call__")
+    mocker.patch("repli.console.Console.print")
+
+    async def interrupt() -> bool:
+        task = asyncio.ensure_future(interpreter.adispatch(command=command, args=[]))
+        await asyncio.sleep(0.1)
+        interpreter.interrupt()
+        return await task
+
+    assert asyncio.run(interrupt()) == False
+    mock_console_error.assert_called_once_with("command interrupted")
+
+
+def test_interpreter_aloop(mocker: MockerFixture):
+    mocker.patch("repli.interpreter.Interpreter.render")
+    mocker.patch("repli.console.Console.clear")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_interpreter_aexecute = mocker.patch("repli.interpreter.Interpreter.aexecute", return_value=False)
+    mocker.patch("repli.interpreter.Interpreter.ainput", side_effect=["1 arg1", EOFError])
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+    asyncio.run(interpreter.aloop())
+
+    mock_interpreter_aexecute.assert_awaited_once_with(args=["1", "arg1"])
+    mock_console_info.assert_called_once_with("exited with EOF")
+
+
+def test_interpreter_ainput(mocker: MockerFixture):
+    mocker.patch("repli.console.Console.input", side_effect=["line", EOFError])
+
+    interpreter = Interpreter(page=mocker.MagicMock())
+
+    assert asyncio.run(interpreter.ainput(prompt="prompt")) == "line"
+    try:
+        asyncio.run(interpreter.ainput(prompt="prompt"))
+        assert False
+    except EOFError:
+        pass
@@ -0,0 +1,341 @@
+import io
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pytest import MonkeyPatch
+from pytest_mock import MockerFixture
+from repli.callback import Builtin, NativeFunction, Subprocess
+from repli.command import Command
+from repli.fanout import FanOut
+from repli.job import Input, JobManager, NativeFunctionJob, Output, SubprocessJob, WorkflowJob
+from repli.terminal import terminal
+from repli.workflow import Step, Workflow
+
+
+def wait(job, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while job.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_output_routes_target():
+    stream = io.StringIO()
+    target = io.StringIO()
+    output = Output(stream=stream)
+
+    output.write("stream")
+    output.target = target
+    output.write("target")
+    output.target = None
+
+    assert stream.getvalue() == "stream"
+    assert target.getvalue() == "target"
+
+
+def test_output_install(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+
+    output = Output.install()
+
+    assert sys.stdout is output
+    assert Output.install() is output
+
+
+def test_input_routes_target():
+    stream = io.StringIO("stream\n")
+    target = io.StringIO("target\n")
+    stdin = Input(stream=stream)
+
+    stdin.target = target
+    assert stdin.readline() == "target\n"
+    stdin.target = None
+    assert stdin.readline() == "stream\n"
+
+
+def test_input_install(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(sys, "stdin", io.StringIO())
+
+    stdin = Input.install()
+
+    assert sys.stdin is stdin
+    assert Input.install() is stdin
+
+
+def test_native_function_job(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    callback = NativeFunction(callable=mocker.MagicMock(side_effect=lambda name: print(f"hello {name}")))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        job = NativeFunctionJob(1, "description", executor, callback, "world")
+        wait(job)
+
+    assert job.id == 1
+    assert job.description == "description"
+    assert job.status == "finished"
+    assert job.returncode == 0
+    assert job.output() == "hello world\n"
+    assert job.tail(lines=1) == ["hello world"]
+
+
+def test_native_function_job_exception(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    callback = NativeFunction(callable=mocker.MagicMock(side_effect=Exception("test")))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        job = NativeFunctionJob(1, "description", executor, callback)
+        wait(job)
+
+    assert job.status == "failed"
+    assert job.returncode == 1
+    assert job.output() == "native function raised an exception: test\n"
+
+
+def test_native_function_job_kill_running(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    callback = NativeFunction(callable=mocker.MagicMock(side_effect=lambda: time.sleep(0.2)))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        job = NativeFunctionJob(1, "description", executor, callback)
+        time.sleep(0.05)
+        try:
+            job.kill()
+        except Exception as e:
+            assert str(e) == "job 1 is a native function and cannot be killed while running"
+
+
+def test_native_function_job_kill_pending(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    callback_1 = NativeFunction(callable=mocker.MagicMock(side_effect=lambda: time.sleep(0.2)))
+    callback_2 = NativeFunction(callable=mocker.MagicMock())
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        NativeFunctionJob(1, "description", executor, callback_1)
+        job = NativeFunctionJob(2, "description", executor, callback_2)
+        job.kill()
+
+    assert job.status == "killed"
+    assert job.returncode == -signal.SIGTERM
+
+
+def test_workflow_job(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    monkeypatch.setattr(terminal, "_headless", False)
+    mock_live = mocker.patch("rich.live.Live")
+    mock_build = mocker.MagicMock(side_effect=lambda: print("built"))
+    build = Command(description="build", callback=NativeFunction(callable=mock_build))
+    test = Command(description="test", callback=NativeFunction(callable=mocker.MagicMock(side_effect=Exception("test"))))
+    workflow = Workflow(steps=[Step(name="build", command=build), Step(name="test", command=test, after=["build"])])
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        job = WorkflowJob(1, "description", executor, workflow)
+        wait(job)
+
+    mock_live.assert_not_called()
+    assert job.status == "failed"
+    assert job.returncode == 1
+    assert "[build]\nbuilt\n" in job.output()
+    assert "native function raised an exception: test" in job.output()
+    assert "1 of 2 steps did not succeed" in job.output()
+
+
+def test_workflow_job_kill(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    started = threading.Event()
+    release = threading.Event()
+    mock_deploy = mocker.MagicMock()
+
+    def building(*args: str) -> None:
+        started.set()
+        release.wait(5)
+
+    build = Command(description="build", callback=NativeFunction(callable=building))
+    deploy = Command(description="deploy", callback=NativeFunction(callable=mock_deploy))
+    workflow = Workflow(steps=[Step(name="build", command=build), Step(name="deploy", command=deploy, after=["build"])])
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        job = WorkflowJob(1, "description", executor, workflow)
+        assert started.wait(5)
+        job.kill()
+        job.kill()
+        release.set()
+        wait(job)
+
+    mock_deploy.assert_not_called()
+    assert job.status == "killed"
+    assert job.returncode == 1
+    assert "workflow killed, cancelling remaining steps" in job.output()
+    try:
+        job.kill()
+        assert False
+    except Exception as e:
+        assert str(e) == "job 1 is not running"
+
+
+def test_subprocess_job():
+    callback = Subprocess(callable=lambda: f'{sys.executable} -c "print(1); print(2)"')
+
+    job = SubprocessJob(1, "description", callback)
+    wait(job)
+
+    assert job.status == "finished"
+    assert job.returncode == 0
+    assert job.output() == "1\n2\n"
+    assert job.tail(lines=1) == ["2"]
+    job.close()
+    job.close()
+    assert not os.path.exists(job.path)
+
+
+def test_subprocess_job_kill():
+    callback = Subprocess(callable=lambda: f'{sys.executable} -c "import time; time.sleep(10)"')
+
+    job = SubprocessJob(1, "description", callback)
+    job.kill()
+    wait(job)
+
+    assert job.status == "killed"
+    assert job.returncode == -signal.SIGTERM
+
+
+def test_job_manager_submit(mocker: MockerFixture):
+    mock_native_function_job = mocker.patch("repli.job.NativeFunctionJob")
+    mock_native_function_job.return_value.id = 1
+    mock_subprocess_job = mocker.patch("repli.job.SubprocessJob")
+    mock_subprocess_job.return_value.id = 2
+    native_function = NativeFunction(callable=mocker.MagicMock())
+    subprocess = Subprocess(callable=mocker.MagicMock())
+
+    job_manager = JobManager()
+    job_1 = job_manager.submit("description", native_function, "arg1")
+    job_2 = job_manager.submit("description", subprocess, "arg1")
+
+    mock_native_function_job.assert_called_once_with(1, "description", job_manager.executor, native_function, "arg1")
+    mock_subprocess_job.assert_called_once_with(2, "description", subprocess, "arg1")
+    assert job_manager.jobs == {1: job_1, 2: job_2}
+    assert job_manager.get("2") == job_2
+
+
+def script(code: str) -> Subprocess:
+    return Subprocess(callable=lambda *args: f'{sys.executable} -c "{code}"')
+
+
+def test_job_manager_remove(mocker: MockerFixture):
+    mock_atexit_register = mocker.patch("atexit.register")
+    job_manager = JobManager()
+    sleeping = job_manager.submit("description", script("import time; time.sleep(10)"))
+    finished = job_manager.submit("description", script("print(1)"))
+    wait(finished)
+
+    mock_atexit_register.assert_called_once_with(job_manager.close)
+    try:
+        job_manager.remove(str(sleeping.id))
+        assert False
+    except Exception as e:
+        assert str(e) == "job 1 is still running"
+    assert job_manager.clear() == [finished]
+    assert list(job_manager.jobs) == [sleeping.id]
+    assert isinstance(finished, SubprocessJob) and not os.path.exists(finished.path)
+
+    sleeping.kill()
+    wait(sleeping)
+    assert job_manager.remove(str(sleeping.id)) == sleeping
+    assert job_manager.jobs == {}
+    assert isinstance(sleeping, SubprocessJob) and not os.path.exists(sleeping.path)
+
+
+def test_job_manager_close(mocker: MockerFixture):
+    mocker.patch("atexit.register")
+    mock_atexit_unregister = mocker.patch("atexit.unregister")
+    job_manager = JobManager()
+    job = job_manager.submit("description", script("print(1)"))
+    wait(job)
+    job_manager.close()
+    job_manager.close()
+
+    mock_atexit_unregister.assert_called_once_with(job_manager.close)
+    assert isinstance(job, SubprocessJob) and not os.path.exists(job.path)
+
+
+def test_job_manager_submit_workflow(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mock_build = mocker.MagicMock()
+    build = Command(description="build", callback=NativeFunction(callable=mock_build))
+    workflow = Workflow(steps=[Step(name="build", command=build, arguments=["-v"])])
+
+    job_manager = JobManager()
+    job = job_manager.submit("description", workflow, "arg1")
+    wait(job)
+
+    assert isinstance(job, WorkflowJob)
+    assert job_manager.get("1") == job
+    assert job.status == "finished"
+    assert job.returncode == 0
+    mock_build.assert_called_once_with("-v", "arg1")
+
+
+def test_job_manager_submit_fanout(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mock_callable = mocker.MagicMock(side_effect=lambda target, name: print(f"{name} on {target}"))
+    fanout = FanOut(callback=NativeFunction(callable=mock_callable), targets=["a", "b"])
+
+    job_manager = JobManager()
+    job = job_manager.submit("description", fanout, "deploy")
+    wait(job)
+
+    assert isinstance(job, WorkflowJob)
+    assert job_manager.get("1") == job
+    assert job.status == "finished"
+    assert job.returncode == 0
+    assert "[a]\ndeploy on a\n[b]\ndeploy on b\n" in job.output()
+
+
+def test_fanout_job_kill(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    started = threading.Event()
+    release = threading.Event()
+    mock_callable = mocker.MagicMock()
+
+    def deploying(target: str, *args: str) -> None:
+        mock_callable(target)
+        started.set()
+        release.wait(5)
+
+    fanout = FanOut(callback=NativeFunction(callable=deploying), targets=["a", "b"], concurrency=1)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        job = WorkflowJob(1, "description", executor, fanout)
+        assert started.wait(5)
+        job.kill()
+        # the queued target is cancelled before the running one is let finish
+        deadline = time.monotonic() + 5
+        while "fan-out killed" not in job.output() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        wait(job)
+
+    mock_callable.assert_called_once_with("a")
+    assert job.status == "killed"
+    assert job.returncode == 1
+    assert "fan-out killed, cancelling remaining targets" in job.output()
+    assert "1 of 2 targets did not succeed" in job.output()
+
+
+def test_job_manager_submit_invalid_callback(mocker: MockerFixture):
+    job_manager = JobManager()
+
+    try:
+        job_manager.submit("description", Builtin(callable=mocker.MagicMock()))
+    except Exception as e:
+        assert str(e) == "command cannot run in background"
+
+
+def test_job_manager_get_not_found():
+    job_manager = JobManager()
+
+    try:
+        job_manager.get("1")
+    except Exception as e:
+        assert str(e) == "job not found: 1"
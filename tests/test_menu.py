@@ -0,0 +1,223 @@
+import json
+import os
+import pickle
+import sys
+from pytest import MonkeyPatch
+from pytest_mock import MockerFixture
+from repli.callback import NativeFunction, Subprocess
+from repli.command import Command, DynamicPage, LazyPage, Page
+from repli.fanout import FanOut
+from repli.menu import Reference, Template, load
+
+MENU = """
+description = "home"
+
+[[commands]]
+description = "greet"
+function = "menu_commands:greet"
+cache = 60
+
+[[commands]]
+description = "list"
+subprocess = "ls -la {args}"
+stream = true
+arguments = [["/", "/tmp"]]
+
+[[commands]]
+description = "nested"
+alias = "nested"
+
+[[commands.commands]]
+description = "ping"
+subprocess = "ping -c 1 {0}"
+targets = ["a", "b"]
+concurrency = 2
+
+[[commands]]
+description = "lazy"
+loader = "menu_commands:page"
+
+[[commands]]
+description = "services"
+provider = "menu_commands:services"
+ttl = 10
+"""
+
+MODULE = """
+def greet(name):
+    print(f"hello {name}")
+"""
+
+
+def write_menu(tmp_path, monkeypatch: MonkeyPatch) -> str:
+    # a previous test may have imported it
+    monkeypatch.delitem(sys.modules, "menu_commands", raising=False)
+    (tmp_path / "menu_commands.py").write_text(MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    path = tmp_path / "menu.toml"
+    path.write_text(MENU)
+    return str(path)
+
+
+def test_reference(tmp_path, monkeypatch: MonkeyPatch, capsys):
+    path = write_menu(tmp_path, monkeypatch)
+    reference = Reference(target="menu_commands:greet")
+
+    assert reference.resolved == False
+    assert "menu_commands" not in sys.modules
+    reference("world")
+
+    assert reference.resolved == True
+    assert reference.__module__ == "menu_commands"
+    assert reference.__qualname__ == "greet"
+    assert capsys.readouterr().out == "hello world\n"
+    assert os.path.exists(path)
+    copy = pickle.loads(pickle.dumps(reference))
+    assert copy.resolved == False
+    assert copy.target == "menu_commands:greet"
+    assert copy.__qualname__ == "greet"
+    del sys.modules["menu_commands"]
+
+
+def test_reference_invalid():
+    try:
+        Reference(target="module.greet")
+        assert False
+    except ValueError as e:
+        assert str(e) == "invalid reference: module.greet"
+
+
+def test_template():
+    template = Template(template="grep {0} {args}")
+
+    assert template("a b", "c") == "grep 'a b' 'a b' c"
+    try:
+        template()
+        assert False
+    except Exception as e:
+        assert str(e) == "missing arguments for: grep {0} {args}"
+    try:
+        Template(template="echo {name}")
+        assert False
+    except ValueError as e:
+        assert str(e) == "invalid template: echo {name}"
+
+
+def test_load(tmp_path, monkeypatch: MonkeyPatch):
+    path = write_menu(tmp_path, monkeypatch)
+
+    page = load(path=path, cache=str(tmp_path / "cache"))
+
+    assert page.description == "home"
+    greet, listing, nested, lazy, services = page.commands.values()
+    assert isinstance(greet, Command)
+    assert isinstance(greet.callback, NativeFunction)
+    assert greet.callback.ttl == 60
+    assert isinstance(listing, Command)
+    assert isinstance(listing.callback, Subprocess)
+    assert listing.callback.stream == True
+    assert listing.arguments == [["/", "/tmp"]]
+    assert listing.callback.callable("/tmp", "a b") == "ls -la /tmp 'a b'"
+    assert isinstance(nested, Page)
+    assert nested.alias == "nested"
+    ping = nested.commands["1"]
+    assert isinstance(ping, Command)
+    assert isinstance(ping.callback, FanOut)
+    assert ping.callback.targets() == ["a", "b"]
+    assert isinstance(lazy, LazyPage)
+    assert lazy.loader == "menu_commands:page"
+    assert isinstance(services, DynamicPage)
+    assert services.provider == "menu_commands:services"
+    assert services.ttl == 10
+    assert "menu_commands" not in sys.modules
+
+
+def test_load_snapshot(tmp_path, monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    path = write_menu(tmp_path, monkeypatch)
+    cache = tmp_path / "cache"
+    spy_parse = mocker.spy(sys.modules["repli.menu"], "parse")
+    spy_build = mocker.spy(sys.modules["repli.menu"], "build")
+
+    load(path=path, cache=str(cache))
+    snapshots = os.listdir(cache)
+    built = spy_build.call_count
+    page = load(path=path, cache=str(cache))
+
+    assert spy_parse.call_count == 1
+    assert spy_build.call_count == built
+    assert len(snapshots) == 1
+    assert page.commands["1"].description == "greet"
+    services = page.commands["5"]
+    assert isinstance(services, DynamicPage)
+    assert services.ttl == 10
+    assert services.refreshing == False
+    assert "menu_commands" not in sys.modules
+
+    (tmp_path / "menu.toml").write_text(MENU.replace('"greet"', '"welcome"'))
+    page = load(path=path, cache=str(cache))
+
+    assert spy_parse.call_count == 2
+    assert page.commands["1"].description == "welcome"
+    assert len(os.listdir(cache)) == 1
+    assert os.listdir(cache) != snapshots
+
+
+def test_load_corrupted_snapshot(tmp_path, monkeypatch: MonkeyPatch):
+    path = write_menu(tmp_path, monkeypatch)
+    cache = tmp_path / "cache"
+    load(path=path, cache=str(cache))
+    snapshot = cache / os.listdir(cache)[0]
+    snapshot.write_bytes(b"corrupted")
+
+    page = load(path=path, cache=str(cache))
+
+    assert page.description == "home"
+    assert snapshot.read_bytes() != b"corrupted"
+
+
+def test_load_json(tmp_path):
+    path = tmp_path / "menu.json"
+    path.write_text(json.dumps({"description": "home", "commands": [{"description": "echo", "subprocess": "echo {args}"}]}))
+
+    page = load(path=str(path), cache=str(tmp_path / "cache"))
+
+    assert page.commands["1"].description == "echo"
+
+
+def test_load_invalid(tmp_path):
+    cases = [
+        ({"description": "home"}, "invalid menu entry: root"),
+        ({"description": "home", "function": "a:b"}, "menu is not a page: {path}"),
+        ({"commands": []}, "missing description: root"),
+        (
+            {"description": "home", "commands": [{"description": "x", "function": "a:b", "stream": True}]},
+            "invalid key in root.1: stream",
+        ),
+        (
+            {"description": "home", "commands": [{"description": "x", "function": "a:b", "subprocess": "b"}]},
+            "invalid menu entry: root.1",
+        ),
+        ({"description": "home", "commands": [{"description": "x", "function": "a.b"}]}, "invalid reference: a.b"),
+    ]
+    for index, (menu, message) in enumerate(cases):
+        path = tmp_path / f"menu{index}.json"
+        path.write_text(json.dumps(menu))
+        try:
+            load(path=str(path), cache=str(tmp_path / "cache"))
+            assert False
+        except ValueError as e:
+            assert str(e) == message.format(path=path)
+    path = tmp_path / "menu.yaml"
+    path.write_text("description: home\n")
+    try:
+        load(path=str(path), cache=str(tmp_path / "cache"))
+        assert False
+    except ValueError as e:
+        assert str(e) == f"invalid menu format: {path}"
+    path = tmp_path / "menu.json"
+    path.write_text('{"description": "home", ')
+    try:
+        load(path=str(path), cache=str(tmp_path / "cache"))
+        assert False
+    except ValueError:
+        assert not (tmp_path / "cache").exists()
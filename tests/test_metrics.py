@@ -0,0 +1,89 @@
+import json
+from pytest_mock import MockerFixture
+from repli.metrics import Metrics, Series, label, quantile
+
+
+def test_quantile():
+    samples = [float(value) for value in range(1, 101)]
+
+    assert quantile(samples, 0.5) == 50.0
+    assert quantile(samples, 0.95) == 95.0
+    assert quantile([3.0], 0.95) == 3.0
+    assert quantile([], 0.5) == 0.0
+
+
+def test_label():
+    assert label('a "b" \\c\n') == 'a \\"b\\" \\\\c\\n'
+
+
+def test_series_observe():
+    series = Series(kind="callback", path="1.2", samples=2)
+    series.observe(3.0)
+    series.observe(1.0)
+    series.observe(2.0)
+
+    assert series.count == 3
+    assert series.total == 6.0
+    assert series.max == 3.0
+    assert series.p50 == 1.0
+    assert series.p95 == 2.0
+
+
+def test_metrics_measure(mocker: MockerFixture):
+    mocker.patch("time.monotonic", side_effect=[1.0, 1.5])
+    metrics = Metrics()
+    with metrics.measure(kind="callback", path="1"):
+        pass
+
+    series = metrics.get(kind="callback", path="1")
+    assert series is not None
+    assert series.count == 1
+    assert series.max == 0.5
+    assert metrics.get(kind="render") is None
+
+
+def test_metrics_profile():
+    metrics = Metrics()
+    with metrics.profile(path="1"):
+        sum(range(10))
+
+    assert metrics.profiles == {}
+    metrics.profiling = True
+    with metrics.profile(path="1"):
+        sum(range(10))
+
+    assert "1" in metrics.profiles
+    assert "function calls" in metrics.report(path="1")
+    try:
+        metrics.report(path="2")
+        assert False
+    except Exception as e:
+        assert str(e) == "profile not found: 2"
+
+
+def test_metrics_export():
+    metrics = Metrics()
+    metrics.observe(kind="callback", path="1", duration=0.25)
+    metrics.observe(kind="render", path="", duration=0.5)
+
+    assert json.loads(metrics.export(format="json")) == [
+        {"kind": "callback", "path": "1", "count": 1, "total": 0.25, "p50": 0.25, "p95": 0.25, "max": 0.25},
+        {"kind": "render", "path": "", "count": 1, "total": 0.5, "p50": 0.5, "p95": 0.5, "max": 0.5},
+    ]
+    text = metrics.export(format="prometheus")
+    assert 'repli_duration_seconds{kind="callback",path="1",quantile="0.95"} 0.25\n' in text
+    assert 'repli_duration_seconds_count{kind="render",path=""} 1\n' in text
+    assert 'repli_duration_seconds_max{kind="render",path=""} 0.5\n' in text
+    try:
+        metrics.export(format="csv")
+        assert False
+    except ValueError as e:
+        assert str(e) == "invalid export format: csv"
+
+
+def test_metrics_reset():
+    metrics = Metrics()
+    metrics.observe(kind="callback", path="1", duration=0.25)
+    metrics.reset()
+
+    assert metrics.series == []
@@ -0,0 +1,158 @@
+import os
+import subprocess
+from pytest import MonkeyPatch
+from repli.pool import Pool, Worker
+from typing import List, Tuple
+
+
+class Lines:
+    def __init__(self) -> None:
+        self.lines: List[Tuple[str, str]] = []
+
+    def __call__(self, name: str, line: str) -> None:
+        self.lines.append((name, line))
+
+
+def test_worker_run():
+    worker = Worker()
+    output = Lines()
+
+    returncode = worker.run(arguments="sh -c 'echo out; echo err >&2; printf partial; exit 3'", output=output)
+    worker.close()
+
+    assert returncode == 3
+    assert ("stdout", "out\n") in output.lines
+    assert ("stderr", "err\n") in output.lines
+    assert ("stdout", "partial") in output.lines
+    assert worker.runs == 1
+    assert worker.alive == False
+
+
+def test_worker_run_quotes_arguments():
+    worker = Worker()
+    output = Lines()
+
+    returncode = worker.run(arguments="echo '$HOME; exit 1' *", output=output)
+    worker.close()
+
+    assert returncode == 0
+    assert output.lines == [("stdout", "$HOME; exit 1 *\n")]
+
+
+def test_worker_run_isolated(monkeypatch: MonkeyPatch, tmp_path):
+    worker = Worker()
+    output = Lines()
+    monkeypatch.chdir(tmp_path)
+
+    worker.run(arguments="cd /", output=output)
+    worker.run(arguments="export X=1", output=output)
+    worker.run(arguments="exit 1", output=output)
+    worker.run(arguments="pwd", output=output)
+    worker.run(arguments="sh -c 'echo ${X:-unset}'", output=output)
+    worker.close()
+
+    assert output.lines == [("stdout", f"{os.getcwd()}\n"), ("stdout", "unset\n")]
+
+
+def test_worker_run_timeout():
+    worker = Worker()
+
+    try:
+        worker.run(arguments="sleep 5", output=Lines(), timeout=0.1)
+        assert False
+    except subprocess.TimeoutExpired:
+        pass
+    worker.kill()
+
+    assert worker.alive == False
+
+
+def test_worker_run_exited():
+    worker = Worker()
+
+    try:
+        worker.run(arguments="sh -c 'kill -9 $PPID'", output=Lines())
+        assert False
+    except Exception as e:
+        assert str(e) == "worker exited unexpectedly"
+    worker.kill()
+
+
+def test_pool_reuses_workers():
+    pool = Pool(size=1)
+
+    pool.run(arguments="true", output=Lines())
+    worker = pool.idle[0]
+    returncode = pool.run(arguments="false", output=Lines())
+    pool.close()
+
+    assert returncode == 1
+    assert pool.spawned == 1
+    assert worker.runs == 2
+    assert pool.idle == []
+
+
+def test_pool_overflow():
+    pool = Pool(size=1)
+
+    with pool.worker() as first:
+        with pool.worker() as second:
+            assert first is not second
+    pool.close()
+
+    assert pool.spawned == 2
+    assert first.alive == False
+    assert second.alive == False
+
+
+def test_pool_respawns_crashed_worker():
+    pool = Pool(size=1)
+    pool.start()
+    worker = pool.idle[0]
+    worker.kill()
+
+    output = Lines()
+    returncode = pool.run(arguments="echo ok", output=output)
+    pool.close()
+
+    assert returncode == 0
+    assert output.lines == [("stdout", "ok\n")]
+    assert pool.spawned == 2
+
+
+def test_pool_respawns_on_environment_change(monkeypatch: MonkeyPatch):
+    pool = Pool(size=1)
+    pool.start()
+    worker = pool.idle[0]
+    monkeypatch.setenv("REPLI_POOL_TEST", "value")
+
+    output = Lines()
+    pool.run(arguments="sh -c 'echo $REPLI_POOL_TEST'", output=output)
+    pool.close()
+
+    assert output.lines == [("stdout", "value\n")]
+    assert worker.alive == False
+    assert pool.spawned == 2
+
+
+def test_pool_kills_interrupted_worker():
+    pool = Pool(size=1)
+
+    try:
+        with pool.worker() as worker:
+            raise KeyboardInterrupt()
+    except KeyboardInterrupt:
+        pass
+
+    assert worker.alive == False
+    assert pool.idle == []
+
+
+def test_pool_size():
+    pool = Pool()
+
+    try:
+        pool.size = -1
+        assert False
+    except ValueError as e:
+        assert str(e) == "invalid size: -1"
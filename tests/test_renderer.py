@@ -0,0 +1,120 @@
+from pytest_mock import MockerFixture
+from repli.console import Console
+from repli.renderer import Cached, Renderer
+from rich.console import ConsoleDimensions
+from rich.text import Text
+
+
+def test_cached_render(mocker: MockerFixture):
+    console = Console()
+    spy_console_render_lines = mocker.spy(console, "render_lines")
+
+    cached = Cached(renderable=Text("text"))
+    with console.capture() as capture_1:
+        console.print(cached, width=20)
+    with console.capture() as capture_2:
+        console.print(cached, width=20)
+
+    assert capture_1.get() == capture_2.get() == "text\n"
+    assert spy_console_render_lines.call_count == 1
+
+
+def test_cached_measure(mocker: MockerFixture):
+    console = Console()
+    spy_rich_text_measure = mocker.spy(Text, "__rich_measure__")
+
+    cached = Cached(renderable=Text("text"))
+    measurement_1 = cached.__rich_measure__(console, console.options)
+    measurement_2 = cached.__rich_measure__(console, console.options)
+
+    assert measurement_1 == measurement_2 == (4, 4)
+    assert spy_rich_text_measure.call_count == 1
+
+
+def test_renderer_init():
+    renderer = Renderer()
+
+    assert renderer.lines == []
+    assert renderer.size is None
+
+
+def test_renderer_draw_first_frame(mocker: MockerFixture):
+    mock_console = mocker.patch("repli.renderer.console")
+    mock_console.size = ConsoleDimensions(width=80, height=25)
+    mocker.patch("repli.renderer.Renderer.capture", return_value=["a", "b"])
+    mock_renderer_write = mocker.patch("repli.renderer.Renderer.write")
+
+    renderer = Renderer()
+    renderer.draw(mocker.MagicMock())
+
+    mock_renderer_write.assert_called_once_with("\x1b[H\x1b[2Ja\nb\n")
+    assert renderer.lines == ["a", "b"]
+    assert renderer.size == ConsoleDimensions(width=80, height=25)
+
+
+def test_renderer_draw_diff(mocker: MockerFixture):
+    mock_console = mocker.patch("repli.renderer.console")
+    mock_console.size = ConsoleDimensions(width=80, height=25)
+    mocker.patch("repli.renderer.Renderer.capture", side_effect=[["a", "b", "c"], ["a", "x", "c"]])
+    mock_renderer_write = mocker.patch("repli.renderer.Renderer.write")
+
+    renderer = Renderer()
+    renderer.draw(mocker.MagicMock())
+    renderer.draw(mocker.MagicMock())
+
+    mock_renderer_write.assert_called_with("\x1b[2;1Hx\x1b[K\x1b[4;1H\x1b[J")
+
+
+def test_renderer_draw_unchanged(mocker: MockerFixture):
+    mock_console = mocker.patch("repli.renderer.console")
+    mock_console.size = ConsoleDimensions(width=80, height=25)
+    mocker.patch("repli.renderer.Renderer.capture", return_value=["a", "b"])
+    mock_renderer_write = mocker.patch("repli.renderer.Renderer.write")
+
+    renderer = Renderer()
+    renderer.draw(mocker.MagicMock())
+    renderer.draw(mocker.MagicMock())
+
+    mock_renderer_write.assert_called_with("\x1b[3;1H\x1b[J")
+
+
+def test_renderer_draw_resize(mocker: MockerFixture):
+    mock_console = mocker.patch("repli.renderer.console")
+    mock_console.size = ConsoleDimensions(width=80, height=25)
+    mocker.patch("repli.renderer.Renderer.capture", return_value=["a", "b"])
+    mock_renderer_write = mocker.patch("repli.renderer.Renderer.write")
+
+    renderer = Renderer()
+    renderer.draw(mocker.MagicMock())
+    mock_console.size = ConsoleDimensions(width=100, height=25)
+    renderer.draw(mocker.MagicMock())
+
+    mock_renderer_write.assert_called_with("\x1b[H\x1b[2Ja\nb\n")
+
+
+def test_renderer_draw_invalidate(mocker: MockerFixture):
+    mock_console = mocker.patch("repli.renderer.console")
+    mock_console.size = ConsoleDimensions(width=80, height=25)
+    mocker.patch("repli.renderer.Renderer.capture", return_value=["a", "b"])
+    mock_renderer_write = mocker.patch("repli.renderer.Renderer.write")
+
+    renderer = Renderer()
+    renderer.draw(mocker.MagicMock())
+    renderer.invalidate()
+    renderer.draw(mocker.MagicMock())
+
+    assert mock_renderer_write.call_count == 2
+    mock_renderer_write.assert_called_with("\x1b[H\x1b[2Ja\nb\n")
+
+
+def test_renderer_draw_not_terminal(mocker: MockerFixture):
+    mock_console = mocker.patch("repli.renderer.console")
+    mock_console.is_terminal = False
+    mock_renderer_write = mocker.patch("repli.renderer.Renderer.write")
+    mock_renderable = mocker.MagicMock()
+
+    renderer = Renderer()
+    renderer.draw(mock_renderable)
+
+    mock_console.print.assert_called_once_with(mock_renderable)
+    mock_renderer_write.assert_not_called()
@@ -0,0 +1,33 @@
+from repli.script import Result, Step
+
+
+def test_step_init():
+    step = Step(line="1 arg1", returncode=0, duration=1.0, description="description")
+
+    assert step.line == "1 arg1"
+    assert step.returncode == 0
+    assert step.duration == 1.0
+    assert step.description == "description"
+    assert step.error is None
+    assert step.ok == True
+
+
+def test_result_ok():
+    result = Result(steps=[Step(line="1", returncode=0, duration=1.0), Step(line="2", returncode=0, duration=2.0)])
+
+    assert result.ok == True
+    assert result.duration == 3.0
+    assert result.returncode == 0
+
+
+def test_result_failed():
+    result = Result(steps=[Step(line="1", returncode=0, duration=1.0), Step(line="2", returncode=3, duration=1.0)])
+
+    assert result.ok == False
+    assert result.returncode == 3
+
+
+def test_result_failed_out_of_range():
+    result = Result(steps=[Step(line="1", returncode=-15, duration=1.0)])
+
+    assert result.returncode == 1
@@ -0,0 +1,75 @@
+from pytest_mock import MockerFixture
+from repli.callback import NativeFunction
+from repli.command import Page
+from repli.index import Index
+from repli.search import Search, trigrams
+
+
+def build() -> Page:
+    root = Page(description="home")
+    services = Page(description="services")
+    root.add_page(services)
+    services.command(NativeFunction, "restart service")(lambda: None)
+    services.command(NativeFunction, "service status")(lambda: None)
+    root.command(NativeFunction, "deploy to production")(lambda: None)
+    return root
+
+
+def test_trigrams():
+    assert trigrams("Ab  c") == frozenset([" ab", "ab ", "b c", " c "])
+
+
+def test_search_query():
+    search = Search(index=Index(root=build()))
+
+    matches = search.query("restart")
+
+    assert matches[0].entry.path == "1.1"
+    assert matches[0].breadcrumb == "home > services > restart service"
+    assert matches[0].score > 1
+
+
+def test_search_query_ranking():
+    search = Search(index=Index(root=build()))
+
+    matches = search.query("service")
+
+    assert [match.entry.path for match in matches[:2]] == ["1.2", "1.1"]
+
+
+def test_search_query_typo():
+    search = Search(index=Index(root=build()))
+
+    matches = search.query("dpeloy")
+
+    assert matches[0].entry.path == "2"
+
+
+def test_search_query_short():
+    search = Search(index=Index(root=build()))
+
+    matches = search.query("pr")
+
+    assert [match.entry.path for match in matches] == ["2"]
+
+
+def test_search_query_empty():
+    search = Search(index=Index(root=build()))
+
+    assert search.query("  ") == []
+
+
+def test_search_query_limit():
+    search = Search(index=Index(root=build()))
+
+    assert len(search.query("s", limit=2)) == 2
+
+
+def test_search_incremental(mocker: MockerFixture):
+    root = build()
+    search = Search(index=Index(root=root))
+    root.command(NativeFunction, "rollback release")(lambda: None)
+
+    matches = search.query("rollback")
+
+    assert matches[0].entry.path == "3"
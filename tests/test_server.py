@@ -0,0 +1,164 @@
+import io
+import json
+import os
+import socket
+import stat
+import sys
+import threading
+from pytest_mock import MockerFixture
+from repli.callback import NativeFunction
+from repli.command import Page
+from repli.interpreter import Interpreter
+from repli.script import Result, Step
+from repli.server import Connection, Server, report
+
+
+def messages(data: bytes) -> list:
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def test_connection_write():
+    writer = io.BytesIO()
+    connection = Connection(reader=io.BytesIO(), writer=writer)
+    connection.write("output")
+    connection.write("")
+
+    assert messages(writer.getvalue()) == [{"type": "output", "data": "output"}]
+    assert connection.isatty() == False
+
+
+def test_connection_readline():
+    reader = io.BytesIO(b'{"type": "line", "line": "1 arg"}\n{"type": "eof"}\n')
+    writer = io.BytesIO()
+    connection = Connection(reader=reader, writer=writer)
+
+    assert connection.readline() == "1 arg\n"
+    assert connection.readline() == ""
+    assert connection.readline() == ""
+    assert connection.connected == False
+    assert messages(writer.getvalue()) == [{"type": "input"}, {"type": "input"}, {"type": "input"}]
+
+
+def test_report():
+    result = Result(steps=[Step(line="1", returncode=2, duration=0.5, description="description", error="error")])
+
+    assert report(result) == {
+        "type": "result",
+        "returncode": 2,
+        "steps": [{"line": "1", "returncode": 2, "duration": 0.5, "description": "description", "error": "error"}],
+    }
+
+
+def build() -> Page:
+    page = Page(description="home")
+    page.command(NativeFunction, "hello")(lambda *args: print("hello", *args))
+    page.add_page(Page(description="nested"))
+    return page
+
+
+def connect(path: str, hello: dict) -> socket.socket:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    client.sendall((json.dumps({"type": "hello", **hello}) + "\n").encode("utf-8"))
+    return client
+
+
+def converse(client: socket.socket, lines: list) -> str:
+    # answers each request for input with the next line, then collects the output
+    output = ""
+    with client, client.makefile("rwb") as stream:
+        for line in stream:
+            message = json.loads(line)
+            if message["type"] == "output":
+                output += message["data"]
+            elif message["type"] == "input":
+                reply = {"type": "line", "line": lines.pop(0)} if lines else {"type": "eof"}
+                stream.write((json.dumps(reply) + "\n").encode("utf-8"))
+                stream.flush()
+            elif message["type"] == "exit":
+                break
+    return output
+
+
+def test_server_batch(mocker: MockerFixture, tmp_path):
+    path = str(tmp_path / "repli.sock")
+    with Server(interpreter=Interpreter(page=build()), path=path) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = connect(path, {"mode": "batch", "lines": ["1 a\n", "2\n"], "fail_fast": False})
+        with client, client.makefile("rb") as stream:
+            received = [json.loads(line) for line in stream]
+        server.shutdown()
+
+    output = "".join(message["data"] for message in received if message["type"] == "output")
+    result = [message for message in received if message["type"] == "result"][0]
+    assert "hello a\n" in output
+    assert result["returncode"] == 1
+    assert [step["returncode"] for step in result["steps"]] == [0, 1]
+    assert received[-1] == {"type": "exit"}
+
+
+def test_server_sessions(mocker: MockerFixture, tmp_path):
+    mocker.patch("repli.interpreter.Interpreter.setup")
+    path = str(tmp_path / "repli.sock")
+    interpreter = Interpreter(page=build(), name="name")
+    with Server(interpreter=interpreter, path=path) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        nested = connect(path, {"mode": "interactive"})
+        root = connect(path, {"mode": "interactive"})
+        nested_output = converse(nested, ["2"])
+        root_output = converse(root, ["1 b", ""])
+        server.shutdown()
+
+    assert "[name] home > nested" in nested_output
+    assert "hello b" in root_output
+    assert "[name] home > nested" not in root_output
+    assert interpreter.pages == [interpreter.pages[0]]
+
+
+def test_server_session_closes_jobs(mocker: MockerFixture, tmp_path):
+    spy_close = mocker.spy(sys.modules["repli.job"].JobManager, "close")
+    path = str(tmp_path / "repli.sock")
+    interpreter = Interpreter(page=build())
+    with Server(interpreter=interpreter, path=path) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = connect(path, {"mode": "batch", "lines": ["1 a\n"]})
+        with client, client.makefile("rb") as stream:
+            received = [json.loads(line) for line in stream]
+        server.shutdown()
+
+    assert received[-1] == {"type": "exit"}
+    spy_close.assert_called_once()
+    assert spy_close.call_args.args[0] is not interpreter.jobs
+
+
+def test_server_already_serving(tmp_path):
+    path = str(tmp_path / "repli.sock")
+    with Server(interpreter=Interpreter(page=build()), path=path):
+        try:
+            Server(interpreter=Interpreter(page=build()), path=path)
+            assert False
+        except Exception as e:
+            assert str(e) == f"already serving on {path}"
+
+
+def test_server_stale_socket(tmp_path):
+    path = str(tmp_path / "repli.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    with Server(interpreter=Interpreter(page=build()), path=path) as server:
+        assert server.server_address == path
+
+
+def test_server_socket_owner_only(mocker: MockerFixture, tmp_path):
+    path = str(tmp_path / "repli.sock")
+    umask = os.umask(0o022)
+    spy_umask = mocker.spy(os, "umask")
+    try:
+        with Server(interpreter=Interpreter(page=build()), path=path):
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    finally:
+        os.umask(umask)
+
+    assert [call.args for call in spy_umask.call_args_list[:2]] == [(0o177,), (0o022,)]
@@ -0,0 +1,44 @@
+from pytest_mock import MockerFixture
+from repli.console import Console
+from repli.terminal import Plain, Terminal
+
+
+def test_plain_info(capsys):
+    Plain().info("message")
+
+    assert capsys.readouterr().out == "info: message\n"
+
+
+def test_plain_error(capsys):
+    Plain().error("message")
+
+    assert capsys.readouterr().out == "error: message\n"
+
+
+def test_plain_out(capsys):
+    plain = Plain()
+    plain.out("line", highlight=False, style="yellow")
+    plain.line()
+
+    assert capsys.readouterr().out == "line\n\n"
+
+
+def test_terminal_target(mocker: MockerFixture):
+    mock_console_info = mocker.patch("repli.console.Console.info")
+
+    terminal = Terminal()
+    terminal.info("message")
+
+    assert terminal.headless == False
+    assert isinstance(terminal.target, Console)
+    mock_console_info.assert_called_once_with("message")
+
+
+def test_terminal_headless(capsys):
+    terminal = Terminal()
+    terminal.headless = True
+    terminal.info("message")
+
+    assert isinstance(terminal.target, Plain)
+    assert terminal.is_terminal == False
+    assert capsys.readouterr().out == "info: message\n"
@@ -0,0 +1,117 @@
+import io
+import os
+import sys
+from pytest import MonkeyPatch
+from pytest_mock import MockerFixture
+from repli.callback import Builtin, NativeFunction, Subprocess
+from repli.command import Command
+from repli.fanout import Target
+from repli.watch import MAX_DELAY, Watch, backoff, keys, pressed
+from rich.console import Group
+from rich.text import Text
+
+
+def test_backoff():
+    assert backoff(interval=2.0, delay=2.0, duration=0.5) == 2.0
+    assert backoff(interval=2.0, delay=2.0, duration=3.0) == 6.0
+    assert backoff(interval=2.0, delay=6.0, duration=3.0) == 12.0
+    assert backoff(interval=2.0, delay=12.0, duration=1.0) == 2.0
+    assert backoff(interval=2.0, delay=48.0, duration=3.0) == MAX_DELAY
+    assert backoff(interval=90.0, delay=90.0, duration=100.0) == 90.0
+
+
+def test_keys_without_terminal(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(sys, "stdin", io.StringIO())
+
+    with keys() as fd:
+        assert fd is None
+
+
+def test_pressed(mocker: MockerFixture):
+    read, write = os.pipe()
+    try:
+        assert pressed(fd=read, timeout=0.0) == False
+        os.write(write, b"q")
+        assert pressed(fd=read, timeout=0.0) == True
+        assert pressed(fd=read, timeout=0.0) == False
+    finally:
+        os.close(read)
+        os.close(write)
+
+
+def test_pressed_without_terminal(mocker: MockerFixture):
+    mock_sleep = mocker.patch("time.sleep")
+
+    assert pressed(fd=None, timeout=1.5) == False
+    mock_sleep.assert_called_once_with(1.5)
+
+
+def test_watch_init_invalid(mocker: MockerFixture):
+    try:
+        Watch(command=Command(description="description", callback=Builtin(callable=mocker.MagicMock())), args=[])
+        assert False
+    except Exception as e:
+        assert str(e) == "only native functions and subprocesses can be watched"
+    try:
+        command = Command(description="description", callback=NativeFunction(callable=mocker.MagicMock()))
+        Watch(command=command, args=[], interval=0)
+        assert False
+    except Exception as e:
+        assert str(e) == "invalid interval: 0"
+
+
+def test_watch_step(mocker: MockerFixture):
+    mock_callable = mocker.MagicMock(return_value="echo up")
+    command = Command(description="status", callback=Subprocess(callable=mock_callable))
+
+    watch = Watch(command=command, args=["web"], interval=1.0)
+    target = watch.step()
+
+    mock_callable.assert_called_once_with("web")
+    assert target.returncode == 0
+    assert target.output == "up\n"
+    assert watch.runs == 1
+    assert watch.delay == 1.0
+
+
+def test_watch_frame(mocker: MockerFixture):
+    command = Command(description="status", callback=NativeFunction(callable=mocker.MagicMock()))
+    target = Target(name="status")
+    target.start()
+    target.finish(returncode=0, output="one\ntwo\n")
+
+    watch = Watch(command=command, args=["web"], interval=1.0)
+    frame = watch.frame(target)
+
+    assert isinstance(frame, Group)
+    title, status, _, output = frame.renderables
+    assert isinstance(title, Text) and title.plain == "every 1s  status web"
+    assert isinstance(status, Text) and status.plain.endswith("exit 0 in 0.0s  press any key to stop")
+    assert isinstance(output, Text) and output.plain == "one\ntwo"
+
+
+def test_watch_run(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mock_pressed = mocker.patch("repli.watch.pressed", side_effect=[False, False, True])
+    mock_callable = mocker.MagicMock(side_effect=lambda: print("up"))
+    command = Command(description="status", callback=NativeFunction(callable=mock_callable))
+
+    watch = Watch(command=command, args=[], interval=1.0)
+    mock_renderer_draw = mocker.patch.object(watch.renderer, "draw")
+    watch.run()
+
+    assert mock_callable.call_count == 3
+    assert mock_renderer_draw.call_count == 3
+    assert mock_pressed.call_count == 3
+    assert watch.runs == 3
+
+
+def test_watch_run_interrupted(mocker: MockerFixture):
+    mocker.patch("repli.watch.pressed", side_effect=KeyboardInterrupt)
+    command = Command(description="status", callback=NativeFunction(callable=mocker.MagicMock()))
+
+    watch = Watch(command=command, args=[], interval=1.0)
+    mocker.patch.object(watch.renderer, "draw")
+    watch.run()
+
+    assert watch.runs == 1
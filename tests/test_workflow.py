@@ -0,0 +1,244 @@
+import io
+import sys
+import threading
+from pytest import MonkeyPatch
+from pytest_mock import MockerFixture
+from repli.callback import Builtin, NativeFunction, Subprocess
+from repli.command import Command
+from repli.fanout import Target
+from repli.workflow import Step, Workflow, order
+
+
+def native(callable) -> Command:
+    return Command(description="description", callback=NativeFunction(callable=callable))
+
+
+def test_step(mocker: MockerFixture):
+    command = native(mocker.MagicMock())
+    step = Step(name="test", command=command, after=["build"], arguments=["-v"])
+
+    assert step.name == "test"
+    assert step.command == command
+    assert step.after == ["build"]
+    assert step.arguments == ["-v"]
+
+
+def test_order(mocker: MockerFixture):
+    command = native(mocker.MagicMock())
+    steps = [
+        Step(name="deploy", command=command, after=["test", "lint"]),
+        Step(name="test", command=command, after=["build"]),
+        Step(name="build", command=command),
+        Step(name="lint", command=command),
+    ]
+
+    assert [step.name for step in order(steps)] == ["build", "lint", "test", "deploy"]
+
+
+def test_order_unknown_dependency(mocker: MockerFixture):
+    try:
+        order([Step(name="test", command=native(mocker.MagicMock()), after=["build"])])
+    except ValueError as e:
+        assert str(e) == "unknown dependency of step test: build"
+
+
+def test_order_duplicate_step(mocker: MockerFixture):
+    command = native(mocker.MagicMock())
+
+    try:
+        order([Step(name="build", command=command), Step(name="build", command=command)])
+    except ValueError as e:
+        assert str(e) == "duplicate step: build"
+
+
+def test_order_cycle(mocker: MockerFixture):
+    command = native(mocker.MagicMock())
+    steps = [
+        Step(name="build", command=command),
+        Step(name="a", command=command, after=["b", "build"]),
+        Step(name="b", command=command, after=["a"]),
+    ]
+
+    try:
+        order(steps)
+    except ValueError as e:
+        assert str(e) == "dependency cycle between steps: a, b"
+
+
+def test_workflow_init(mocker: MockerFixture):
+    command = native(mocker.MagicMock())
+    workflow = Workflow(steps=[Step(name="build", command=command)], concurrency=2, policy="stop")
+
+    assert [step.name for step in workflow.steps] == ["build"]
+    assert workflow.concurrency == 2
+    assert workflow.policy == "stop"
+
+
+def test_workflow_init_invalid_policy(mocker: MockerFixture):
+    try:
+        Workflow(steps=[], policy="retry")
+    except ValueError as e:
+        assert str(e) == "invalid policy: retry"
+
+
+def test_workflow_init_invalid_callback(mocker: MockerFixture):
+    command = Command(description="description", callback=Builtin(callable=mocker.MagicMock()))
+
+    try:
+        Workflow(steps=[Step(name="build", command=command)])
+    except ValueError as e:
+        assert str(e) == "invalid callback type of step: build"
+
+
+def test_workflow_init_unresolved_command(mocker: MockerFixture):
+    try:
+        Workflow(steps=[Step(name="build", command="build")])
+    except ValueError as e:
+        assert str(e) == "unresolved command of step build: build"
+
+
+def test_workflow_dispatch_subprocess(mocker: MockerFixture):
+    mock_callable = mocker.MagicMock(return_value="echo build")
+    command = Command(description="description", callback=Subprocess(callable=mock_callable))
+    step = Step(name="build", command=command, arguments=["-v"])
+    workflow = Workflow(steps=[step])
+    target = Target(name="build")
+
+    workflow.dispatch(step, target, "arg1")
+
+    mock_callable.assert_called_once_with("-v", "arg1")
+    assert target.status == "ok"
+    assert target.output == "build\n"
+
+
+def test_workflow_call(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mocker.patch("repli.callback.Callback.__call__")
+    mock_console_info = mocker.patch("repli.console.Console.info")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_console_out = mocker.patch("repli.console.Console.out")
+    calls = []
+    started = threading.Barrier(2, timeout=5)
+
+    def step(name: str) -> Command:
+        def callable(*args: str) -> None:
+            # independent steps only pass the barrier when they run at the same time
+            if name in ["lint", "test"]:
+                started.wait()
+            calls.append(name)
+            print(name)
+
+        return native(callable)
+
+    workflow = Workflow(
+        steps=[
+            Step(name="build", command=step("build")),
+            Step(name="lint", command=step("lint"), after=["build"]),
+            Step(name="test", command=step("test"), after=["build"]),
+            Step(name="deploy", command=step("deploy"), after=["lint", "test"]),
+        ],
+        concurrency=2,
+    )
+    result, returncode = workflow.invoke()
+
+    assert calls[0] == "build"
+    assert sorted(calls[1:3]) == ["lint", "test"]
+    assert calls[3] == "deploy"
+    assert mock_console_out.call_count == 4
+    mock_console_info.assert_has_calls(
+        [
+            mocker.call("running 4 steps with concurrency 2"),
+            mocker.call("all 4 steps succeeded"),
+        ]
+    )
+    mock_console_error.assert_not_called()
+    assert returncode == 0
+    assert result == False
+
+
+def test_workflow_run_skip(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.out")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_build = mocker.MagicMock(side_effect=Exception("test"))
+    mock_test = mocker.MagicMock()
+    mock_lint = mocker.MagicMock()
+
+    workflow = Workflow(
+        steps=[
+            Step(name="build", command=native(mock_build)),
+            Step(name="test", command=native(mock_test), after=["build"]),
+            Step(name="lint", command=native(mock_lint)),
+        ],
+        concurrency=1,
+    )
+    result = workflow.run()
+
+    mock_test.assert_not_called()
+    mock_lint.assert_called_once_with()
+    mock_console_error.assert_called_once_with("2 of 3 steps did not succeed")
+    assert result == 1
+
+
+def test_workflow_run_stop(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.out")
+    mock_console_error = mocker.patch("repli.console.Console.error")
+    mock_lint = mocker.MagicMock()
+
+    workflow = Workflow(
+        steps=[
+            Step(name="build", command=native(mocker.MagicMock(side_effect=Exception("test")))),
+            Step(name="lint", command=native(mock_lint)),
+        ],
+        concurrency=1,
+        policy="stop",
+    )
+    result = workflow.run()
+
+    mock_lint.assert_not_called()
+    mock_console_error.assert_has_calls(
+        [
+            mocker.call("step build failed, cancelling remaining steps"),
+            mocker.call("2 of 2 steps did not succeed"),
+        ]
+    )
+    assert result == 1
+
+
+def test_workflow_run_continue(monkeypatch: MonkeyPatch, mocker: MockerFixture):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    mocker.patch("repli.console.Console.info")
+    mocker.patch("repli.console.Console.out")
+    mocker.patch("repli.console.Console.error")
+    mock_test = mocker.MagicMock()
+
+    workflow = Workflow(
+        steps=[
+            Step(name="build", command=native(mocker.MagicMock(side_effect=Exception("test")))),
+            Step(name="test", command=native(mock_test), after=["build"]),
+        ],
+        policy="continue",
+    )
+    result = workflow.run()
+
+    mock_test.assert_called_once_with()
+    assert result == 1
+
+
+def test_workflow_table(mocker: MockerFixture):
+    command = native(mocker.MagicMock())
+    workflow = Workflow(steps=[Step(name="build", command=command), Step(name="test", command=command, after=["build"])])
+    targets = {"build": Target(name="build"), "test": Target(name="test")}
+    targets["build"].start()
+    targets["build"].finish(returncode=0, output="")
+    targets["test"].skip()
+
+    table = workflow.table(targets)
+
+    assert [column.header for column in table.columns] == ["step", "after", "status", "duration", "exit"]
+    assert list(table.columns[1].cells) == ["-", "build"]
+    assert list(table.columns[2].cells) == ["ok", "skipped"]
+    assert list(table.columns[4].cells) == ["0", "-"]